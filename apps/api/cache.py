@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time as _time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+
+from people_analytics.core.settings import get_settings
+from people_analytics.core.timeutils import parse_date
+from people_analytics.db.crud import jobs as jobs_crud
+from people_analytics.db.async_session import get_async_session
+
+
+class KpiCache:
+    # In-process TTL cache for KPI responses. Entries remember which stores and
+    # which date range they cover so that a finished KPI_REBUILD job for a
+    # store/day drops only the affected responses.
+    def __init__(self, ttl_s: float, max_entries: int = 1024, poll_s: float = 5.0):
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.poll_s = poll_s
+        self._entries: OrderedDict[Hashable, tuple[float, frozenset[int], date, date, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_poll = 0.0
+        self._since = datetime.now(timezone.utc)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_s > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < _time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[4]
+
+    def set(self, key: Hashable, value: Any, store_ids: Iterable[int], start: date, end: date) -> None:
+        with self._lock:
+            self._entries[key] = (_time.monotonic() + self.ttl_s, frozenset(store_ids), start, end, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, store_id: int | None, day: date | None) -> int:
+        with self._lock:
+            stale = [
+                key
+                for key, (_, store_ids, start, end, _) in self._entries.items()
+                if (store_id is None or store_id in store_ids) and (day is None or start <= day <= end)
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def sync_invalidations(self, session) -> None:
+        # Workers run in other processes, so completed rebuilds are picked up by
+        # polling jobs.finished_at. The window overlaps the previous poll to
+        # tolerate commit delays and clock skew; invalidating twice is harmless.
+        now = datetime.now(timezone.utc)
+        since = self._since - timedelta(seconds=max(self.poll_s * 2, 5))
+        for job in jobs_crud.list_finished_since(session, "KPI_REBUILD", since):
+            payload = job.payload_json or {}
+            day = payload.get("date")
+            self.invalidate(payload.get("store_id"), parse_date(day) if day else None)
+        self._since = now
+
+    async def maybe_sync(self) -> None:
+        if _time.monotonic() < self._next_poll:
+            return
+        self._next_poll = _time.monotonic() + self.poll_s
+        async with get_async_session() as session:
+            await session.run_sync(self.sync_invalidations)
+
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        store_ids: Iterable[int],
+        start: date,
+        end: date,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        if not self.enabled:
+            return await compute()
+        await self.maybe_sync()
+        value = self.get(key)
+        if value is None:
+            value = await compute()
+            self.set(key, value, store_ids, start, end)
+        return value
+
+
+_cache: KpiCache | None = None
+
+
+def get_kpi_cache() -> KpiCache:
+    global _cache
+    if _cache is None:
+        settings = get_settings()
+        _cache = KpiCache(
+            ttl_s=settings.kpi_cache_ttl_s,
+            max_entries=settings.kpi_cache_max_entries,
+            poll_s=settings.kpi_cache_poll_s,
+        )
+    return _cache
@@ -1,10 +1,60 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
 
-from apps.api.routers import health, kpis, segments, stores
+from fastapi import FastAPI, Request
+from fastapi.middleware.gzip import GZipMiddleware
 
-app = FastAPI(title="People Analytics")
+from apps.api.routers import events, faces, health, kpis, segments, stores
+from people_analytics.core import metrics
+from people_analytics.core.settings import get_settings
+from people_analytics.db.async_session import dispose_async_engine
 
-app.include_router(health.router)
-app.include_router(stores.router, prefix="/stores", tags=["stores"])
-app.include_router(segments.router, prefix="/segments", tags=["segments"])
-app.include_router(kpis.router, prefix="/kpis", tags=["kpis"])
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    await dispose_async_engine()
+
+
+app = FastAPI(title="People Analytics", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=get_settings().api_gzip_min_size)
+
+
+def _route_label(request: Request) -> str:
+    # Label by the matched route template, not the raw path (path params would
+    # blow up cardinality); 404s and the like share one "unmatched" label.
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    return _ROUTE_TEMPLATES.get(id(route)) or getattr(route, "path", None) or "unmatched"
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    path = _route_label(request)
+    metrics.HTTP_SECONDS.labels(request.method, path).observe(time.perf_counter() - start)
+    metrics.HTTP_REQUESTS.labels(request.method, path, str(response.status_code)).inc()
+    return response
+
+
+_ROUTERS = (
+    (health.router, ""),
+    (stores.router, "/stores"),
+    (segments.router, "/segments"),
+    (events.router, "/events"),
+    (faces.router, "/faces"),
+    (kpis.router, "/kpis"),
+)
+for _router, _prefix in _ROUTERS:
+    app.include_router(_router, prefix=_prefix, tags=[_prefix.strip("/")] if _prefix else None)
+
+# Recent FastAPI resolves included routers lazily and puts the router's own
+# route (path without the include prefix) in scope["route"]; older releases
+# copy routes with the prefix applied, so their path is already the template.
+_ROUTE_TEMPLATES = {id(route): prefix + route.path for router, prefix in _ROUTERS for route in router.routes}
+
+metrics_app = metrics.metrics_asgi_app()
+if metrics_app is not None:
+    app.mount("/metrics", metrics_app)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from people_analytics.core import jsonio
+from people_analytics.core.settings import get_settings
+from people_analytics.db.async_session import get_async_session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# fetch_page(session, limit, cursor=...) -> ORM rows exposing to_dict()
+FetchPage = Callable[..., list]
+
+
+@dataclass(frozen=True)
+class Keyset:
+    # The columns a listing orders by, in order; cursors are the last row's
+    # values, urlsafe-base64 JSON so clients treat them as opaque.
+    fields: tuple[str, ...]
+
+    def encode(self, item: dict) -> str:
+        values = [item[name] for name in self.fields]
+        return base64.urlsafe_b64encode(jsonio.dumps(values).encode("utf-8")).decode("ascii")
+
+    def decode(self, cursor: str | None):
+        # fetch_page gets a scalar for one-column keysets, a tuple otherwise
+        if cursor is None:
+            return None
+        try:
+            values = jsonio.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError(cursor)
+            values = [datetime.fromisoformat(v) if name == "ts" else int(v) for name, v in zip(self.fields, values)]
+        except (ValueError, TypeError, UnicodeEncodeError, binascii.Error):
+            raise HTTPException(status_code=400, detail="invalid cursor")
+        return values[0] if len(values) == 1 else tuple(values)
+
+
+# Events and faces are filtered on a ts range: ordering by (ts, id) walks the
+# (store_id, ts) indexes and keeps pages in time order even when rows of one
+# day were inserted out of order (reprocessed segments). Segments list newest
+# first by id only: they have no ts column.
+BY_ID = Keyset(("id",))
+BY_TS_ID = Keyset(("ts", "id"))
+
+
+def _clamp_limit(limit: int) -> int:
+    return max(1, min(limit, get_settings().api_page_max))
+
+
+def _page_dicts(session, fetch_page: FetchPage, limit: int, cursor) -> list[dict]:
+    return [row.to_dict() for row in fetch_page(session, limit, cursor=cursor)]
+
+
+async def _fetch(fetch_page: FetchPage, limit: int, cursor) -> list[dict]:
+    # Each page gets its own short session; the keyset cursor makes pages
+    # independent, so long exports never pin a connection or a transaction.
+    async with get_async_session() as session:
+        return await session.run_sync(_page_dicts, fetch_page, limit, cursor)
+
+
+async def iter_ndjson(fetch_page: FetchPage, keyset: Keyset, cursor, batch_size: int) -> AsyncIterator[bytes]:
+    while True:
+        items = await _fetch(fetch_page, batch_size, cursor)
+        if not items:
+            return
+        yield ("\n".join(jsonio.dumps(item) for item in items) + "\n").encode("utf-8")
+        if len(items) < batch_size:
+            return
+        cursor = keyset.decode(keyset.encode(items[-1]))
+
+
+async def paged_response(fetch_page: FetchPage, keyset: Keyset, cursor: str | None, limit: int, output: str):
+    limit = _clamp_limit(limit)
+    after = keyset.decode(cursor)
+    if output == "ndjson":
+        return StreamingResponse(iter_ndjson(fetch_page, keyset, after, limit), media_type="application/x-ndjson")
+
+    items = await _fetch(fetch_page, limit, after)
+    headers = {}
+    if len(items) == limit:
+        headers[NEXT_CURSOR_HEADER] = keyset.encode(items[-1])
+    return JSONResponse(jsonable_encoder(items), headers=headers)
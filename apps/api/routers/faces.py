@@ -0,0 +1,30 @@
+from datetime import datetime
+from functools import partial
+from typing import Literal
+
+from fastapi import APIRouter, Query
+
+from apps.api.pagination import BY_TS_ID, paged_response
+from people_analytics.db.crud import faces as faces_crud
+
+router = APIRouter()
+
+
+@router.get("")
+async def list_faces(
+    limit: int = 1000,
+    store_id: int | None = None,
+    camera_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
+    fetch_page = partial(
+        faces_crud.list_faces_page,
+        store_id=store_id,
+        camera_id=camera_id,
+        start=start,
+        end=end,
+    )
+    return await paged_response(fetch_page, BY_TS_ID, cursor, limit, output)
@@ -1,20 +1,183 @@
-from fastapi import APIRouter
+from datetime import date as date_type
+from datetime import datetime, time, timedelta
 
+from fastapi import APIRouter, HTTPException, Query
+
+from apps.api.cache import get_kpi_cache
+from people_analytics.core.settings import get_settings
+from people_analytics.core.timeutils import parse_date, to_utc
+from people_analytics.db.crud import events as events_crud
+from people_analytics.db.crud import faces as faces_crud
 from people_analytics.db.crud import kpis as kpis_crud
-from people_analytics.db.session import get_session
+from people_analytics.db.async_session import get_async_session
+from people_analytics.kpi.aggregators.occupancy import OccupancyAggregator
+from people_analytics.kpi.rollups import month_end, month_start, week_start
 
 router = APIRouter()
 
+MAX_RANGE_DAYS = 366
+
+
+def _day_bounds(date: str, tz_name: str) -> tuple[datetime, datetime]:
+    start_local = datetime.combine(parse_date(date), time.min)
+    return to_utc(start_local, tz_name), to_utc(start_local + timedelta(days=1), tz_name)
+
+
+def _date_range(date: str | None, from_: str | None, to: str | None) -> tuple[date_type, date_type]:
+    try:
+        if from_ or to:
+            start = parse_date(from_ or to)
+            end = parse_date(to or from_)
+        elif date:
+            start = end = parse_date(date)
+        else:
+            raise HTTPException(status_code=400, detail="Provide date or from/to")
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if end < start:
+        raise HTTPException(status_code=400, detail="to must not be before from")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range limited to {MAX_RANGE_DAYS} days")
+    return start, end
+
 
 @router.get("/hourly")
-def hourly_kpis(store_id: int, date: str, camera_id: int | None = None) -> list[dict]:
-    with get_session() as session:
-        rows = kpis_crud.list_hourly(session, store_id, camera_id, date)
-        return [r.to_dict() for r in rows]
+async def hourly_kpis(
+    store_id: int,
+    date: str | None = None,
+    camera_id: int | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    start, end = _date_range(date, from_, to)
+
+    async def compute() -> list[dict]:
+        async with get_async_session() as session:
+            rows = await session.run_sync(kpis_crud.list_hourly_range, [store_id], camera_id, start, end)
+            return [r.to_dict() for r in rows]
+
+    return await get_kpi_cache().get_or_compute(("hourly", store_id, camera_id, start, end), [store_id], start, end, compute)
 
 
 @router.get("/shift")
-def shift_kpis(store_id: int, date: str, camera_id: int | None = None) -> list[dict]:
-    with get_session() as session:
-        rows = kpis_crud.list_shift(session, store_id, camera_id, date)
+async def shift_kpis(
+    store_id: int,
+    date: str | None = None,
+    camera_id: int | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    start, end = _date_range(date, from_, to)
+
+    async def compute() -> list[dict]:
+        async with get_async_session() as session:
+            rows = await session.run_sync(kpis_crud.list_shift_range, [store_id], camera_id, start, end)
+            return [r.to_dict() for r in rows]
+
+    return await get_kpi_cache().get_or_compute(("shift", store_id, camera_id, start, end), [store_id], start, end, compute)
+
+
+@router.get("/daily")
+async def daily_kpis(
+    store_id: int,
+    camera_id: int | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    start, end = _date_range(None, from_, to)
+
+    async def compute() -> list[dict]:
+        async with get_async_session() as session:
+            return await session.run_sync(kpis_crud.daily_totals, [store_id], camera_id, start, end)
+
+    return await get_kpi_cache().get_or_compute(("daily", store_id, camera_id, start, end), [store_id], start, end, compute)
+
+
+async def _rollup_endpoint(period: str, store_id: int, camera_id: int | None, from_: str | None, to: str | None) -> list[dict]:
+    start, end = _date_range(None, from_, to)
+    # The rows cover whole periods, so the cached range does too: a rebuild of
+    # any day in the last week/month must drop the response.
+    if period == "weekly":
+        start, end = week_start(start), week_start(end) + timedelta(days=6)
+    else:
+        start, end = month_start(start), month_end(end)
+
+    async def compute() -> list[dict]:
+        async with get_async_session() as session:
+            rows = await session.run_sync(kpis_crud.list_rollup, period, [store_id], camera_id, start, end)
+            return [r.to_dict() for r in rows]
+
+    return await get_kpi_cache().get_or_compute((period, store_id, camera_id, start, end), [store_id], start, end, compute)
+
+
+@router.get("/weekly")
+async def weekly_kpis(
+    store_id: int,
+    camera_id: int | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    return await _rollup_endpoint("weekly", store_id, camera_id, from_, to)
+
+
+@router.get("/monthly")
+async def monthly_kpis(
+    store_id: int,
+    camera_id: int | None = None,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    return await _rollup_endpoint("monthly", store_id, camera_id, from_, to)
+
+
+@router.get("/compare")
+async def compare_stores(
+    store_ids: list[int] = Query(...),
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+) -> list[dict]:
+    start, end = _date_range(None, from_, to)
+    ids = sorted(set(store_ids))
+
+    async def compute() -> list[dict]:
+        async with get_async_session() as session:
+            rows = await session.run_sync(kpis_crud.daily_totals, ids, None, start, end)
+        by_store = {
+            sid: {"store_id": sid, "in": 0, "out": 0, "staff_in": 0, "staff_out": 0, "daily": []} for sid in ids
+        }
+        for row in rows:
+            store = by_store[row["store_id"]]
+            for key in ("in", "out", "staff_in", "staff_out"):
+                store[key] += row[key]
+            store["daily"].append(row)
+        return list(by_store.values())
+
+    return await get_kpi_cache().get_or_compute(("compare", tuple(ids), start, end), ids, start, end, compute)
+
+
+@router.get("/visitors")
+async def visitor_kpis(store_id: int, date: str) -> dict:
+    start, end = _day_bounds(date, get_settings().timezone)
+    async with get_async_session() as session:
+        summary = await session.run_sync(faces_crud.visitor_summary, store_id, start, end)
+    return {"store_id": store_id, "date": date, **summary}
+
+
+@router.get("/occupancy")
+async def occupancy_kpis(store_id: int, date: str, camera_id: int | None = None, resolution_s: int = 60) -> list[dict]:
+    tz_name = get_settings().timezone
+    start, end = _day_bounds(date, tz_name)
+    aggregator = OccupancyAggregator(resolution_s=resolution_s)
+    async with get_async_session() as session:
+        rows = await session.run_sync(events_crud.list_flow_rows, store_id, camera_id, start, end)
+    for row in rows:
+        aggregator.add({"ts": row.ts, "direction": row.direction})
+    return aggregator.series(tz_name)
+
+
+@router.get("/presence")
+async def presence_kpis(store_id: int, date: str, camera_id: int | None = None) -> list[dict]:
+    start, end = _day_bounds(date, get_settings().timezone)
+    async with get_async_session() as session:
+        rows = await session.run_sync(events_crud.list_presence, store_id, camera_id, start, end)
         return [r.to_dict() for r in rows]
@@ -1,13 +1,30 @@
-from fastapi import APIRouter
+from datetime import datetime
+from functools import partial
+from typing import Literal
 
+from fastapi import APIRouter, Query
+
+from apps.api.pagination import BY_ID, paged_response
 from people_analytics.db.crud import segments as segments_crud
-from people_analytics.db.session import get_session
 
 router = APIRouter()
 
 
 @router.get("")
-def list_segments(limit: int = 100) -> list[dict]:
-    with get_session() as session:
-        segments = segments_crud.list_segments(session, limit)
-        return [s.to_dict() for s in segments]
+async def list_segments(
+    limit: int = 100,
+    store_id: int | None = None,
+    camera_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: str | None = None,
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+):
+    fetch_page = partial(
+        segments_crud.list_segments,
+        store_id=store_id,
+        camera_id=camera_id,
+        start=start,
+        end=end,
+    )
+    return await paged_response(fetch_page, BY_ID, cursor, limit, output)
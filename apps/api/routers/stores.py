@@ -1,13 +1,13 @@
 from fastapi import APIRouter
 
+from people_analytics.db.async_session import get_async_session
 from people_analytics.db.crud import segments as segments_crud
-from people_analytics.db.session import get_session
 
 router = APIRouter()
 
 
 @router.get("")
-def list_stores() -> list[dict]:
-    with get_session() as session:
-        stores = segments_crud.list_stores(session)
+async def list_stores() -> list[dict]:
+    async with get_async_session() as session:
+        stores = await session.run_sync(segments_crud.list_stores)
         return [s.to_dict() for s in stores]
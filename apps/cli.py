@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-import json
+import shutil
 import subprocess
+import sys
+import tempfile
 from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, time, timezone
 from itertools import repeat
@@ -11,23 +13,41 @@ from typing import Optional
 import typer
 from rich import print as rprint
 
+from people_analytics.core import jsonio
 from people_analytics.core.config import (
     load_camera_config,
     load_shifts_config,
     load_stores_config,
+    load_yaml,
 )
+from people_analytics.core.exceptions import AnalyticsError, DetectorUnavailable, ExportError
 from people_analytics.core.logging import configure_logging
 from people_analytics.core.settings import get_settings
-from people_analytics.core.timeutils import combine_date_time
-from people_analytics.db.crud import events as events_crud
-from people_analytics.db.crud import faces as faces_crud
+from people_analytics.core.timeutils import combine_date_time, parse_date
 from people_analytics.db.crud import jobs as jobs_crud
 from people_analytics.db.crud import segments as segments_crud
+from people_analytics.db.partitions import (
+    PARTITIONED_TABLES,
+    convert_to_partitioned,
+    ensure_month_partitions,
+    partition_horizon,
+)
 from people_analytics.db.session import get_session, init_db
+from people_analytics.db.sink import DbSink, replay_into_db
 from people_analytics.kpi.rebuild import rebuild_for_date
-from people_analytics.storage.scanner import scan_videos
+from people_analytics.kpi.rollups import backfill_rollups
+from people_analytics.reid.assign import store_visitor_ids
+from people_analytics.storage.ingest import IdCache, register_paths, run_ingest
+from people_analytics.storage.parquet import ParquetExporter
+from people_analytics.storage.scanner import ScanState
+from people_analytics.storage.watcher import VideoWatcher
 from people_analytics.storage.paths import parse_video_path
 from people_analytics.vision.pipeline import build_pipeline
+from people_analytics.vision.profiling import profile_to
+from people_analytics.vision.quantization import quantize_model, sample_frames
+from people_analytics.vision.replay import load_recording, replay_recording
+from people_analytics.vision.result_cache import ResultCache, build_result_cache, load_result, run_cache_key
+from people_analytics.vision.sinks import JsonlSink, spool_paths, write_segment_line
 
 app = typer.Typer(help="People analytics CLI")
 
@@ -41,22 +61,88 @@ def _init_worker(
     camera_code: str,
     tz_name: str,
     faces_root: str | None,
+    detect_workers: int = 0,
+    tracks_root: str | None = None,
 ) -> None:
     camera_cfg = load_camera_config(config_dir, store_code, camera_code)
-    _WORKER_CONTEXT["pipeline"] = build_pipeline(camera_cfg, faces_root=faces_root)
+    _WORKER_CONTEXT["pipeline"] = build_pipeline(
+        camera_cfg, faces_root=faces_root, detect_workers=detect_workers, tracks_root=tracks_root
+    )
     _WORKER_CONTEXT["tz_name"] = tz_name
     _WORKER_CONTEXT["video_root"] = None
 
 
-def _process_segment_worker(segment_path: str, video_root: str, max_seconds: float | None) -> dict:
-    pipeline = _WORKER_CONTEXT["pipeline"]
-    tz_name = _WORKER_CONTEXT["tz_name"]
-    info = parse_video_path(Path(segment_path), Path(video_root))
+def _run_segment(
+    pipeline,
+    segment_path: Path,
+    video_root: Path,
+    tz_name: str,
+    max_seconds: float | None,
+    spool_root: str | None = None,
+) -> dict:
+    # With spool_root the records are streamed to <spool_root>/<segment stem>/
+    # and the returned output has empty record lists (see write_segment_line).
+    info = parse_video_path(segment_path, video_root)
     base_ts = combine_date_time(info.date, info.start_time, tz_name)
-    result = pipeline.run(Path(segment_path), base_ts=base_ts, max_seconds=max_seconds, segment_info=info)
+    sink = JsonlSink(Path(spool_root) / segment_path.stem) if spool_root else None
+    try:
+        result = pipeline.run(
+            segment_path,
+            base_ts=base_ts,
+            max_seconds=max_seconds,
+            segment_info=info,
+            sink=sink,
+            keep_records=sink is None,
+        )
+    finally:
+        if sink is not None:
+            sink.close()
     return result.to_output(info, tz_name)
 
 
+def _process_segment_worker(
+    segment_path: str, video_root: str, max_seconds: float | None, spool_root: str | None = None
+) -> dict:
+    pipeline = _WORKER_CONTEXT["pipeline"]
+    tz_name = _WORKER_CONTEXT["tz_name"]
+    return _run_segment(pipeline, Path(segment_path), Path(video_root), tz_name, max_seconds, spool_root)
+
+
+def _write_output(
+    f,
+    output: dict,
+    segment_path: Path,
+    spool_root: str | None,
+    exporter: ParquetExporter | None = None,
+    compact: bool = False,
+    cache: ResultCache | None = None,
+    cache_key: str | None = None,
+) -> None:
+    # cached outputs carry their records inline and are not stored again
+    hit = output.get("meta", {}).get("cache_hit")
+    if cache_key is None or hit:
+        cache = None
+    if spool_root is None or hit:
+        f.write(jsonio.dumps(jsonio.compact_output(output) if compact else output) + "\n")
+        if exporter is not None:
+            exporter.export_segment(output)
+        if cache is not None:
+            cache.put(cache_key, output)
+        return
+    spool_dir = Path(spool_root) / segment_path.stem
+    write_segment_line(f, output, spool_paths(spool_dir), compact=compact)
+    if exporter is not None:
+        exporter.export_segment(output, spool_paths(spool_dir))
+    if cache is not None:
+        cache.put(cache_key, output, spool_paths(spool_dir))
+    shutil.rmtree(spool_dir, ignore_errors=True)
+
+
+def _tracks_root(settings, record_tracks: bool | None) -> str | None:
+    enabled = settings.record_tracks if record_tracks is None else record_tracks
+    return settings.tracks_root if enabled else None
+
+
 def _split_with_ffmpeg(
     input_path: Path,
     output_dir: Path,
@@ -130,24 +216,53 @@ def ingest(
     video_root: Optional[str] = None,
     dry_run: bool = False,
     limit: int = 0,
+    full: bool = typer.Option(False, help="Ignore the directory-mtime cache and rescan every partition"),
+    since: Optional[str] = typer.Option(None, help="Only scan date= partitions on/after YYYY-MM-DD"),
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    watch: bool = typer.Option(False, help="Keep running and register new files as soon as they are stable"),
 ) -> None:
     configure_logging()
     settings = get_settings()
     root = Path(video_root or settings.video_root)
     store_cfg = load_stores_config(settings.config_dir)
 
-    count = 0
-    with get_session() as session:
-        for info in scan_videos(root):
-            store = segments_crud.ensure_store(session, info.store_code, store_cfg.get(info.store_code))
-            camera = segments_crud.ensure_camera(session, store.id, info.camera_code)
-            segment, created = segments_crud.upsert_video_segment(session, store.id, camera.id, info, root)
-            if created and not dry_run:
-                jobs_crud.enqueue_job(session, "PROCESS_SEGMENT", {"segment_id": segment.id})
-            count += 1
-            if limit and count >= limit:
-                break
-    rprint(f"[green]Ingest scanned {count} files[/green]")
+    state = ScanState() if full else ScanState.load(settings.ingest_state_path)
+    ids = IdCache(store_cfg)
+    stats = run_ingest(
+        root,
+        store_cfg,
+        ids=ids,
+        state=state,
+        since=parse_date(since) if since else None,
+        workers=workers or settings.ingest_workers,
+        batch_size=batch_size or settings.ingest_batch_size,
+        enqueue=not dry_run,
+        limit=limit,
+    )
+    state.save(settings.ingest_state_path)
+    rprint(
+        f"[green]Ingest scanned {stats['scanned']} files in {stats['partitions']} partitions "
+        f"({stats['skipped']} unchanged), {stats['created']} new segments, {stats['duplicates']} duplicates[/green]"
+    )
+    if not watch:
+        return
+
+    def on_ready(paths: list[str]) -> None:
+        counts = register_paths(paths, root, ids, enqueue=not dry_run)
+        rprint(f"[green]Registered {counts['created']} new segments ({counts['duplicates']} duplicates)[/green]")
+
+    watcher = VideoWatcher(
+        root,
+        on_ready,
+        settle_s=settings.ingest_watch_settle_s,
+        poll_s=settings.ingest_watch_poll_s,
+        backend=settings.ingest_watch_backend,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
 
 
 @app.command()
@@ -156,6 +271,15 @@ def process(
     path: Optional[str] = None,
     print_json: bool = True,
     max_seconds: Optional[float] = None,
+    profile: Optional[str] = typer.Option(None, help="Write cProfile stats for this run to the given file"),
+    detect_workers: int = typer.Option(0, help="Detector processes for this segment (shared-memory frames)"),
+    compact: bool = typer.Option(False, help="Print events/presence/faces as columnar arrays"),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache", help="Reuse cached segment outputs (default: RESULT_CACHE_ENABLED)"
+    ),
+    record_tracks: Optional[bool] = typer.Option(
+        None, "--record-tracks/--no-record-tracks", help="Save detections/tracks for recount (default: RECORD_TRACKS)"
+    ),
 ) -> None:
     configure_logging()
     settings = get_settings()
@@ -163,19 +287,52 @@ def process(
     if not segment_id and not path:
         raise typer.BadParameter("Provide --segment-id or --path")
 
+    with profile_to(profile):
+        use_cache = settings.result_cache_enabled if cache is None else cache
+        result_cache = build_result_cache(settings) if use_cache else None
+        tracks_root = _tracks_root(settings, record_tracks)
+        output = _process_one(settings, segment_id, path, max_seconds, detect_workers, result_cache, tracks_root)
+    if profile:
+        rprint(f"[green]Profile written to {profile} (python -m pstats {profile})[/green]", file=sys.stderr)
+
+    if print_json:
+        print(jsonio.dumps(jsonio.compact_output(output) if compact else output))
+
+
+def _process_one(
+    settings,
+    segment_id: Optional[int],
+    path: Optional[str],
+    max_seconds: Optional[float],
+    detect_workers: int = 0,
+    cache: ResultCache | None = None,
+    tracks_root: str | None = None,
+) -> dict:
+    # while recording, cached outputs are not reused so every segment gets its recording
     if path:
         video_path = Path(path)
         info = parse_video_path(video_path, Path(settings.video_root))
         camera_cfg = load_camera_config(settings.config_dir, info.store_code, info.camera_code)
-        pipeline = build_pipeline(camera_cfg, faces_root=settings.faces_root)
-        base_ts = combine_date_time(info.date, info.start_time, settings.timezone)
-        result = pipeline.run(
-            video_path,
-            base_ts=base_ts,
-            max_seconds=max_seconds,
-            segment_info=info,
+        key = run_cache_key(settings, video_path, camera_cfg, info, max_seconds) if cache else None
+        cached = cache.get(key, settings.faces_root) if cache and not tracks_root else None
+        if cached is not None:
+            return cached
+        pipeline = build_pipeline(
+            camera_cfg, faces_root=settings.faces_root, detect_workers=detect_workers, tracks_root=tracks_root
         )
+        base_ts = combine_date_time(info.date, info.start_time, settings.timezone)
+        try:
+            result = pipeline.run(
+                video_path,
+                base_ts=base_ts,
+                max_seconds=max_seconds,
+                segment_info=info,
+            )
+        finally:
+            pipeline.close()
         output = result.to_output(info, settings.timezone)
+        if cache is not None:
+            cache.put(key, output)
     else:
         with get_session() as session:
             segment = segments_crud.get_segment(session, segment_id)
@@ -184,24 +341,37 @@ def process(
             store = segments_crud.get_store(session, segment.store_id)
             camera = segments_crud.get_camera(session, segment.camera_id)
             camera_cfg = load_camera_config(settings.config_dir, store.code, camera.camera_code)
-            pipeline = build_pipeline(camera_cfg, faces_root=settings.faces_root)
             video_path = Path(settings.video_root) / segment.path
             info = segment.to_path_info(store.code, camera.camera_code, settings.timezone)
-            result = pipeline.run(
-                video_path,
-                base_ts=segment.start_time,
-                max_seconds=max_seconds,
-                segment_info=info,
+            key = run_cache_key(settings, video_path, camera_cfg, info, max_seconds) if cache else None
+            cached = cache.get(key, settings.faces_root) if cache and not tracks_root else None
+            if cached is not None:
+                replay_into_db(session, segment.id, store.id, camera.id, load_result(cached))
+                return cached
+            sink = DbSink(session, segment.id, store.id, camera.id)
+            pipeline = build_pipeline(
+                camera_cfg, faces_root=settings.faces_root, detect_workers=detect_workers, tracks_root=tracks_root
             )
-            events_crud.replace_events_for_segment(session, segment.id, store.id, camera.id, result)
-            faces_crud.replace_faces_for_segment(session, segment.id, store.id, camera.id, result)
+            try:
+                result = pipeline.run(
+                    video_path,
+                    base_ts=segment.start_time,
+                    max_seconds=max_seconds,
+                    segment_info=info,
+                    sink=sink,
+                )
+            finally:
+                pipeline.close()
+            sink.close()
+            # DbSink replaced the face rows: assign their visitor ids again
+            store_visitor_ids(session, store.code, segment, result)
             output = result.to_output(
                 info,
                 settings.timezone,
             )
-
-    if print_json:
-        print(json.dumps(output, default=str))
+            if cache is not None:
+                cache.put(key, output)
+    return output
 
 
 @app.command(name="split-process")
@@ -219,6 +389,16 @@ def split_process(
     output_json: Optional[str] = None,
     max_seconds: Optional[float] = None,
     workers: int = 1,
+    detect_workers: int = typer.Option(0, help="Detector processes per segment (shared-memory frames)"),
+    spool: bool = typer.Option(True, help="Stream records to disk while a segment runs (flat memory)"),
+    parquet: bool = typer.Option(False, help="Also append each segment to the Parquet dataset (PARQUET_ROOT)"),
+    compact: bool = typer.Option(False, help="Write events/presence/faces as columnar arrays"),
+    cache: Optional[bool] = typer.Option(
+        None, "--cache/--no-cache", help="Reuse cached segment outputs (default: RESULT_CACHE_ENABLED)"
+    ),
+    record_tracks: Optional[bool] = typer.Option(
+        None, "--record-tracks/--no-record-tracks", help="Save detections/tracks for recount (default: RECORD_TRACKS)"
+    ),
 ) -> None:
     configure_logging()
     settings = get_settings()
@@ -243,47 +423,107 @@ def split_process(
 
     output_path = Path(output_json or f"var/outputs/{store_code}_{camera_code}_{date}.jsonl")
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        exporter = ParquetExporter(settings.parquet_root) if parquet else None
+    except ExportError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+    camera_cfg = load_camera_config(config_dir, store_code, camera_code)
+    use_cache = settings.result_cache_enabled if cache is None else cache
+    result_cache = build_result_cache(settings) if use_cache else None
+    tracks_root = _tracks_root(settings, record_tracks)
+    keys: dict[Path, str] = {}
+    cached: set[Path] = set()
+    if result_cache is not None:
+        for segment_path in segments:
+            info = parse_video_path(segment_path, Path(video_root))
+            keys[segment_path] = run_cache_key(settings, segment_path, camera_cfg, info, max_seconds)
+            # while recording, every segment runs so each one gets its recording
+            if not tracks_root and result_cache.contains(keys[segment_path]):
+                cached.add(segment_path)
+    misses = [p for p in segments if p not in cached]
+    hits = 0
+
+    def load_cached(segment_path: Path) -> dict | None:
+        # entries are read one at a time, when their line is written
+        nonlocal hits
+        if segment_path not in cached:
+            return None
+        output = result_cache.get(keys[segment_path], settings.faces_root)
+        if output is not None:
+            hits += 1
+        return output
 
     summary = {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
-    with output_path.open("w", encoding="utf-8") as f:
-        if workers <= 1:
-            camera_cfg = load_camera_config(config_dir, store_code, camera_code)
-            pipeline = build_pipeline(camera_cfg, faces_root=settings.faces_root)
-            def _iter_outputs():
-                for segment_path in segments:
-                    info = parse_video_path(segment_path, Path(video_root))
-                    base_ts = combine_date_time(info.date, info.start_time, settings.timezone)
-                    result = pipeline.run(
-                        segment_path,
-                        base_ts=base_ts,
-                        max_seconds=max_seconds,
-                        segment_info=info,
+    with tempfile.TemporaryDirectory(prefix=".spool-", dir=output_path.parent) as spool_tmp:
+        spool_root = spool_tmp if spool else None
+        with output_path.open("w", encoding="utf-8") as f:
+            if workers <= 1 or len(misses) <= 1:
+                pipeline = None
+                try:
+                    for segment_path in segments:
+                        output = load_cached(segment_path)
+                        if output is None:
+                            if pipeline is None:
+                                pipeline = build_pipeline(
+                                    camera_cfg,
+                                    faces_root=settings.faces_root,
+                                    detect_workers=detect_workers,
+                                    tracks_root=tracks_root,
+                                )
+                            output = _run_segment(
+                                pipeline, segment_path, Path(video_root), settings.timezone, max_seconds, spool_root
+                            )
+                        counts = output.get("counts", {})
+                        for key in summary:
+                            summary[key] += int(counts.get(key, 0))
+                        _write_output(
+                            f, output, segment_path, spool_root, exporter, compact, result_cache, keys.get(segment_path)
+                        )
+                finally:
+                    if pipeline is not None:
+                        pipeline.close()
+            else:
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_worker,
+                    initargs=(
+                        config_dir,
+                        store_code,
+                        camera_code,
+                        settings.timezone,
+                        settings.faces_root,
+                        detect_workers,
+                        tracks_root,
+                    ),
+                ) as executor:
+                    outputs = executor.map(
+                        _process_segment_worker,
+                        [str(p) for p in misses],
+                        repeat(video_root),
+                        repeat(max_seconds),
+                        repeat(spool_root),
                     )
-                    yield result.to_output(info, settings.timezone)
-
-            for output in _iter_outputs():
-                counts = output.get("counts", {})
-                for key in summary:
-                    summary[key] += int(counts.get(key, 0))
-                f.write(json.dumps(output, default=str) + "\n")
-        else:
-            with ProcessPoolExecutor(
-                max_workers=workers,
-                initializer=_init_worker,
-                initargs=(config_dir, store_code, camera_code, settings.timezone, settings.faces_root),
-            ) as executor:
-                for output in executor.map(
-                    _process_segment_worker,
-                    [str(p) for p in segments],
-                    repeat(video_root),
-                    repeat(max_seconds),
-                ):
-                    counts = output.get("counts", {})
-                    for key in summary:
-                        summary[key] += int(counts.get(key, 0))
-                    f.write(json.dumps(output, default=str) + "\n")
+                    for segment_path in segments:
+                        if segment_path not in cached:
+                            output = next(outputs)
+                        else:
+                            output = load_cached(segment_path)
+                            if output is None:
+                                # entry went stale since the listing (deleted face crops...)
+                                output = executor.submit(
+                                    _process_segment_worker, str(segment_path), video_root, max_seconds, spool_root
+                                ).result()
+                        counts = output.get("counts", {})
+                        for key in summary:
+                            summary[key] += int(counts.get(key, 0))
+                        _write_output(
+                            f, output, segment_path, spool_root, exporter, compact, result_cache, keys.get(segment_path)
+                        )
 
     rprint(f"[green]Segments processed: {len(segments)}[/green]")
+    if result_cache is not None:
+        rprint(f"[green]Result cache: {hits} hits, {len(segments) - hits} misses[/green]")
     rprint(f"[green]JSONL saved to: {output_path}[/green]")
     rprint(f"[green]Totals: {summary}[/green]")
 
@@ -295,36 +535,158 @@ def merge_jsonl(
     include_events: bool = True,
     include_presence: bool = True,
 ) -> None:
-    merged = {
-        "source": {
-            "input": input_path,
-            "generated_at": datetime.now(timezone.utc).isoformat(),
-        },
-        "totals": {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0},
-        "segments": [],
-    }
-
-    with Path(input_path).open("r", encoding="utf-8") as f:
+    # Streamed: one segment in memory at a time. "totals" is only known at the
+    # end, so it is written after "segments".
+    source = {"input": input_path, "generated_at": datetime.now(timezone.utc).isoformat()}
+    totals = {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    with Path(input_path).open("r", encoding="utf-8") as f, Path(output_path).open("w", encoding="utf-8") as out:
+        out.write('{"source":' + jsonio.dumps(source) + ',"segments":[')
+        first = True
         for line in f:
             line = line.lstrip("\ufeff").strip()
             if not line:
                 continue
-            segment = json.loads(line)
+            segment = jsonio.loads(line)
             counts = segment.get("counts", {})
-            for key in merged["totals"]:
-                merged["totals"][key] += int(counts.get(key, 0))
+            for key in totals:
+                totals[key] += int(counts.get(key, 0))
 
+            # keep the layout of the input line (list, or columns for --compact)
             if not include_events:
-                segment["events"] = []
+                segment["events"] = {} if isinstance(segment.get("events"), dict) else []
             if not include_presence:
-                segment["presence_samples"] = []
-            merged["segments"].append(segment)
-
-    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    with Path(output_path).open("w", encoding="utf-8") as f:
-        json.dump(merged, f, default=str)
+                segment["presence_samples"] = {} if isinstance(segment.get("presence_samples"), dict) else []
+            if not first:
+                out.write(",")
+            out.write(jsonio.dumps(segment))
+            first = False
+        out.write('],"totals":' + jsonio.dumps(totals) + "}")
 
     rprint(f"[green]Merged JSON saved to: {output_path}[/green]")
+    rprint(f"[green]Totals: {totals}[/green]")
+
+def _parse_point(value: str | None) -> list[float] | None:
+    if value is None:
+        return None
+    try:
+        x, y = (float(v) for v in value.split(","))
+    except ValueError as exc:
+        raise typer.BadParameter(f"Expected x,y: {value}") from exc
+    return [x, y]
+
+
+@app.command()
+def recount(
+    input_path: str = typer.Option(..., "--input-path", help="Recording (.npz) or a directory of recordings"),
+    config: Optional[str] = typer.Option(None, "--config", help="Camera YAML (default: the store/camera config)"),
+    line_start: Optional[str] = typer.Option(None, "--line-start", help="x,y"),
+    line_end: Optional[str] = typer.Option(None, "--line-end", help="x,y"),
+    min_interval_s: Optional[float] = typer.Option(None, "--min-interval-s"),
+    direction: Optional[str] = typer.Option(None, "--direction", help="outside_to_inside | inside_to_outside"),
+    retrack: bool = typer.Option(False, help="Re-run tracking on the recorded detections (tracking params, roi)"),
+    output_json: Optional[str] = typer.Option(None, help="Write the recounted segments as JSONL"),
+) -> None:
+    # Counting only: replays recordings from --record-tracks, no video or model needed
+    configure_logging()
+    settings = get_settings()
+    root = Path(input_path)
+    paths = sorted(root.rglob("*.npz")) if root.is_dir() else [root]
+    paths = [p for p in paths if not p.name.startswith(".")]
+    if not paths:
+        raise typer.BadParameter(f"No recordings found in {input_path}")
+
+    overrides = {
+        "start": _parse_point(line_start),
+        "end": _parse_point(line_end),
+        "min_interval_s": min_interval_s,
+    }
+    configs: dict[tuple, dict] = {}
+    before = {"in": 0, "out": 0}
+    after = {"in": 0, "out": 0}
+    out = Path(output_json).open("w", encoding="utf-8") if output_json else None
+    try:
+        for path in paths:
+            try:
+                recording = load_recording(path)
+            except AnalyticsError as exc:
+                raise typer.BadParameter(str(exc)) from exc
+            except (OSError, ValueError, KeyError) as exc:
+                rprint(f"[red]{path}: unreadable recording ({exc})[/red]")
+                continue
+            info = recording.segment_info()
+            cfg_key = (info.store_code, info.camera_code) if info else (str(path),)
+            if cfg_key not in configs:
+                if config:
+                    camera_cfg = load_yaml(Path(config))
+                elif info:
+                    camera_cfg = load_camera_config(settings.config_dir, info.store_code, info.camera_code)
+                else:
+                    camera_cfg = dict(recording.meta.get("camera") or {})
+                line_cfg = dict(camera_cfg.get("line") or {})
+                line_cfg.update({key: value for key, value in overrides.items() if value is not None})
+                camera_cfg = {**camera_cfg, "line": line_cfg}
+                if direction:
+                    camera_cfg["direction"] = direction
+                configs[cfg_key] = camera_cfg
+            result = replay_recording(recording, configs[cfg_key], retrack=retrack)
+            counts = result.summarize_counts()
+            recorded = recording.meta.get("counts") or {}
+            for key in before:
+                before[key] += int(recorded.get(key, 0))
+                after[key] += counts[key]
+            errors = f" errors={result.errors}" if result.errors else ""
+            rprint(
+                f"{path.name}: in {recorded.get('in', 0)} -> {counts['in']}, "
+                f"out {recorded.get('out', 0)} -> {counts['out']} ({recording.frames} frames){errors}"
+            )
+            if out is not None and info is not None:
+                out.write(jsonio.dumps(result.to_output(info, settings.timezone)) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+
+    rprint(
+        f"[green]Recounted {len(paths)} recordings: in {before['in']} -> {after['in']}, "
+        f"out {before['out']} -> {after['out']}[/green]"
+    )
+
+
+@app.command(name="export-parquet")
+def export_parquet(
+    input_path: Optional[str] = typer.Option(None, "--input-path", help="JSONL from split-process/process"),
+    output_dir: Optional[str] = typer.Option(None, "--output-dir", help="Default: PARQUET_ROOT"),
+    kpis_from: Optional[str] = typer.Option(None, "--kpis-from", help="Also export KPI tables from this date"),
+    kpis_to: Optional[str] = typer.Option(None, "--kpis-to"),
+    store_id: Optional[int] = typer.Option(None, "--store-id"),
+) -> None:
+    configure_logging()
+    settings = get_settings()
+    if not input_path and not kpis_from:
+        raise typer.BadParameter("Provide --input-path and/or --kpis-from")
+    try:
+        exporter = ParquetExporter(output_dir or settings.parquet_root)
+    except ExportError as exc:
+        raise typer.BadParameter(str(exc)) from exc
+
+    segments = 0
+    if input_path:
+        with Path(input_path).open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.lstrip("\ufeff").strip()
+                if not line:
+                    continue
+                exporter.export_segment(jsonio.loads(line))
+                segments += 1
+    files = 0
+    if kpis_from:
+        start = parse_date(kpis_from)
+        end = parse_date(kpis_to) if kpis_to else start
+        with get_session() as session:
+            files = len(exporter.export_kpis(session, start, end, [store_id] if store_id else None))
+
+    rprint(f"[green]Parquet written to {exporter.root}: {segments} segments, {files} KPI files[/green]")
+
 
 @app.command(name="kpi-rebuild")
 def kpi_rebuild(
@@ -340,6 +702,81 @@ def kpi_rebuild(
     rprint("[green]KPI rebuild done[/green]")
 
 
+@app.command(name="kpi-rollup-backfill")
+def kpi_rollup_backfill(
+    from_date: str = typer.Option(..., "--from"),
+    to_date: str = typer.Option(..., "--to"),
+    store_id: Optional[int] = None,
+) -> None:
+    configure_logging()
+    with get_session() as session:
+        stats = backfill_rollups(session, parse_date(from_date), parse_date(to_date), store_id)
+        # no date in the payload: API caches drop every response of the store(s)
+        jobs_crud.record_done(session, "KPI_REBUILD", {"store_id": store_id, "source": "kpi-rollup-backfill"})
+    rprint(
+        f"[green]Rollups rebuilt {stats['from']}..{stats['to']}: "
+        f"{stats['days']} daily, {stats['weeks']} weekly, {stats['months']} monthly[/green]"
+    )
+
+
+@app.command(name="db-partitions")
+def db_partitions(
+    months_ahead: Optional[int] = None,
+    convert: bool = typer.Option(False, help="Convert plain event tables to partitioned (PostgreSQL)"),
+) -> None:
+    # Run monthly (cron/systemd timer) so inserts never land in the default partition.
+    configure_logging()
+    settings = get_settings()
+    today = datetime.now(timezone.utc).date()
+    horizon = partition_horizon(today, settings.db_partition_months_ahead if months_ahead is None else months_ahead)
+    with get_session() as session:
+        conn = session.connection()
+        if conn.dialect.name != "postgresql":
+            rprint("[yellow]Partitioning requires PostgreSQL; nothing to do[/yellow]")
+            return
+        if convert:
+            for table in PARTITIONED_TABLES:
+                convert_to_partitioned(conn, table, horizon)
+        created = ensure_month_partitions(conn, today, horizon)
+    rprint(f"[green]Partitions ensured up to {horizon}: {len(created)}[/green]")
+
+
+@app.command(name="export-onnx")
+def export_onnx(
+    model: str = typer.Option("yolov8n.pt", "--model"),
+    imgsz: int = 640,
+    half: bool = typer.Option(False, help="FP16 weights (smaller file; CPU runs them upcast)"),
+    dynamic: bool = typer.Option(False, help="Variable input size, needed by processing.auto_imgsz"),
+) -> None:
+    # One-off on a machine with ultralytics; workers then only need onnxruntime.
+    try:
+        from ultralytics import YOLO  # type: ignore
+    except Exception as exc:
+        raise typer.BadParameter("ultralytics is required to export models") from exc
+    output = YOLO(model).export(format="onnx", imgsz=imgsz, half=half, dynamic=dynamic, simplify=True)
+    rprint(f"[green]ONNX model saved to: {output}[/green]")
+
+
+@app.command(name="quantize-onnx")
+def quantize_onnx(
+    model: str = typer.Option(..., "--model"),
+    output: Optional[str] = typer.Option(None, "--output", help="Default: <model>.int8.onnx"),
+    calibration_video: list[str] = typer.Option([], "--calibration-video", help="Repeat; empty = dynamic quantization"),
+    frames: int = 200,
+    imgsz: int = 640,
+    exclude_node: list[str] = typer.Option([], "--exclude-node", help="Keep these nodes in FP32 (e.g. the head)"),
+) -> None:
+    configure_logging()
+    output_path = Path(output) if output else Path(model).with_suffix(".int8.onnx")
+    calibration = sample_frames(calibration_video, frames) if calibration_video else None
+    try:
+        quantize_model(model, output_path, calibration, imgsz=imgsz, nodes_to_exclude=exclude_node)
+    except DetectorUnavailable as exc:
+        raise typer.BadParameter(str(exc)) from exc
+    method = f"static, {len(calibration)} calibration frames" if calibration else "dynamic"
+    rprint(f"[green]INT8 model ({method}) saved to: {output_path}[/green]")
+
+
 @app.command(name="staff-rebuild")
 def staff_rebuild(store_code: str) -> None:
     configure_logging()
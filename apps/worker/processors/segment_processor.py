@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import shutil
+import tempfile
 from pathlib import Path
 
+from people_analytics.core import metrics
 from people_analytics.core.config import load_camera_config
 from people_analytics.core.settings import get_settings
 from people_analytics.core.timeutils import to_local
-from people_analytics.db.crud import events as events_crud
-from people_analytics.db.crud import faces as faces_crud
 from people_analytics.db.crud import jobs as jobs_crud
 from people_analytics.db.crud import segments as segments_crud
 from people_analytics.db.models.job import Job
+from people_analytics.db.sink import DbSink, replay_into_db
+from people_analytics.reid.assign import store_visitor_ids
 from people_analytics.vision.pipeline import build_pipeline
+from people_analytics.vision.result_cache import build_result_cache, load_result, run_cache_key
+from people_analytics.vision.sinks import JsonlSink, TeeSink, spool_paths
 
 
 def process_segment_job(session, job: Job) -> None:
@@ -28,14 +33,46 @@ def process_segment_job(session, job: Job) -> None:
     camera = segments_crud.get_camera(session, segment.camera_id)
 
     camera_cfg = load_camera_config(settings.config_dir, store.code, camera.camera_code)
-    pipeline = build_pipeline(camera_cfg, faces_root=settings.faces_root)
-
     video_path = Path(settings.video_root) / segment.path
     info = segment.to_path_info(store.code, camera.camera_code, settings.timezone)
-    result = pipeline.run(video_path, base_ts=segment.start_time, segment_info=info)
 
-    events_crud.replace_events_for_segment(session, segment.id, store.id, camera.id, result)
-    faces_crud.replace_faces_for_segment(session, segment.id, store.id, camera.id, result)
+    tracks_root = settings.tracks_root if settings.record_tracks else None
+    cache = build_result_cache(settings) if settings.result_cache_enabled else None
+    key = run_cache_key(settings, video_path, camera_cfg, info) if cache else None
+    cached = cache.get(key, settings.faces_root) if cache and not tracks_root else None
+    if cached is not None:
+        result = load_result(cached)
+        sink = replay_into_db(session, segment.id, store.id, camera.id, result)
+    else:
+        # Records go straight to the database (and to a spool for the cache)
+        # as frames are processed; nothing is kept in memory.
+        sink = DbSink(session, segment.id, store.id, camera.id)
+        spool_dir = None
+        if cache is not None:
+            cache.root.mkdir(parents=True, exist_ok=True)
+            spool_dir = Path(tempfile.mkdtemp(prefix=".spool-", dir=cache.root))
+        try:
+            run_sink = TeeSink([sink, JsonlSink(spool_dir)]) if spool_dir else sink
+            pipeline = build_pipeline(camera_cfg, faces_root=settings.faces_root, tracks_root=tracks_root)
+            try:
+                result = pipeline.run(
+                    video_path, base_ts=segment.start_time, segment_info=info, sink=run_sink, keep_records=False
+                )
+            finally:
+                run_sink.close()
+            metrics.record_segment(
+                store.code, camera.camera_code, result.timings, result.frames_read, result.totals["face_captures"]
+            )
+            if cache is not None:
+                # before visitor ids are assigned: those depend on the index, not the video
+                cache.put(key, result.to_output(info, settings.timezone), spool_paths(spool_dir))
+        finally:
+            if spool_dir is not None:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+    metrics.DB_WRITE_SECONDS.labels("records").observe(sink.write_s)
+
+    store_visitor_ids(session, store.code, segment, result)
+    segments_crud.mark_segment_status(session, segment, "done")
 
     local_date = to_local(segment.start_time, settings.timezone).date()
     jobs_crud.enqueue_job(
@@ -47,3 +84,16 @@ def process_segment_job(session, job: Job) -> None:
             "date": local_date.isoformat(),
         },
     )
+
+
+def fail_segment_job(session, job: Job) -> None:
+    # Copies of a segment are not processed on their own, so a failed original
+    # hands its place to the earliest copy.
+    segment_id = (job.payload_json or {}).get("segment_id")
+    segment = segments_crud.get_segment(session, segment_id) if segment_id else None
+    if segment is None or segment.status == "done":
+        return
+    segments_crud.mark_segment_status(session, segment, "failed")
+    promoted = segments_crud.promote_duplicate(session, segment.id)
+    if promoted is not None:
+        jobs_crud.enqueue_job(session, "PROCESS_SEGMENT", {"segment_id": promoted})
@@ -3,11 +3,13 @@ from __future__ import annotations
 import time
 
 from people_analytics.core.config import load_shifts_config
+from people_analytics.core import metrics
 from people_analytics.core.logging import configure_logging
+from people_analytics.core.metrics import start_metrics_server
 from people_analytics.core.settings import get_settings
 from people_analytics.db.crud import jobs as jobs_crud
 from people_analytics.db.session import get_session
-from apps.worker.processors.segment_processor import process_segment_job
+from apps.worker.processors.segment_processor import fail_segment_job, process_segment_job
 from people_analytics.kpi.rebuild import rebuild_for_date
 
 
@@ -16,14 +18,23 @@ def run_worker() -> None:
     settings = get_settings()
     poll = settings.job_poll_interval
     shifts_cfg = load_shifts_config(settings.config_dir)
+    start_metrics_server(settings.metrics_port)
+    next_queue_poll = 0.0
 
     while True:
+        if time.monotonic() >= next_queue_poll:
+            with get_session() as session:
+                metrics.record_queue(jobs_crud.queue_stats(session))
+            next_queue_poll = time.monotonic() + settings.metrics_queue_poll_s
+
         with get_session() as session:
             job = jobs_crud.claim_job(session, settings.worker_id, settings.job_lock_timeout)
             if not job:
                 time.sleep(poll)
                 continue
 
+            metrics.JOBS_CLAIMED.labels(job.type).inc()
+            started = time.perf_counter()
             try:
                 if job.type == "PROCESS_SEGMENT":
                     process_segment_job(session, job)
@@ -42,6 +53,10 @@ def run_worker() -> None:
                 jobs_crud.mark_done(session, job)
             except Exception as exc:
                 jobs_crud.mark_failed(session, job, str(exc))
+                if job.type == "PROCESS_SEGMENT":
+                    fail_segment_job(session, job)
+            metrics.JOB_SECONDS.labels(job.type).observe(time.perf_counter() - started)
+            metrics.JOBS_FINISHED.labels(job.type, job.status).inc()
 
         time.sleep(0.1)
 
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from people_analytics.kpi.aggregators.peaks import peak_windows, peak_windows_from_buckets
+
+
+def synthetic_events(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1, 8, tzinfo=timezone.utc)
+    offsets = sorted(rng.random() * 14 * 3600 for _ in range(n))
+    return [
+        {"ts": base + timedelta(seconds=offset), "direction": "IN" if rng.random() < 0.52 else "OUT"}
+        for offset in offsets
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sliding-window peak detection benchmark")
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[15, 30, 60])
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    events = synthetic_events(args.events, args.seed)
+    generate_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    peaks = peak_windows(events, window_minutes=args.windows, top_k=args.top_k, presorted=True)
+    events_s = time.perf_counter() - t0
+
+    minute_counts: dict[datetime, int] = {}
+    for event in events:
+        if event["direction"] == "IN":
+            minute = event["ts"].replace(second=0, microsecond=0)
+            minute_counts[minute] = minute_counts.get(minute, 0) + 1
+    t0 = time.perf_counter()
+    bucket_peaks = peak_windows_from_buckets(minute_counts.items(), window_minutes=args.windows, top_k=args.top_k)
+    buckets_s = time.perf_counter() - t0
+
+    print(
+        json.dumps(
+            {
+                "benchmark": "peaks",
+                "events": args.events,
+                "windows": args.windows,
+                "top_k": args.top_k,
+                "generate_s": round(generate_s, 3),
+                "events_s": round(events_s, 3),
+                "events_per_s": round(args.events * len(args.windows) / events_s) if events_s else None,
+                "minute_buckets": len(minute_counts),
+                "buckets_s": round(buckets_s, 4),
+                "peaks": {str(w): [p["count"] for p in peaks[w]] for w in args.windows},
+                "bucket_peaks": {str(w): [p["count"] for p in bucket_peaks[w]] for w in args.windows},
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
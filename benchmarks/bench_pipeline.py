@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from itertools import repeat
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    # split-process workers live in apps/cli.py, which is not an installed package
+    sys.path.insert(0, str(ROOT))
+
+import cv2  # noqa: E402
+
+from apps import cli  # noqa: E402
+from people_analytics.core.timeutils import combine_date_time  # noqa: E402
+from people_analytics.storage.paths import parse_video_path  # noqa: E402
+from people_analytics.vision.video_reader import build_reader  # noqa: E402
+from synthetic import bench_camera_config, build_bench_pipeline, write_synthetic_video  # noqa: E402
+
+try:
+    import resource
+except Exception:  # pragma: no cover - not available on Windows
+    resource = None
+
+SEGMENT_DATE = date(2025, 1, 1)
+TZ_NAME = "UTC"
+
+
+def peak_rss_mb(who: str = "self") -> float | None:
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+
+def write_segments(root: Path, count: int, args) -> list[dict]:
+    folder = root / "store=bench" / "camera=bench" / f"date={SEGMENT_DATE.isoformat()}"
+    base = datetime.combine(SEGMENT_DATE, datetime.min.time())
+    segments = []
+    for i in range(count):
+        start = base + timedelta(seconds=i * args.seconds)
+        end = start + timedelta(seconds=args.seconds)
+        path = folder / f"{start:%H-%M-%S}__{end:%H-%M-%S}.mp4"
+        segments.append(
+            write_synthetic_video(
+                path, args.seconds, args.fps, args.width, args.height, args.people, seed=args.seed + i
+            )
+        )
+    return segments
+
+
+def bench_decode(path: Path, camera_cfg: dict, target_fps: int | None) -> dict:
+    reader = build_reader(camera_cfg, target_fps)
+    frames = 0
+    t0 = time.perf_counter()
+    for _frame, _ts in reader.iter_frames(path):
+        frames += 1
+    wall_s = time.perf_counter() - t0
+    return {"frames": frames, "wall_s": round(wall_s, 4), "fps": round(frames / wall_s, 2) if wall_s else None}
+
+
+def bench_pipeline(
+    path: Path, video_root: Path, camera_cfg: dict, target_fps: int | None, repeats: int, detect_workers: int = 0
+) -> dict:
+    info = parse_video_path(path, video_root)
+    base_ts = combine_date_time(info.date, info.start_time, TZ_NAME)
+    runs = []
+    # one pipeline for all repeats, so --detect-workers reuses warm workers
+    pipeline = build_bench_pipeline(camera_cfg, target_fps, detect_workers)
+    try:
+        for _ in range(repeats):
+            runs.append(pipeline.run(path, base_ts=base_ts, segment_info=info))
+    finally:
+        pipeline.close()
+    best = min(runs, key=lambda r: r.timings["wall_s"])
+    walls = [r.timings["wall_s"] for r in runs]
+    return {
+        "runs": repeats,
+        "wall_s_median": round(statistics.median(walls), 4),
+        "wall_s_min": round(min(walls), 4),
+        "counts": best.summarize_counts(),
+        "errors": best.errors,
+        "timings": best.timings,
+    }
+
+
+def _init_bench_worker(width: int, height: int, target_fps: int | None, reader: str) -> None:
+    # Same worker entry point as split-process, with the stub pipeline.
+    cli._WORKER_CONTEXT["pipeline"] = build_bench_pipeline(bench_camera_config(width, height, reader), target_fps)
+    cli._WORKER_CONTEXT["tz_name"] = TZ_NAME
+
+
+def bench_workers(segments: list[dict], video_root: Path, workers: int, args) -> dict:
+    totals = {"in": 0, "out": 0}
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_bench_worker,
+        initargs=(args.width, args.height, args.target_fps, args.reader),
+    ) as executor:
+        for output in executor.map(
+            cli._process_segment_worker,
+            [s["path"] for s in segments],
+            repeat(str(video_root)),
+            repeat(None),
+        ):
+            for key in totals:
+                totals[key] += int(output["counts"].get(key, 0))
+    wall_s = time.perf_counter() - t0
+    media_s = len(segments) * args.seconds
+    return {
+        "workers": workers,
+        "segments": len(segments),
+        "wall_s": round(wall_s, 4),
+        "realtime_factor": round(media_s / wall_s, 3) if wall_s else None,
+        "counts": totals,
+        "expected": {key: sum(s["expected"][key] for s in segments) for key in totals},
+    }
+
+
+def summarize(report: dict) -> dict:
+    # Flat metrics for compare.py: *_ms / *_mb are lower-is-better, the rest
+    # higher-is-better.
+    timings = report["pipeline"]["timings"]
+    summary = {
+        "decode_fps": report["decode"]["fps"],
+        "pipeline_fps": timings["fps"],
+        "realtime_factor": timings["realtime_factor"],
+        "peak_rss_mb": report["peak_rss_mb"],
+    }
+    for name, stage in timings["stages"].items():
+        calls = stage["frame"]["calls"]
+        summary[f"{name}_frame_ms"] = round(stage["frame"]["wall_s"] * 1000 / calls, 4) if calls else None
+    for run in report["workers"]:
+        summary[f"workers_{run['workers']}_realtime_factor"] = run["realtime_factor"]
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pipeline benchmark on synthetic video (stub detector/tracker)")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--target-fps", type=int, default=6)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--people", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4])
+    parser.add_argument("--segments", type=int, default=4, help="Segments processed by each --workers run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--reader", choices=["opencv", "ffmpeg"], default="opencv")
+    parser.add_argument("--detect-workers", type=int, default=0, help="Detector processes for the single-segment run")
+    parser.add_argument("--workdir", default=None, help="Keep generated videos here (default: temp dir)")
+    parser.add_argument("--output", default=None, help="JSON path (default: var/benchmarks/pipeline_<ts>.json)")
+    args = parser.parse_args()
+    cv2.setNumThreads(1)
+
+    with tempfile.TemporaryDirectory(prefix="pa-bench-") as tmp:
+        video_root = Path(args.workdir or tmp).resolve()
+        t0 = time.perf_counter()
+        segments = write_segments(video_root, max(args.segments, 1), args)
+        first = Path(segments[0]["path"])
+        generate_s = time.perf_counter() - t0
+        camera_cfg = bench_camera_config(args.width, args.height, args.reader)
+
+        report = {
+            "benchmark": "pipeline",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "env": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "opencv": cv2.__version__,
+            },
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "workdir")},
+            "generate_s": round(generate_s, 3),
+            "expected": segments[0]["expected"],
+            "decode": bench_decode(first, camera_cfg, args.target_fps),
+            "pipeline": bench_pipeline(
+                first, video_root, camera_cfg, args.target_fps, max(args.repeat, 1), args.detect_workers
+            ),
+            "workers": [bench_workers(segments, video_root, n, args) for n in args.workers],
+        }
+    report["peak_rss_mb"] = peak_rss_mb("self")
+    report["children_peak_rss_mb"] = peak_rss_mb("children")
+    report["summary"] = summarize(report)
+
+    output = Path(args.output or f"var/benchmarks/pipeline_{datetime.now():%Y%m%d_%H%M%S}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    text = json.dumps(report, indent=2, default=str)
+    output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
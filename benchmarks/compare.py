@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+LOWER_IS_BETTER = ("_ms", "_mb", "_s")
+
+
+def load_summary(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))["summary"]
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    rows = []
+    for key in sorted(set(baseline) & set(current)):
+        old, new = baseline[key], current[key]
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        lower_better = key.endswith(LOWER_IS_BETTER)
+        worse = change > threshold if lower_better else change < -threshold
+        rows.append(
+            {"metric": key, "baseline": old, "current": new, "change_pct": round(change * 100, 1), "regression": worse}
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two bench_pipeline.py JSON results")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change flagged as regression")
+    args = parser.parse_args()
+
+    rows = compare(load_summary(args.baseline), load_summary(args.current), args.threshold)
+    width = max((len(r["metric"]) for r in rows), default=10)
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['metric']:<{width}}  {row['baseline']:>12}  {row['current']:>12}  "
+            f"{row['change_pct']:>+7.1f}%{flag}"
+        )
+    if any(r["regression"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+from people_analytics.core.config import load_camera_config
+from people_analytics.core.timeutils import combine_date_time
+from people_analytics.storage.paths import parse_video_path
+from people_analytics.vision.evaluation import DetectionAgreement
+from people_analytics.vision.pipeline import build_pipeline
+
+# FP32 vs INT8 regression check on a labelled set of segments. Manifest: one
+# JSON object per line, {"path": "store=001/camera=entrance/date=.../10-00-00__10-05-00.mp4",
+# "in": 12, "out": 9}; "in"/"out" are the hand-counted labels and optional.
+# Runs offline: models come from the camera config (or --fp32-model /
+# --int8-model) and must exist locally.
+
+
+class DetectionRecorder:
+    # Inserted right after DetectPeopleStage to keep every frame's boxes.
+    def __init__(self):
+        self.frames: list[list[list[float]]] = []
+
+    def setup(self, context: dict) -> None:
+        self.frames = []
+
+    def on_frame(self, context: dict) -> None:
+        self.frames.append([d["bbox"] for d in context.get("detections", [])])
+
+    def on_finish(self, context: dict) -> None:
+        pass
+
+
+def variant_config(
+    camera_cfg: dict, precision: str, fp32_model: str | None, int8_model: str | None, faces: bool
+) -> dict:
+    # INT8 always runs on ONNX Runtime; without --int8-model it is looked up
+    # next to the FP32 model as <name>.int8.onnx.
+    cfg = copy.deepcopy(camera_cfg)
+    processing = cfg.setdefault("processing", {})
+    processing["precision"] = precision
+    if fp32_model:
+        processing["onnx_model"] = fp32_model
+    if int8_model:
+        processing["onnx_model_int8"] = int8_model
+    if (precision == "int8" or fp32_model) and processing.get("backend", "ultralytics") == "ultralytics":
+        processing["backend"] = "onnx"
+    if not faces:
+        cfg.setdefault("face_capture", {})["enabled"] = False
+    return cfg
+
+
+def run_variant(path: Path, video_root: Path, camera_cfg: dict, tz_name: str, max_seconds, faces_root) -> dict:
+    info = parse_video_path(path, video_root)
+    pipeline = build_pipeline(camera_cfg, faces_root=faces_root)
+    recorder = DetectionRecorder()
+    pipeline.stages.insert(1, recorder)
+    base_ts = combine_date_time(info.date, info.start_time, tz_name)
+    result = pipeline.run(path, base_ts=base_ts, max_seconds=max_seconds, segment_info=info)
+    reason = pipeline.stages[0].disabled_reason
+    if reason:
+        raise SystemExit(f"{camera_cfg['processing']['precision']} detector unavailable: {reason}")
+    detect = result.timings["stages"]["DetectPeopleStage"]["frame"]
+    return {
+        "counts": result.summarize_counts(),
+        "faces": len(result.face_captures),
+        "errors": result.errors,
+        "wall_s": result.timings["wall_s"],
+        "detect_s": detect["wall_s"],
+        "frames": recorder.frames,
+    }
+
+
+def ratio(a: float, b: float) -> float | None:
+    return round(a / b, 3) if b else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FP32 vs INT8 detector accuracy/speed on labelled segments")
+    parser.add_argument("--manifest", required=True)
+    parser.add_argument("--video-root", required=True)
+    parser.add_argument("--config-dir", default="config")
+    parser.add_argument("--timezone", default="America/Sao_Paulo")
+    parser.add_argument("--fp32-model", default=None, help="ONNX FP32 model (default: camera config)")
+    parser.add_argument("--int8-model", default=None, help="ONNX INT8 model (default: <model>.int8.onnx)")
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--iou", type=float, default=0.5, help="IoU for a detection to count as the same")
+    parser.add_argument("--faces", action="store_true", help="Also run face capture and compare crop counts")
+    parser.add_argument("--max-count-delta", type=int, default=None, help="Exit 1 if any segment drifts more")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    video_root = Path(args.video_root).resolve()
+    lines = Path(args.manifest).read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines if line.strip()]
+    segments = []
+    totals = {"fp32": {"in": 0, "out": 0}, "int8": {"in": 0, "out": 0}, "labels": {"in": 0, "out": 0}}
+    overall = DetectionAgreement(args.iou)
+    wall = {"fp32": 0.0, "int8": 0.0}
+    detect = {"fp32": 0.0, "int8": 0.0}
+    abs_error = {"fp32": 0, "int8": 0}
+    worst_delta = 0
+
+    with tempfile.TemporaryDirectory(prefix="pa-quant-") as faces_tmp:
+        for entry in entries:
+            path = video_root / entry["path"]
+            info = parse_video_path(path, video_root)
+            camera_cfg = load_camera_config(args.config_dir, info.store_code, info.camera_code)
+            runs = {}
+            for precision in ("fp32", "int8"):
+                cfg = variant_config(camera_cfg, precision, args.fp32_model, args.int8_model, args.faces)
+                runs[precision] = run_variant(path, video_root, cfg, args.timezone, args.max_seconds, faces_tmp)
+
+            agreement = DetectionAgreement(args.iou)
+            for ref, cand in zip(runs["fp32"]["frames"], runs["int8"]["frames"]):
+                agreement.add(ref, cand)
+                overall.add(ref, cand)
+            delta = {k: runs["int8"]["counts"][k] - runs["fp32"]["counts"][k] for k in ("in", "out")}
+            worst_delta = max(worst_delta, *(abs(v) for v in delta.values()))
+            row = {
+                "path": entry["path"],
+                "labels": {k: entry[k] for k in ("in", "out") if k in entry},
+                "fp32": {k: runs["fp32"]["counts"][k] for k in ("in", "out")},
+                "int8": {k: runs["int8"]["counts"][k] for k in ("in", "out")},
+                "delta": delta,
+                "agreement": agreement.to_dict(),
+                "speedup": ratio(runs["fp32"]["wall_s"], runs["int8"]["wall_s"]),
+                "detect_speedup": ratio(runs["fp32"]["detect_s"], runs["int8"]["detect_s"]),
+                "errors": {p: runs[p]["errors"] for p in runs if runs[p]["errors"]},
+            }
+            if args.faces:
+                row["faces"] = {p: runs[p]["faces"] for p in runs}
+            segments.append(row)
+            for precision in ("fp32", "int8"):
+                wall[precision] += runs[precision]["wall_s"]
+                detect[precision] += runs[precision]["detect_s"]
+                for key in ("in", "out"):
+                    totals[precision][key] += runs[precision]["counts"][key]
+            for key in row["labels"]:
+                totals["labels"][key] += row["labels"][key]
+                for precision in ("fp32", "int8"):
+                    abs_error[precision] += abs(row[precision][key] - row["labels"][key])
+
+    labelled = any(row["labels"] for row in segments)
+    report = {
+        "benchmark": "quant_accuracy",
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "env": {"python": platform.python_version(), "platform": platform.platform()},
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "segments": segments,
+        "totals": totals if labelled else {k: v for k, v in totals.items() if k != "labels"},
+        # summed over labelled segments only
+        "abs_error": abs_error if labelled else None,
+        "agreement": overall.to_dict(),
+        "speedup": ratio(wall["fp32"], wall["int8"]),
+        "detect_speedup": ratio(detect["fp32"], detect["int8"]),
+        "max_count_delta": worst_delta,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+    if args.max_count_delta is not None and worst_delta > args.max_count_delta:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
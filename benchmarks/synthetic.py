@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Synthetic scene: dark person-sized blobs walking vertically across a
+# horizontal counting line on a static textured background. Everything here
+# is deterministic for a given seed and needs no models or network.
+
+LINE_Y_RATIO = 0.5
+
+
+@dataclass
+class Walker:
+    x: float
+    start_s: float
+    speed: float  # px/s, > 0 walks down (IN), < 0 walks up (OUT)
+    w: int
+    h: int
+
+
+def bench_camera_config(width: int, height: int, reader: str = "opencv") -> dict:
+    # Blob centroids come from integer boxes (multiples of 0.5 px); a line a
+    # quarter pixel off the grid never has a centroid exactly on it, where
+    # CountLineStage resets the track side and drops the crossing.
+    line_y = int(height * LINE_Y_RATIO) + 0.25
+    return {
+        "camera_code": "bench",
+        "line": {"start": [int(width * 0.05), line_y], "end": [int(width * 0.95), line_y], "min_interval_s": 1.0},
+        "direction": "outside_to_inside",
+        "presence": {"enabled": True, "interval_s": 10},
+        "face_capture": {"enabled": False},
+        "staff_exclusion": {"enabled": False},
+        "reid": {"enabled": False},
+        "processing": {"reader": reader},
+    }
+
+
+def make_walkers(seconds: float, width: int, height: int, people: int, seed: int = 0, lanes: int = 8) -> list[Walker]:
+    # One walker per lane at a time so blobs never merge or swap ids, and only
+    # walkers that leave the frame before the end, so the ground truth does not
+    # depend on where the video is cut.
+    rng = random.Random(seed)
+    lane_free_at = [0.0] * lanes
+    walkers = []
+    for i in range(people):
+        w = rng.randint(width // 24, width // 16)
+        h = int(w * rng.uniform(2.0, 2.6))
+        speed = rng.uniform(0.25, 0.45) * height * (1 if rng.random() < 0.55 else -1)
+        travel_s = (height + 2 * h) / abs(speed)
+        lane = i % lanes
+        start_s = lane_free_at[lane] + rng.uniform(0.2, 2.0)
+        if start_s + travel_s > seconds:
+            continue
+        lane_free_at[lane] = start_s + travel_s
+        walkers.append(Walker(x=(lane + 0.5) / lanes * width, start_s=start_s, speed=speed, w=w, h=h))
+    return walkers
+
+
+def _center_y(walker: Walker, t: float, height: int) -> float | None:
+    dt = t - walker.start_s
+    if dt < 0:
+        return None
+    start_y = -walker.h / 2 if walker.speed > 0 else height + walker.h / 2
+    y = start_y + walker.speed * dt
+    if y < -walker.h or y > height + walker.h:
+        return None
+    return y
+
+
+def expected_counts(walkers: list[Walker], seconds: float, height: int) -> dict:
+    line_y = height * LINE_Y_RATIO
+    counts = {"in": 0, "out": 0}
+    for walker in walkers:
+        cross_t = walker.start_s + abs(line_y - (-walker.h / 2 if walker.speed > 0 else height + walker.h / 2)) / abs(
+            walker.speed
+        )
+        if cross_t < seconds:
+            counts["in" if walker.speed > 0 else "out"] += 1
+    return counts
+
+
+def write_synthetic_video(
+    path: Path,
+    seconds: float = 60.0,
+    fps: int = 15,
+    width: int = 640,
+    height: int = 360,
+    people: int = 20,
+    seed: int = 0,
+) -> dict:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    background = np.full((height, width, 3), 200, dtype=np.uint8)
+    background = cv2.add(background, rng.integers(0, 30, size=(height, width, 3), dtype=np.uint8))
+    walkers = make_walkers(seconds, width, height, people, seed)
+
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"cannot open video writer for {path}")
+    frames = int(math.ceil(seconds * fps))
+    for idx in range(frames):
+        t = idx / fps
+        frame = background.copy()
+        for walker in walkers:
+            cy = _center_y(walker, t, height)
+            if cy is None:
+                continue
+            x1, y1 = int(walker.x - walker.w / 2), int(cy - walker.h / 2)
+            cv2.rectangle(frame, (x1, y1), (x1 + walker.w, y1 + walker.h), (40, 40, 40), thickness=-1)
+        writer.write(frame)
+    writer.release()
+    return {
+        "path": str(path),
+        "seconds": seconds,
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "people": len(walkers),
+        "expected": expected_counts(walkers, seconds, height),
+    }
+
+
+class BlobDetectorStage:
+    # Drop-in for DetectPeopleStage: dark connected components are "people".
+    def __init__(self, camera_cfg: dict, threshold: int = 90, min_area: int = 300):
+        self.camera_cfg = camera_cfg
+        self.threshold = threshold
+        self.min_area = min_area
+
+    def setup(self, context: dict) -> None:
+        context["detections"] = []
+
+    def on_frame(self, context: dict) -> None:
+        gray = cv2.cvtColor(context["frame"], cv2.COLOR_BGR2GRAY)
+        _, mask = cv2.threshold(gray, self.threshold, 255, cv2.THRESH_BINARY_INV)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        detections = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            if w * h < self.min_area:
+                continue
+            bbox = [float(x), float(y), float(x + w), float(y + h)]
+            detections.append({"bbox": bbox, "confidence": 0.9, "class_id": 0})
+        context["detections"] = detections
+
+    def on_finish(self, context: dict) -> None:
+        pass
+
+
+class CentroidTrackerStage:
+    # Drop-in for TrackPeopleStage without supervision: greedy nearest-centroid
+    # matching, deterministic and fast enough not to dominate the profile.
+    def __init__(self, camera_cfg: dict, max_distance: float = 60.0, max_missed: int = 5):
+        self.camera_cfg = camera_cfg
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.tracks: dict[int, tuple[float, float, int]] = {}
+        self.next_id = 1
+
+    def setup(self, context: dict) -> None:
+        context["tracks"] = []
+        self.tracks = {}
+        self.next_id = 1
+
+    def on_frame(self, context: dict) -> None:
+        out = []
+        unmatched = dict(self.tracks)
+        for det in context.get("detections", []):
+            x1, y1, x2, y2 = det["bbox"]
+            cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+            best, best_d = None, self.max_distance
+            for track_id, (tx, ty, _) in unmatched.items():
+                d = math.hypot(cx - tx, cy - ty)
+                if d < best_d:
+                    best, best_d = track_id, d
+            if best is None:
+                best = self.next_id
+                self.next_id += 1
+            else:
+                del unmatched[best]
+            self.tracks[best] = (cx, cy, 0)
+            out.append({"track_id": str(best), "bbox": det["bbox"], "confidence": det["confidence"], "class_id": 0})
+        for track_id, (tx, ty, missed) in unmatched.items():
+            if missed + 1 > self.max_missed:
+                del self.tracks[track_id]
+            else:
+                self.tracks[track_id] = (tx, ty, missed + 1)
+        context["tracks"] = out
+
+    def on_finish(self, context: dict) -> None:
+        pass
+
+
+def build_bench_pipeline(camera_cfg: dict, target_fps: int | None = None, detect_workers: int = 0):
+    # Same stage order as build_pipeline, with the model-backed stages
+    # swapped for the stubs above.
+    from people_analytics.vision.pipeline import Pipeline
+    from people_analytics.vision.video_reader import build_reader
+    from people_analytics.vision.stages.count_line import CountLineStage
+    from people_analytics.vision.stages.presence_sampling import PresenceSamplingStage
+
+    stages = [
+        BlobDetectorStage(camera_cfg),
+        CentroidTrackerStage(camera_cfg),
+        CountLineStage(camera_cfg),
+        PresenceSamplingStage(camera_cfg),
+    ]
+    if detect_workers > 1:
+        from people_analytics.vision.parallel import ParallelPipeline
+
+        return ParallelPipeline(
+            camera_cfg, stages[1:], target_fps=target_fps, workers=detect_workers, detector_factory=BlobDetectorStage
+        )
+    return Pipeline(stages=stages, target_fps=target_fps, reader=build_reader(camera_cfg, target_fps))
@@ -1 +1 @@
-__all__ = ["core", "storage", "db", "vision", "kpi"]
+__all__ = ["core", "storage", "db", "vision", "kpi", "reid"]
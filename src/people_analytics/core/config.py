@@ -23,6 +23,16 @@ def load_shifts_config(config_dir: str) -> dict:
     return load_yaml(Path(config_dir) / "shifts.yml")
 
 
+def shifts_for_store(shifts_cfg: dict | None, store_code: str | None) -> list[dict]:
+    if not shifts_cfg:
+        return []
+    overrides = shifts_cfg.get("stores") or {}
+    store_override = overrides.get(store_code) if store_code is not None else None
+    if store_override and store_override.get("shifts"):
+        return store_override["shifts"]
+    return shifts_cfg.get("shifts") or []
+
+
 def load_camera_config(config_dir: str, store_code: str, camera_code: str) -> dict:
     filename = f"store_{store_code}_{camera_code}.yml"
     path = Path(config_dir) / "cameras" / filename
@@ -4,3 +4,11 @@ class AnalyticsError(Exception):
 
 class PathParseError(AnalyticsError):
     pass
+
+
+class DetectorUnavailable(AnalyticsError):
+    pass
+
+
+class ExportError(AnalyticsError):
+    pass
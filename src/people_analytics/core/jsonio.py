@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Output JSON for pipeline results. orjson is used when installed; the stdlib
+# fallback writes the same text (compact separators, ISO-8601 datetimes), so
+# lines from either backend can be mixed in one JSONL.
+
+COLUMNAR_KINDS = ("events", "presence_samples", "face_captures")
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    # numpy scalars/arrays (scores, bboxes) as plain numbers
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return str(value)
+
+
+def _stdlib_dumps(value) -> str:
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False)
+
+
+def _orjson_dumps(value) -> str:
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+
+dumps = _orjson_dumps if orjson is not None else _stdlib_dumps
+loads = orjson.loads if orjson is not None else json.loads
+
+
+def to_columns(records: Iterable[dict]) -> dict[str, list]:
+    # [{"ts": a, "direction": "IN"}, {"ts": b}] -> {"ts": [a, b], "direction": ["IN", None]}
+    columns: dict[str, list] = {}
+    n = 0
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns[key] = [None] * n
+        for key, column in columns.items():
+            column.append(record.get(key))
+        n += 1
+    return columns
+
+
+def iter_rows(value) -> Iterator[dict]:
+    # Records of a segment line in either layout (list of dicts or columns).
+    if isinstance(value, dict):
+        keys = list(value)
+        for row in zip(*value.values()):
+            yield dict(zip(keys, row))
+        return
+    yield from value or []
+
+
+def compact_output(output: dict) -> dict:
+    return {key: to_columns(value) if key in COLUMNAR_KINDS else value for key, value in output.items()}
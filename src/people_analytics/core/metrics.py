@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import prometheus_client  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    prometheus_client = None
+
+logger = logging.getLogger(__name__)
+
+
+class _NoopMetric:
+    # Stand-in when prometheus_client is not installed, so call sites never
+    # have to check whether metrics are enabled.
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+def _metric(kind: str, name: str, doc: str, labels: tuple[str, ...] = (), **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    return getattr(prometheus_client, kind)(name, doc, labels, **kwargs)
+
+
+_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+JOBS_CLAIMED = _metric("Counter", "pa_jobs_claimed_total", "Jobs claimed by this worker", ("type",))
+JOBS_FINISHED = _metric("Counter", "pa_jobs_finished_total", "Jobs finished", ("type", "status"))
+JOB_SECONDS = _metric("Histogram", "pa_job_seconds", "Job run time", ("type",), buckets=_SECONDS_BUCKETS)
+QUEUE_DEPTH = _metric("Gauge", "pa_queue_depth", "Runnable queued jobs", ("type",))
+QUEUE_OLDEST_AGE = _metric("Gauge", "pa_queue_oldest_age_seconds", "Age of the oldest queued job", ("type",))
+
+SEGMENT_SECONDS = _metric(
+    "Histogram",
+    "pa_segment_processing_seconds",
+    "Pipeline wall time per segment",
+    ("store", "camera"),
+    buckets=_SECONDS_BUCKETS,
+)
+REALTIME_FACTOR = _metric(
+    "Gauge", "pa_segment_realtime_factor", "Video seconds processed per wall second (last segment)", ("store", "camera")
+)
+FRAMES_PROCESSED = _metric("Counter", "pa_frames_processed_total", "Frames run through the pipeline", ("store", "camera"))
+FACE_CROPS = _metric("Counter", "pa_face_crops_total", "Face crops written", ("store", "camera"))
+DB_WRITE_SECONDS = _metric(
+    "Histogram", "pa_db_write_seconds", "Time spent writing results", ("operation",), buckets=_SECONDS_BUCKETS
+)
+
+HTTP_REQUESTS = _metric("Counter", "pa_http_requests_total", "API requests", ("method", "route", "status"))
+HTTP_SECONDS = _metric(
+    "Histogram", "pa_http_request_seconds", "API request latency", ("method", "route"), buckets=_SECONDS_BUCKETS
+)
+
+
+@contextmanager
+def observe_seconds(metric, *labels: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.labels(*labels).observe(time.perf_counter() - start)
+
+
+def record_segment(store_code: str, camera_code: str, timings: dict, frames: int, faces: int) -> None:
+    if timings.get("wall_s") is not None:
+        SEGMENT_SECONDS.labels(store_code, camera_code).observe(timings["wall_s"])
+    if timings.get("realtime_factor") is not None:
+        REALTIME_FACTOR.labels(store_code, camera_code).set(timings["realtime_factor"])
+    FRAMES_PROCESSED.labels(store_code, camera_code).inc(frames)
+    FACE_CROPS.labels(store_code, camera_code).inc(faces)
+
+
+_queue_types: set[str] = set()
+
+
+def record_queue(stats: list[dict]) -> None:
+    # Types that drained since the last poll are reset to 0 instead of keeping
+    # their last value.
+    current = {row["type"] for row in stats}
+    for job_type in _queue_types - current:
+        QUEUE_DEPTH.labels(job_type).set(0)
+        QUEUE_OLDEST_AGE.labels(job_type).set(0)
+    _queue_types.update(current)
+    for row in stats:
+        QUEUE_DEPTH.labels(row["type"]).set(row["depth"])
+        QUEUE_OLDEST_AGE.labels(row["type"]).set(row["oldest_age_s"])
+
+
+def start_metrics_server(port: int) -> bool:
+    if prometheus_client is None or port <= 0:
+        return False
+    try:
+        prometheus_client.start_http_server(port)
+    except OSError as exc:
+        # e.g. several workers on one host sharing METRICS_PORT
+        logger.warning("Metrics server not started on port %s: %s", port, exc)
+        return False
+    return True
+
+
+def metrics_asgi_app():
+    if prometheus_client is None:
+        return None
+    return prometheus_client.make_asgi_app()
@@ -13,6 +13,15 @@ class Settings(BaseSettings):
 
     app_env: str = "dev"
     database_url: str = "sqlite:///./var/people_analytics.db"
+    async_database_url: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_recycle_s: int = 1800
+    db_pool_timeout_s: int = 30
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 0
+    db_partition_events: bool = False
+    db_partition_months_ahead: int = 3
     video_root: str = "./var/people_analytics/videos"
     faces_root: str = "./var/people_analytics/faces"
     config_dir: str = "./config"
@@ -21,6 +30,34 @@ class Settings(BaseSettings):
     job_poll_interval: int = 5
     job_lock_timeout: int = 300
     worker_id: str = ""
+    ingest_state_path: str = "./var/people_analytics/ingest_state.json"
+    ingest_workers: int = 8
+    ingest_batch_size: int = 500
+    ingest_full_hash: bool = False
+    ingest_hash_workers: int = 4
+    ingest_watch_backend: str = "auto"
+    ingest_watch_settle_s: float = 10.0
+    ingest_watch_poll_s: float = 30.0
+    visitor_index_root: str = "./var/people_analytics/visitors"
+    visitor_match_threshold: float = 0.55
+    visitor_retention_days: int = 30
+    kpi_cache_ttl_s: int = 300
+    kpi_cache_max_entries: int = 1024
+    kpi_cache_poll_s: int = 5
+    api_gzip_min_size: int = 1024
+    api_page_max: int = 5000
+    metrics_port: int = 9108
+    metrics_queue_poll_s: int = 15
+    inference_threads: int = 0
+    inference_inter_op_threads: int = 1
+    ffmpeg_bin: str = "ffmpeg"
+    ffprobe_bin: str = "ffprobe"
+    parquet_root: str = "./var/people_analytics/parquet"
+    result_cache_enabled: bool = False
+    result_cache_root: str = "./var/people_analytics/result_cache"
+    result_cache_max_mb: int = 2048
+    record_tracks: bool = False
+    tracks_root: str = "./var/people_analytics/tracks"
 
     def resolved_worker_id(self) -> str:
         if self.worker_id:
@@ -35,4 +72,9 @@ def get_settings() -> Settings:
     settings.video_root = str(Path(settings.video_root))
     settings.faces_root = str(Path(settings.faces_root))
     settings.config_dir = str(Path(settings.config_dir))
+    settings.visitor_index_root = str(Path(settings.visitor_index_root))
+    settings.ingest_state_path = str(Path(settings.ingest_state_path))
+    settings.parquet_root = str(Path(settings.parquet_root))
+    settings.result_cache_root = str(Path(settings.result_cache_root))
+    settings.tracks_root = str(Path(settings.tracks_root))
     return settings
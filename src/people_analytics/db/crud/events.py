@@ -1,37 +1,90 @@
 from __future__ import annotations
 
-from sqlalchemy import delete
+from datetime import datetime
+
+from sqlalchemy import delete, select, tuple_
 
 from people_analytics.db.models.event_flow import PeopleFlowEvent
 from people_analytics.db.models.metrics_presence import PresenceSample
 from people_analytics.vision.pipeline import PipelineResult
 
 
-def replace_events_for_segment(session, segment_id: int, store_id: int, camera_id: int, result: PipelineResult) -> None:
+def event_row(store_id: int, camera_id: int, segment_id: int, event: dict) -> PeopleFlowEvent:
+    return PeopleFlowEvent(
+        store_id=store_id,
+        camera_id=camera_id,
+        segment_id=segment_id,
+        ts=event["ts"],
+        direction=event["direction"],
+        is_staff=event.get("is_staff", False),
+        track_id=event.get("track_id"),
+        confidence=event.get("confidence"),
+    )
+
+
+def presence_row(store_id: int, camera_id: int, segment_id: int, sample: dict) -> PresenceSample:
+    return PresenceSample(
+        store_id=store_id,
+        camera_id=camera_id,
+        segment_id=segment_id,
+        ts=sample["ts"],
+        count=sample["count"],
+    )
+
+
+def delete_events_for_segment(session, segment_id: int) -> None:
     session.execute(delete(PeopleFlowEvent).where(PeopleFlowEvent.segment_id == segment_id))
     session.execute(delete(PresenceSample).where(PresenceSample.segment_id == segment_id))
 
-    for event in result.events:
-        session.add(
-            PeopleFlowEvent(
-                store_id=store_id,
-                camera_id=camera_id,
-                segment_id=segment_id,
-                ts=event["ts"],
-                direction=event["direction"],
-                is_staff=event.get("is_staff", False),
-                track_id=event.get("track_id"),
-                confidence=event.get("confidence"),
-            )
-        )
 
+def replace_events_for_segment(session, segment_id: int, store_id: int, camera_id: int, result: PipelineResult) -> None:
+    delete_events_for_segment(session, segment_id)
+    for event in result.events:
+        session.add(event_row(store_id, camera_id, segment_id, event))
     for sample in result.presence_samples:
-        session.add(
-            PresenceSample(
-                store_id=store_id,
-                camera_id=camera_id,
-                segment_id=segment_id,
-                ts=sample["ts"],
-                count=sample["count"],
-            )
-        )
+        session.add(presence_row(store_id, camera_id, segment_id, sample))
+
+
+def list_flow_rows(session, store_id: int, camera_id: int | None, start: datetime, end: datetime) -> list:
+    stmt = select(PeopleFlowEvent.ts, PeopleFlowEvent.direction, PeopleFlowEvent.is_staff).where(
+        PeopleFlowEvent.store_id == store_id,
+        PeopleFlowEvent.ts >= start,
+        PeopleFlowEvent.ts < end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(PeopleFlowEvent.camera_id == camera_id)
+    return list(session.execute(stmt))
+
+
+def list_presence(session, store_id: int, camera_id: int | None, start: datetime, end: datetime) -> list[PresenceSample]:
+    stmt = select(PresenceSample).where(
+        PresenceSample.store_id == store_id,
+        PresenceSample.ts >= start,
+        PresenceSample.ts < end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(PresenceSample.camera_id == camera_id)
+    return list(session.execute(stmt.order_by(PresenceSample.ts)).scalars())
+
+
+def list_events_page(
+    session,
+    limit: int,
+    store_id: int | None = None,
+    camera_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: tuple[datetime, int] | None = None,
+) -> list[PeopleFlowEvent]:
+    stmt = select(PeopleFlowEvent)
+    if store_id is not None:
+        stmt = stmt.where(PeopleFlowEvent.store_id == store_id)
+    if camera_id is not None:
+        stmt = stmt.where(PeopleFlowEvent.camera_id == camera_id)
+    if start is not None:
+        stmt = stmt.where(PeopleFlowEvent.ts >= start)
+    if end is not None:
+        stmt = stmt.where(PeopleFlowEvent.ts < end)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(PeopleFlowEvent.ts, PeopleFlowEvent.id) > tuple_(*cursor))
+    return list(session.execute(stmt.order_by(PeopleFlowEvent.ts, PeopleFlowEvent.id).limit(limit)).scalars())
@@ -1,25 +1,107 @@
 from __future__ import annotations
 
-from sqlalchemy import delete
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, distinct, func, select, tuple_, update
 
 from people_analytics.db.models.face_capture import FaceCapture
 from people_analytics.vision.pipeline import PipelineResult
 
 
-def replace_faces_for_segment(session, segment_id: int, store_id: int, camera_id: int, result: PipelineResult) -> None:
+def face_row(store_id: int, camera_id: int, segment_id: int, face: dict) -> FaceCapture:
+    return FaceCapture(
+        store_id=store_id,
+        camera_id=camera_id,
+        segment_id=segment_id,
+        ts=face["ts"],
+        track_id=face.get("track_id"),
+        source=face.get("source"),
+        face_score=face.get("face_score"),
+        face_bbox=face.get("face_bbox"),
+        path=face.get("path"),
+        visitor_id=face.get("visitor_id"),
+    )
+
+
+def visitor_ids_for_segment(session, segment_id: int) -> dict[str, int]:
+    stmt = select(FaceCapture.path, FaceCapture.visitor_id).where(
+        FaceCapture.segment_id == segment_id,
+        FaceCapture.visitor_id.is_not(None),
+    )
+    return {path: visitor_id for path, visitor_id in session.execute(stmt)}
+
+
+def max_visitor_id(session, store_id: int) -> int:
+    stmt = select(func.max(FaceCapture.visitor_id)).where(FaceCapture.store_id == store_id)
+    return session.execute(stmt).scalar_one() or 0
+
+
+def set_visitor_ids(session, segment_id: int, visitor_ids: dict[str, int]) -> None:
+    # visitor ids are known only after the segment's rows were streamed in
+    if not visitor_ids:
+        return
+    table = FaceCapture.__table__
+    stmt = (
+        update(table)
+        .where(table.c.segment_id == segment_id, table.c.path == bindparam("face_path"))
+        .values(visitor_id=bindparam("new_visitor_id"))
+    )
+    session.execute(stmt, [{"face_path": p, "new_visitor_id": v} for p, v in visitor_ids.items()])
+
+
+def delete_faces_for_segment(session, segment_id: int) -> None:
     session.execute(delete(FaceCapture).where(FaceCapture.segment_id == segment_id))
 
+
+def replace_faces_for_segment(session, segment_id: int, store_id: int, camera_id: int, result: PipelineResult) -> None:
+    delete_faces_for_segment(session, segment_id)
     for face in result.face_captures:
-        session.add(
-            FaceCapture(
-                store_id=store_id,
-                camera_id=camera_id,
-                segment_id=segment_id,
-                ts=face["ts"],
-                track_id=face.get("track_id"),
-                source=face.get("source"),
-                face_score=face.get("face_score"),
-                face_bbox=face.get("face_bbox"),
-                path=face.get("path"),
-            )
+        session.add(face_row(store_id, camera_id, segment_id, face))
+
+
+def visitor_summary(session, store_id: int, start: datetime, end: datetime) -> dict:
+    seen = select(FaceCapture.visitor_id).where(
+        FaceCapture.store_id == store_id,
+        FaceCapture.visitor_id.is_not(None),
+        FaceCapture.ts >= start,
+        FaceCapture.ts < end,
+    )
+    unique = session.execute(
+        select(func.count(distinct(FaceCapture.visitor_id))).where(
+            FaceCapture.store_id == store_id,
+            FaceCapture.visitor_id.is_not(None),
+            FaceCapture.ts >= start,
+            FaceCapture.ts < end,
+        )
+    ).scalar_one()
+    returning = session.execute(
+        select(func.count(distinct(FaceCapture.visitor_id))).where(
+            FaceCapture.store_id == store_id,
+            FaceCapture.visitor_id.in_(seen),
+            FaceCapture.ts < start,
         )
+    ).scalar_one()
+    return {"unique_visitors": int(unique), "returning_visitors": int(returning)}
+
+
+def list_faces_page(
+    session,
+    limit: int,
+    store_id: int | None = None,
+    camera_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: tuple[datetime, int] | None = None,
+) -> list[FaceCapture]:
+    stmt = select(FaceCapture)
+    if store_id is not None:
+        stmt = stmt.where(FaceCapture.store_id == store_id)
+    if camera_id is not None:
+        stmt = stmt.where(FaceCapture.camera_id == camera_id)
+    if start is not None:
+        stmt = stmt.where(FaceCapture.ts >= start)
+    if end is not None:
+        stmt = stmt.where(FaceCapture.ts < end)
+    if cursor is not None:
+        stmt = stmt.where(tuple_(FaceCapture.ts, FaceCapture.id) > tuple_(*cursor))
+    return list(session.execute(stmt.order_by(FaceCapture.ts, FaceCapture.id).limit(limit)).scalars())
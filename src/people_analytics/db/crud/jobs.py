@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import or_, select, update
+from sqlalchemy import func, insert, or_, select, update
 
 from people_analytics.db.models.job import Job
 
@@ -21,6 +21,28 @@ def enqueue_job(session, job_type: str, payload: dict, run_after: datetime | Non
     return job
 
 
+def enqueue_jobs(session, job_type: str, payloads: list[dict], run_after: datetime | None = None) -> int:
+    if not payloads:
+        return 0
+    if run_after is None:
+        run_after = datetime.now(timezone.utc)
+    session.execute(
+        insert(Job),
+        [{"type": job_type, "payload_json": p, "status": "queued", "run_after": run_after} for p in payloads],
+    )
+    return len(payloads)
+
+
+def record_done(session, job_type: str, payload: dict) -> Job:
+    # A finished job for work done outside the worker (CLI backfills), so that
+    # API processes polling finished jobs see it too
+    now = datetime.now(timezone.utc)
+    job = Job(type=job_type, payload_json=payload, status="done", run_after=now, finished_at=now)
+    session.add(job)
+    session.flush()
+    return job
+
+
 def _requeue_stale_jobs(session, now: datetime, lock_timeout_s: int) -> None:
     if lock_timeout_s <= 0:
         return
@@ -75,10 +97,42 @@ def claim_job(session, worker_id: str, lock_timeout_s: int | None = None) -> Job
 
 def mark_done(session, job: Job) -> None:
     job.status = "done"
+    job.finished_at = datetime.now(timezone.utc)
     session.flush()
 
 
 def mark_failed(session, job: Job, error: str) -> None:
     job.status = "failed"
     job.last_error = error
+    job.finished_at = datetime.now(timezone.utc)
     session.flush()
+
+
+def list_finished_since(session, job_type: str, since: datetime, status: str = "done") -> list[Job]:
+    stmt = select(Job).where(
+        Job.type == job_type,
+        Job.status == status,
+        Job.finished_at >= since,
+    )
+    return list(session.execute(stmt).scalars())
+
+
+def queue_stats(session, now: datetime | None = None) -> list[dict]:
+    now = now or datetime.now(timezone.utc)
+    stmt = (
+        select(Job.type, func.count(Job.id), func.min(Job.run_after))
+        .where(Job.status == "queued", or_(Job.run_after.is_(None), Job.run_after <= now))
+        .group_by(Job.type)
+    )
+    stats = []
+    for job_type, depth, oldest in session.execute(stmt):
+        if oldest is not None and oldest.tzinfo is None:
+            oldest = oldest.replace(tzinfo=timezone.utc)
+        stats.append(
+            {
+                "type": job_type,
+                "depth": depth,
+                "oldest_age_s": max(0.0, (now - oldest).total_seconds()) if oldest else 0.0,
+            }
+        )
+    return stats
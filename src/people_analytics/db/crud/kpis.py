@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from datetime import date
 
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, select
 
+from people_analytics.db.models.kpi_daily import KpiDaily
 from people_analytics.db.models.kpi_hourly import KpiHourly
+from people_analytics.db.models.kpi_monthly import KpiMonthly
 from people_analytics.db.models.kpi_shift import KpiShift
+from people_analytics.db.models.kpi_weekly import KpiWeekly
 from people_analytics.core.timeutils import parse_date
 
 
@@ -47,3 +50,170 @@ def list_shift(session, store_id: int, camera_id: int | None, day: str) -> list[
     if camera_id is not None:
         stmt = stmt.where(KpiShift.camera_id == camera_id)
     return list(session.execute(stmt).scalars())
+
+
+def list_hourly_range(session, store_ids: list[int], camera_id: int | None, start: date, end: date) -> list[KpiHourly]:
+    stmt = select(KpiHourly).where(
+        KpiHourly.store_id.in_(store_ids),
+        KpiHourly.date >= start,
+        KpiHourly.date <= end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(KpiHourly.camera_id == camera_id)
+    stmt = stmt.order_by(KpiHourly.store_id, KpiHourly.date, KpiHourly.hour, KpiHourly.camera_id)
+    return list(session.execute(stmt).scalars())
+
+
+def list_shift_range(session, store_ids: list[int], camera_id: int | None, start: date, end: date) -> list[KpiShift]:
+    stmt = select(KpiShift).where(
+        KpiShift.store_id.in_(store_ids),
+        KpiShift.date >= start,
+        KpiShift.date <= end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(KpiShift.camera_id == camera_id)
+    stmt = stmt.order_by(KpiShift.store_id, KpiShift.date, KpiShift.shift_id, KpiShift.camera_id)
+    return list(session.execute(stmt).scalars())
+
+
+ROLLUP_MODELS = {
+    "daily": (KpiDaily, KpiDaily.date),
+    "weekly": (KpiWeekly, KpiWeekly.week_start),
+    "monthly": (KpiMonthly, KpiMonthly.month_start),
+}
+
+
+def sum_daily(session, store_id: int, camera_id: int | None, start: date, end: date) -> dict | None:
+    row = session.execute(
+        select(
+            func.count(KpiDaily.id),
+            func.sum(KpiDaily.in_count),
+            func.sum(KpiDaily.out_count),
+            func.sum(KpiDaily.staff_in),
+            func.sum(KpiDaily.staff_out),
+            func.max(KpiDaily.max_presence),
+        ).where(
+            KpiDaily.store_id == store_id,
+            KpiDaily.camera_id == camera_id,
+            KpiDaily.date >= start,
+            KpiDaily.date <= end,
+        )
+    ).one()
+    if not row[0]:
+        return None
+    return {
+        "days": int(row[0]),
+        "in_count": int(row[1] or 0),
+        "out_count": int(row[2] or 0),
+        "staff_in": int(row[3] or 0),
+        "staff_out": int(row[4] or 0),
+        "max_presence": row[5],
+    }
+
+
+def replace_rollup(session, period: str, store_id: int, camera_id: int | None, period_start: date, row: dict | None) -> None:
+    model, period_col = ROLLUP_MODELS[period]
+    session.execute(
+        delete(model).where(
+            model.store_id == store_id,
+            model.camera_id == camera_id,
+            period_col == period_start,
+        )
+    )
+    if row is not None:
+        add_rollup(session, period, store_id, camera_id, period_start, row)
+
+
+def add_rollup(session, period: str, store_id: int, camera_id: int | None, period_start: date, row: dict) -> None:
+    model, period_col = ROLLUP_MODELS[period]
+    values = dict(row)
+    if period == "daily":
+        values.pop("days", None)
+    if period == "weekly":
+        iso = period_start.isocalendar()
+        values.update(iso_year=iso[0], iso_week=iso[1])
+    session.add(model(store_id=store_id, camera_id=camera_id, **{period_col.key: period_start}, **values))
+
+
+def list_rollup(session, period: str, store_ids: list[int], camera_id: int | None, start: date, end: date) -> list:
+    model, period_col = ROLLUP_MODELS[period]
+    stmt = select(model).where(
+        model.store_id.in_(store_ids),
+        period_col >= start,
+        period_col <= end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(model.camera_id == camera_id)
+    stmt = stmt.order_by(model.store_id, period_col, model.camera_id)
+    return list(session.execute(stmt).scalars())
+
+
+def daily_totals(session, store_ids: list[int], camera_id: int | None, start: date, end: date) -> list[dict]:
+    stmt = select(
+        KpiDaily.store_id,
+        KpiDaily.date,
+        func.sum(KpiDaily.in_count),
+        func.sum(KpiDaily.out_count),
+        func.sum(KpiDaily.staff_in),
+        func.sum(KpiDaily.staff_out),
+        func.max(KpiDaily.max_presence),
+    ).where(
+        KpiDaily.store_id.in_(store_ids),
+        KpiDaily.date >= start,
+        KpiDaily.date <= end,
+    )
+    if camera_id is not None:
+        stmt = stmt.where(KpiDaily.camera_id == camera_id)
+    stmt = stmt.group_by(KpiDaily.store_id, KpiDaily.date).order_by(KpiDaily.store_id, KpiDaily.date)
+    return [
+        {
+            "store_id": store_id,
+            "date": day,
+            "in": int(in_count or 0),
+            "out": int(out_count or 0),
+            "staff_in": int(staff_in or 0),
+            "staff_out": int(staff_out or 0),
+            "max_presence": max_presence,
+        }
+        for store_id, day, in_count, out_count, staff_in, staff_out, max_presence in session.execute(stmt)
+    ]
+
+
+def hourly_daily_sums(session, start: date, end: date, store_id: int | None = None) -> list[dict]:
+    stmt = select(
+        KpiHourly.store_id,
+        KpiHourly.camera_id,
+        KpiHourly.date,
+        func.sum(KpiHourly.in_count),
+        func.sum(KpiHourly.out_count),
+        func.sum(KpiHourly.staff_in),
+        func.sum(KpiHourly.staff_out),
+        func.max(KpiHourly.max_presence),
+    ).where(
+        KpiHourly.date >= start,
+        KpiHourly.date <= end,
+    )
+    if store_id is not None:
+        stmt = stmt.where(KpiHourly.store_id == store_id)
+    stmt = stmt.group_by(KpiHourly.store_id, KpiHourly.camera_id, KpiHourly.date)
+    return [
+        {
+            "store_id": sid,
+            "camera_id": cid,
+            "date": day,
+            "in_count": int(in_count or 0),
+            "out_count": int(out_count or 0),
+            "staff_in": int(staff_in or 0),
+            "staff_out": int(staff_out or 0),
+            "max_presence": max_presence,
+        }
+        for sid, cid, day, in_count, out_count, staff_in, staff_out, max_presence in session.execute(stmt)
+    ]
+
+
+def delete_rollups(session, period: str, start: date, end: date, store_id: int | None = None) -> None:
+    model, period_col = ROLLUP_MODELS[period]
+    stmt = delete(model).where(period_col >= start, period_col <= end)
+    if store_id is not None:
+        stmt = stmt.where(model.store_id == store_id)
+    session.execute(stmt)
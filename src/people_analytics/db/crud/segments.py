@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from datetime import datetime
 from pathlib import Path
 
-from sqlalchemy import select
+from sqlalchemy import func, insert, select
 
 from people_analytics.core.settings import get_settings
 from people_analytics.core.timeutils import combine_date_time, to_utc
@@ -39,6 +40,36 @@ def ensure_camera(session, store_id: int, camera_code: str) -> Camera:
     return camera
 
 
+def segment_values(
+    store_id: int,
+    camera_id: int,
+    info: VideoPathInfo,
+    video_root: Path,
+    tz_name: str,
+    fingerprint: str | None = None,
+) -> dict:
+    start_dt = to_utc(combine_date_time(info.date, info.start_time, tz_name), tz_name)
+    end_dt = to_utc(combine_date_time(info.date, info.end_time, tz_name), tz_name)
+    abs_path = video_root / info.relative_path
+    try:
+        file_size = abs_path.stat().st_size
+    except OSError:
+        file_size = None
+    return {
+        "store_id": store_id,
+        "camera_id": camera_id,
+        "path": info.relative_path,
+        "start_time": start_dt,
+        "end_time": end_dt,
+        "duration_seconds": int((end_dt - start_dt).total_seconds()),
+        "fingerprint": fingerprint or fingerprint_for_file(abs_path),
+        "content_sha256": None,
+        "file_size": file_size,
+        "status": "new",
+        "duplicate_of": None,
+    }
+
+
 def upsert_video_segment(
     session,
     store_id: int,
@@ -52,37 +83,97 @@ def upsert_video_segment(
     if existing:
         return existing, False
 
-    settings = get_settings()
-    start_dt_local = combine_date_time(info.date, info.start_time, settings.timezone)
-    end_dt_local = combine_date_time(info.date, info.end_time, settings.timezone)
-    start_dt = to_utc(start_dt_local, settings.timezone)
-    end_dt = to_utc(end_dt_local, settings.timezone)
-
-    abs_path = video_root / info.relative_path
-    fingerprint = fingerprint_for_file(abs_path)
-    file_size = abs_path.stat().st_size if abs_path.exists() else None
-
-    segment = VideoSegment(
-        store_id=store_id,
-        camera_id=camera_id,
-        path=info.relative_path,
-        start_time=start_dt,
-        end_time=end_dt,
-        duration_seconds=int((end_dt - start_dt).total_seconds()),
-        fingerprint=fingerprint,
-        file_size=file_size,
-    )
+    values = segment_values(store_id, camera_id, info, video_root, get_settings().timezone)
+    # A copy of an already registered file is kept for bookkeeping but marked
+    # as a duplicate; callers only enqueue segments whose status is "new".
+    original = canonical_segment_ids(session, "fingerprint", [values["fingerprint"]]).get(values["fingerprint"])
+    if original is not None:
+        values.update(status="duplicate", duplicate_of=original)
+    segment = VideoSegment(**values)
     session.add(segment)
     session.flush()
     return segment, True
 
 
+def existing_segment_paths(session, paths: list[str], chunk_size: int = 500) -> set[str]:
+    found: set[str] = set()
+    for i in range(0, len(paths), chunk_size):
+        chunk = paths[i : i + chunk_size]
+        found.update(session.execute(select(VideoSegment.path).where(VideoSegment.path.in_(chunk))).scalars())
+    return found
+
+
+def canonical_segment_ids(session, key: str, values: list[str], chunk_size: int = 500) -> dict[str, int]:
+    # Earliest segment per fingerprint (or content_sha256) that is neither a
+    # duplicate nor failed; see promote_duplicate for originals that fail later.
+    column = getattr(VideoSegment, key)
+    values = sorted({v for v in values if v})
+    found: dict[str, int] = {}
+    for i in range(0, len(values), chunk_size):
+        stmt = (
+            select(column, func.min(VideoSegment.id))
+            .where(column.in_(values[i : i + chunk_size]), VideoSegment.status.not_in(("duplicate", "failed")))
+            .group_by(column)
+        )
+        found.update({value: segment_id for value, segment_id in session.execute(stmt)})
+    return found
+
+
+def promote_duplicate(session, segment_id: int) -> int | None:
+    # The original failed: its earliest copy becomes the segment to process
+    # and the other copies point at it instead.
+    copies = list(
+        session.execute(
+            select(VideoSegment).where(VideoSegment.duplicate_of == segment_id).order_by(VideoSegment.id)
+        ).scalars()
+    )
+    if not copies:
+        return None
+    promoted = copies[0]
+    promoted.status = "new"
+    promoted.duplicate_of = None
+    for segment in copies[1:]:
+        segment.duplicate_of = promoted.id
+    session.flush()
+    return promoted.id
+
+
+def mark_segment_status(session, segment: VideoSegment, status: str) -> None:
+    segment.status = status
+    session.flush()
+
+
+def insert_segments(session, rows: list[dict]) -> list[int]:
+    if not rows:
+        return []
+    return list(session.scalars(insert(VideoSegment).returning(VideoSegment.id, sort_by_parameter_order=True), rows))
+
+
 def get_segment(session, segment_id: int) -> VideoSegment | None:
     return session.get(VideoSegment, segment_id)
 
 
-def list_segments(session, limit: int) -> list[VideoSegment]:
-    return list(session.execute(select(VideoSegment).order_by(VideoSegment.id.desc()).limit(limit)).scalars())
+def list_segments(
+    session,
+    limit: int,
+    store_id: int | None = None,
+    camera_id: int | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    cursor: int | None = None,
+) -> list[VideoSegment]:
+    stmt = select(VideoSegment)
+    if store_id is not None:
+        stmt = stmt.where(VideoSegment.store_id == store_id)
+    if camera_id is not None:
+        stmt = stmt.where(VideoSegment.camera_id == camera_id)
+    if start is not None:
+        stmt = stmt.where(VideoSegment.start_time >= start)
+    if end is not None:
+        stmt = stmt.where(VideoSegment.start_time < end)
+    if cursor is not None:
+        stmt = stmt.where(VideoSegment.id < cursor)
+    return list(session.execute(stmt.order_by(VideoSegment.id.desc()).limit(limit)).scalars())
 
 
 def get_store(session, store_id: int) -> Store | None:
@@ -0,0 +1,31 @@
+"""visitor id on face captures
+
+Revision ID: 0000a
+Revises:
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0000a"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _columns(table: str) -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    # init-db may already have created it on a fresh database.
+    if "visitor_id" not in _columns("face_captures"):
+        with op.batch_alter_table("face_captures") as batch:
+            batch.add_column(sa.Column("visitor_id", sa.Integer(), nullable=True))
+    op.create_index("ix_face_captures_visitor_id", "face_captures", ["visitor_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_face_captures_visitor_id", table_name="face_captures", if_exists=True)
+    with op.batch_alter_table("face_captures") as batch:
+        batch.drop_column("visitor_id")
@@ -0,0 +1,30 @@
+"""finished_at on jobs
+
+Revision ID: 0000b
+Revises: 0000a
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0000b"
+down_revision = "0000a"
+branch_labels = None
+depends_on = None
+
+
+def _columns(table: str) -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    # mark_done/mark_failed stamp it; KpiCache polls it. Rows finished
+    # before this revision keep NULL.
+    if "finished_at" not in _columns("jobs"):
+        with op.batch_alter_table("jobs") as batch:
+            batch.add_column(sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("jobs") as batch:
+        batch.drop_column("finished_at")
@@ -0,0 +1,56 @@
+"""daily, weekly and monthly KPI rollup tables
+
+Revision ID: 0000c
+Revises: 0000b
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0000c"
+down_revision = "0000b"
+branch_labels = None
+depends_on = None
+
+# (table, period column, extra columns)
+ROLLUPS = [
+    ("kpi_daily", "date", []),
+    ("kpi_weekly", "week_start", ["iso_year", "iso_week", "days"]),
+    ("kpi_monthly", "month_start", ["days"]),
+]
+
+
+def _columns(period: str, extra: list[str]) -> list[sa.Column]:
+    columns = [
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("store_id", sa.Integer(), sa.ForeignKey("stores.id"), nullable=False),
+        sa.Column("camera_id", sa.Integer(), sa.ForeignKey("cameras.id"), nullable=True),
+        sa.Column(period, sa.Date(), nullable=False),
+    ]
+    counts = [*extra, "in_count", "out_count", "staff_in", "staff_out"]
+    columns += [sa.Column(name, sa.Integer(), nullable=False) for name in counts]
+    columns += [
+        sa.Column("max_presence", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ]
+    return columns
+
+
+def upgrade() -> None:
+    # init-db may already have created them on a fresh database.
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table, period, extra in ROLLUPS:
+        if table not in existing:
+            op.create_table(
+                table,
+                *_columns(period, extra),
+                sa.UniqueConstraint("store_id", "camera_id", period, name=f"uq_{table}"),
+            )
+        op.create_index(f"ix_{table}_camera_id", table, ["camera_id"], if_not_exists=True)
+        op.create_index(f"ix_{table}_{period}", table, [period], if_not_exists=True)
+        op.create_index(f"ix_{table}_store_{period}", table, ["store_id", period], if_not_exists=True)
+
+
+def downgrade() -> None:
+    for table, _period, _extra in reversed(ROLLUPS):
+        op.drop_table(table)
@@ -0,0 +1,65 @@
+"""composite indexes matching the event/KPI/job query shapes
+
+Revision ID: 0001
+Revises: 0000c
+Create Date: 2026-10-19
+"""
+from alembic import op
+
+revision = "0001"
+down_revision = "0000c"
+branch_labels = None
+depends_on = None
+
+# (index name, table, columns). Every table keeps working through `init-db`,
+# so indexes are created/dropped idempotently.
+INDEXES = [
+    ("ix_people_flow_events_store_camera_ts", "people_flow_events", ["store_id", "camera_id", "ts"]),
+    ("ix_people_flow_events_store_ts", "people_flow_events", ["store_id", "ts"]),
+    ("ix_face_captures_store_camera_ts", "face_captures", ["store_id", "camera_id", "ts"]),
+    ("ix_face_captures_store_ts", "face_captures", ["store_id", "ts"]),
+    ("ix_presence_samples_store_camera_ts", "presence_samples", ["store_id", "camera_id", "ts"]),
+    ("ix_presence_samples_store_ts", "presence_samples", ["store_id", "ts"]),
+    ("ix_video_segments_store_camera_start", "video_segments", ["store_id", "camera_id", "start_time"]),
+    ("ix_kpi_hourly_store_date", "kpi_hourly", ["store_id", "date"]),
+    ("ix_kpi_shift_store_date", "kpi_shift", ["store_id", "date"]),
+    ("ix_kpi_daily_store_date", "kpi_daily", ["store_id", "date"]),
+    ("ix_kpi_weekly_store_week_start", "kpi_weekly", ["store_id", "week_start"]),
+    ("ix_kpi_monthly_store_month_start", "kpi_monthly", ["store_id", "month_start"]),
+    ("ix_jobs_status_run_after_id", "jobs", ["status", "run_after", "id"]),
+    ("ix_jobs_type_status_finished_at", "jobs", ["type", "status", "finished_at"]),
+]
+
+# Single-column store_id indexes now covered by the composites' leading column.
+REDUNDANT = [
+    ("ix_people_flow_events_store_id", "people_flow_events"),
+    ("ix_face_captures_store_id", "face_captures"),
+    ("ix_presence_samples_store_id", "presence_samples"),
+    ("ix_video_segments_store_id", "video_segments"),
+    ("ix_kpi_hourly_store_id", "kpi_hourly"),
+    ("ix_kpi_shift_store_id", "kpi_shift"),
+    ("ix_kpi_daily_store_id", "kpi_daily"),
+    ("ix_kpi_weekly_store_id", "kpi_weekly"),
+    ("ix_kpi_monthly_store_id", "kpi_monthly"),
+]
+
+
+def _concurrently() -> dict:
+    # Large Postgres tables: build without blocking writers (needs autocommit).
+    return {"postgresql_concurrently": True} if op.get_context().dialect.name == "postgresql" else {}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **_concurrently())
+        for name, table in REDUNDANT:
+            op.drop_index(name, table_name=table, if_exists=True, **_concurrently())
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table in REDUNDANT:
+            op.create_index(name, table, ["store_id"], if_not_exists=True, **_concurrently())
+        for name, table, _ in INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True, **_concurrently())
@@ -0,0 +1,38 @@
+"""monthly range partitioning of events and face captures (PostgreSQL, opt-in)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from datetime import date
+
+from alembic import op
+
+from people_analytics.core.settings import get_settings
+from people_analytics.db.partitions import PARTITIONED_TABLES, convert_to_partitioned, convert_to_plain, partition_horizon
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _enabled() -> bool:
+    return op.get_context().dialect.name == "postgresql" and get_settings().db_partition_events
+
+
+def upgrade() -> None:
+    # No-op unless DB_PARTITION_EVENTS=true on PostgreSQL; enabling it later
+    # can be done with `python -m apps.cli db-partitions --convert`.
+    if not _enabled():
+        return
+    until = partition_horizon(date.today(), get_settings().db_partition_months_ahead)
+    for table in PARTITIONED_TABLES:
+        convert_to_partitioned(op.get_bind(), table, until)
+
+
+def downgrade() -> None:
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for table in PARTITIONED_TABLES:
+        convert_to_plain(op.get_bind(), table)
@@ -0,0 +1,37 @@
+"""content hash and duplicate tracking on video segments
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _columns() -> set[str]:
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns("video_segments")}
+
+
+def upgrade() -> None:
+    # init-db may already have created these on a fresh database.
+    existing = _columns()
+    with op.batch_alter_table("video_segments") as batch:
+        if "content_sha256" not in existing:
+            batch.add_column(sa.Column("content_sha256", sa.String(64), nullable=True))
+        if "duplicate_of" not in existing:
+            batch.add_column(sa.Column("duplicate_of", sa.Integer(), nullable=True))
+            batch.create_foreign_key("fk_video_segments_duplicate_of", "video_segments", ["duplicate_of"], ["id"])
+    op.create_index("ix_video_segments_content_sha256", "video_segments", ["content_sha256"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_video_segments_content_sha256", table_name="video_segments", if_exists=True)
+    with op.batch_alter_table("video_segments") as batch:
+        batch.drop_constraint("fk_video_segments_duplicate_of", type_="foreignkey")
+        batch.drop_column("duplicate_of")
+        batch.drop_column("content_sha256")
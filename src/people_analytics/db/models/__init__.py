@@ -7,6 +7,9 @@ from people_analytics.db.models.event_flow import PeopleFlowEvent
 from people_analytics.db.models.metrics_presence import PresenceSample
 from people_analytics.db.models.kpi_hourly import KpiHourly
 from people_analytics.db.models.kpi_shift import KpiShift
+from people_analytics.db.models.kpi_daily import KpiDaily
+from people_analytics.db.models.kpi_weekly import KpiWeekly
+from people_analytics.db.models.kpi_monthly import KpiMonthly
 from people_analytics.db.models.face_capture import FaceCapture
 
 __all__ = [
@@ -19,5 +22,8 @@ __all__ = [
     "PresenceSample",
     "KpiHourly",
     "KpiShift",
+    "KpiDaily",
+    "KpiWeekly",
+    "KpiMonthly",
     "FaceCapture",
 ]
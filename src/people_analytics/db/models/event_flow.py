@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Boolean, Float
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Boolean, Float
 from sqlalchemy.sql import func
 
 from people_analytics.db.base import Base
@@ -6,9 +6,14 @@ from people_analytics.db.base import Base
 
 class PeopleFlowEvent(Base):
     __tablename__ = "people_flow_events"
+    # Matches the rebuild/API query shapes: store + optional camera + ts range.
+    __table_args__ = (
+        Index("ix_people_flow_events_store_camera_ts", "store_id", "camera_id", "ts"),
+        Index("ix_people_flow_events_store_ts", "store_id", "ts"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False, index=True)
     segment_id = Column(Integer, ForeignKey("video_segments.id"), nullable=False, index=True)
     ts = Column(DateTime(timezone=True), nullable=False)
@@ -17,3 +22,16 @@ class PeopleFlowEvent(Base):
     track_id = Column(String(64), nullable=True)
     confidence = Column(Float, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "segment_id": self.segment_id,
+            "ts": self.ts,
+            "direction": self.direction,
+            "is_staff": self.is_staff,
+            "track_id": self.track_id,
+            "confidence": self.confidence,
+        }
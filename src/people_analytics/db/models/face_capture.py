@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, JSON
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 
 from people_analytics.db.base import Base
@@ -6,9 +6,13 @@ from people_analytics.db.base import Base
 
 class FaceCapture(Base):
     __tablename__ = "face_captures"
+    __table_args__ = (
+        Index("ix_face_captures_store_camera_ts", "store_id", "camera_id", "ts"),
+        Index("ix_face_captures_store_ts", "store_id", "ts"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False, index=True)
     segment_id = Column(Integer, ForeignKey("video_segments.id"), nullable=True, index=True)
     ts = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -17,3 +21,19 @@ class FaceCapture(Base):
     face_score = Column(Float, nullable=True)
     face_bbox = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
     path = Column(String(512), nullable=False)
+    visitor_id = Column(Integer, nullable=True, index=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "segment_id": self.segment_id,
+            "ts": self.ts,
+            "track_id": self.track_id,
+            "source": self.source,
+            "face_score": self.face_score,
+            "face_bbox": self.face_bbox,
+            "path": self.path,
+            "visitor_id": self.visitor_id,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, Integer, String, Text, JSON
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, JSON
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 
@@ -7,6 +7,12 @@ from people_analytics.db.base import Base
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # claim_job: status = queued ORDER BY run_after, id
+        Index("ix_jobs_status_run_after_id", "status", "run_after", "id"),
+        # KPI cache invalidation polling by type/status/finished_at
+        Index("ix_jobs_type_status_finished_at", "type", "status", "finished_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     type = Column(String(64), nullable=False, index=True)
@@ -18,4 +24,5 @@ class Job(Base):
     locked_at = Column(DateTime(timezone=True), nullable=True)
     locked_by = Column(String(128), nullable=True)
     last_error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Date, Index, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy import DateTime
+
+from people_analytics.db.base import Base
+
+
+class KpiDaily(Base):
+    __tablename__ = "kpi_daily"
+    __table_args__ = (
+        UniqueConstraint("store_id", "camera_id", "date", name="uq_kpi_daily"),
+        Index("ix_kpi_daily_store_date", "store_id", "date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
+    camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)
+    date = Column(Date, nullable=False, index=True)
+    in_count = Column(Integer, nullable=False, default=0)
+    out_count = Column(Integer, nullable=False, default=0)
+    staff_in = Column(Integer, nullable=False, default=0)
+    staff_out = Column(Integer, nullable=False, default=0)
+    max_presence = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "date": self.date,
+            "in": self.in_count,
+            "out": self.out_count,
+            "staff_in": self.staff_in,
+            "staff_out": self.staff_out,
+            "max_presence": self.max_presence,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Date, Index, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy import DateTime
 
@@ -7,10 +7,13 @@ from people_analytics.db.base import Base
 
 class KpiHourly(Base):
     __tablename__ = "kpi_hourly"
-    __table_args__ = (UniqueConstraint("store_id", "camera_id", "date", "hour", name="uq_kpi_hourly"),)
+    __table_args__ = (
+        UniqueConstraint("store_id", "camera_id", "date", "hour", name="uq_kpi_hourly"),
+        Index("ix_kpi_hourly_store_date", "store_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)
     date = Column(Date, nullable=False, index=True)
     hour = Column(Integer, nullable=False)
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Date, Index, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy import DateTime
+
+from people_analytics.db.base import Base
+
+
+class KpiMonthly(Base):
+    __tablename__ = "kpi_monthly"
+    __table_args__ = (
+        UniqueConstraint("store_id", "camera_id", "month_start", name="uq_kpi_monthly"),
+        Index("ix_kpi_monthly_store_month_start", "store_id", "month_start"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
+    camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)
+    month_start = Column(Date, nullable=False, index=True)
+    days = Column(Integer, nullable=False, default=0)
+    in_count = Column(Integer, nullable=False, default=0)
+    out_count = Column(Integer, nullable=False, default=0)
+    staff_in = Column(Integer, nullable=False, default=0)
+    staff_out = Column(Integer, nullable=False, default=0)
+    max_presence = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "month_start": self.month_start,
+            "year": self.month_start.year if self.month_start else None,
+            "month": self.month_start.month if self.month_start else None,
+            "days": self.days,
+            "in": self.in_count,
+            "out": self.out_count,
+            "staff_in": self.staff_in,
+            "staff_out": self.staff_out,
+            "max_presence": self.max_presence,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Date, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Date, Index, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.sql import func
 from sqlalchemy import DateTime
 
@@ -7,10 +7,13 @@ from people_analytics.db.base import Base
 
 class KpiShift(Base):
     __tablename__ = "kpi_shift"
-    __table_args__ = (UniqueConstraint("store_id", "camera_id", "date", "shift_id", name="uq_kpi_shift"),)
+    __table_args__ = (
+        UniqueConstraint("store_id", "camera_id", "date", "shift_id", name="uq_kpi_shift"),
+        Index("ix_kpi_shift_store_date", "store_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)
     date = Column(Date, nullable=False, index=True)
     shift_id = Column(String(32), nullable=False)
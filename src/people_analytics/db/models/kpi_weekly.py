@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Date, Index, Integer, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from sqlalchemy import DateTime
+
+from people_analytics.db.base import Base
+
+
+class KpiWeekly(Base):
+    __tablename__ = "kpi_weekly"
+    __table_args__ = (
+        UniqueConstraint("store_id", "camera_id", "week_start", name="uq_kpi_weekly"),
+        Index("ix_kpi_weekly_store_week_start", "store_id", "week_start"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
+    camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=True, index=True)
+    week_start = Column(Date, nullable=False, index=True)
+    iso_year = Column(Integer, nullable=False)
+    iso_week = Column(Integer, nullable=False)
+    days = Column(Integer, nullable=False, default=0)
+    in_count = Column(Integer, nullable=False, default=0)
+    out_count = Column(Integer, nullable=False, default=0)
+    staff_in = Column(Integer, nullable=False, default=0)
+    staff_out = Column(Integer, nullable=False, default=0)
+    max_presence = Column(Integer, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "week_start": self.week_start,
+            "iso_year": self.iso_year,
+            "iso_week": self.iso_week,
+            "days": self.days,
+            "in": self.in_count,
+            "out": self.out_count,
+            "staff_in": self.staff_in,
+            "staff_out": self.staff_out,
+            "max_presence": self.max_presence,
+        }
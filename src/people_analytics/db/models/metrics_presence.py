@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer
 from sqlalchemy.sql import func
 
 from people_analytics.db.base import Base
@@ -6,11 +6,24 @@ from people_analytics.db.base import Base
 
 class PresenceSample(Base):
     __tablename__ = "presence_samples"
+    __table_args__ = (
+        Index("ix_presence_samples_store_camera_ts", "store_id", "camera_id", "ts"),
+        Index("ix_presence_samples_store_ts", "store_id", "ts"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False, index=True)
     segment_id = Column(Integer, ForeignKey("video_segments.id"), nullable=False, index=True)
     ts = Column(DateTime(timezone=True), nullable=False)
     count = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def to_dict(self) -> dict:
+        return {
+            "store_id": self.store_id,
+            "camera_id": self.camera_id,
+            "segment_id": self.segment_id,
+            "ts": self.ts,
+            "count": self.count,
+        }
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from people_analytics.db.base import Base
@@ -7,18 +7,23 @@ from people_analytics.storage.paths import VideoPathInfo
 
 class VideoSegment(Base):
     __tablename__ = "video_segments"
-    __table_args__ = (UniqueConstraint("path", name="uq_video_segments_path"),)
+    __table_args__ = (
+        UniqueConstraint("path", name="uq_video_segments_path"),
+        Index("ix_video_segments_store_camera_start", "store_id", "camera_id", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
     camera_id = Column(Integer, ForeignKey("cameras.id"), nullable=False, index=True)
     path = Column(String(512), nullable=False)
     start_time = Column(DateTime(timezone=True), nullable=False)
     end_time = Column(DateTime(timezone=True), nullable=False)
     duration_seconds = Column(Integer, nullable=True)
     fingerprint = Column(String(128), nullable=False, index=True)
+    content_sha256 = Column(String(64), nullable=True, index=True)
     file_size = Column(Integer, nullable=True)
     status = Column(String(32), default="new", nullable=False)
+    duplicate_of = Column(Integer, ForeignKey("video_segments.id"), nullable=True)
 
     store = relationship("Store")
     camera = relationship("Camera")
@@ -32,6 +37,7 @@ class VideoSegment(Base):
             "start_time": self.start_time,
             "end_time": self.end_time,
             "status": self.status,
+            "duplicate_of": self.duplicate_of,
         }
 
     def to_path_info(self, store_code: str, camera_code: str, tz_name: str | None = None) -> VideoPathInfo:
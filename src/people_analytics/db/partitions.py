@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+from people_analytics.kpi.rollups import month_start
+
+# Append-mostly, time-keyed tables that grow with video volume. On PostgreSQL
+# they can be range-partitioned by month on ts so day-range scans only touch
+# one partition and old months can be detached/dropped cheaply.
+PARTITIONED_TABLES = ("people_flow_events", "face_captures")
+
+
+def next_month(day: date) -> date:
+    first = month_start(day)
+    return date(first.year + 1, 1, 1) if first.month == 12 else date(first.year, first.month + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+def month_partition_ddl(table: str, month: date) -> str:
+    lo = month_start(month)
+    hi = next_month(lo)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, lo)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{lo.isoformat()} 00:00:00+00') TO ('{hi.isoformat()} 00:00:00+00')"
+    )
+
+
+def default_partition_ddl(table: str) -> str:
+    return f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"
+
+
+def partition_horizon(today: date, months_ahead: int) -> date:
+    horizon = month_start(today)
+    for _ in range(months_ahead):
+        horizon = next_month(horizon)
+    return horizon
+
+
+def months_between(start: date, end: date) -> list[date]:
+    months = []
+    current = month_start(start)
+    while current <= end:
+        months.append(current)
+        current = next_month(current)
+    return months
+
+
+def is_partitioned(conn, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    row = conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+        ),
+        {"table": table},
+    ).first()
+    return row is not None
+
+
+def ensure_month_partitions(conn, start: date, end: date, tables=PARTITIONED_TABLES) -> list[str]:
+    created = []
+    for table in tables:
+        if not is_partitioned(conn, table):
+            continue
+        for month in months_between(start, end):
+            conn.execute(text(month_partition_ddl(table, month)))
+            created.append(partition_name(table, month))
+    return created
+
+
+def _ts_bounds(conn, table: str) -> tuple[date | None, date | None]:
+    row = conn.execute(text(f"SELECT min(ts)::date, max(ts)::date FROM {table}")).first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+def _foreign_keys(conn, table: str) -> list[tuple[str, str]]:
+    return [
+        (row[0], row[1])
+        for row in conn.execute(
+            text(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'"
+            ),
+            {"table": table},
+        )
+    ]
+
+
+def _secondary_indexes(conn, table: str) -> list[str]:
+    rows = conn.execute(
+        text("SELECT indexdef FROM pg_indexes WHERE tablename = :table AND indexname <> :pkey"),
+        {"table": table, "pkey": f"{table}_pkey"},
+    )
+    return [row[0] for row in rows]
+
+
+def _retarget_index(indexdef: str, old: str, new: str) -> str:
+    return re.sub(rf" ON (ONLY )?(public\.)?{old} ", f" ON {new} ", indexdef)
+
+
+def _swap_table(conn, table: str, old: str, create_sql: str, pkey: str) -> list[str]:
+    # Renames the live table out of the way, creates the replacement under the
+    # original name and moves the id sequence and foreign keys over to it.
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey"))
+    conn.execute(text(create_sql))
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({pkey})"))
+    conn.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    for name, definition in _foreign_keys(conn, old):
+        conn.execute(text(f"ALTER TABLE {old} DROP CONSTRAINT {name}"))
+        conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}"))
+    return _secondary_indexes(conn, old)
+
+
+def _finish_swap(conn, table: str, old: str, indexes: list[str]) -> None:
+    conn.execute(text(f"INSERT INTO {table} SELECT * FROM {old}"))
+    conn.execute(text(f"DROP TABLE {old}"))
+    # Recreated after the drop so the original index names are free again; on
+    # a partitioned parent every partition inherits them.
+    for indexdef in indexes:
+        conn.execute(text(_retarget_index(indexdef, old, table)))
+
+
+def convert_to_partitioned(conn, table: str, until: date) -> None:
+    # One-off conversion of a plain table into a monthly range-partitioned one
+    # (the primary key must include ts). Rewrites the whole table, so run it in
+    # a maintenance window.
+    if conn.dialect.name != "postgresql" or is_partitioned(conn, table):
+        return
+    legacy = f"{table}_legacy"
+    indexes = _swap_table(
+        conn,
+        table,
+        legacy,
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (ts)",
+        "id, ts",
+    )
+    lo, hi = _ts_bounds(conn, legacy)
+    conn.execute(text(default_partition_ddl(table)))
+    ensure_month_partitions(conn, min(lo or until, until), max(hi or until, until), tables=(table,))
+    _finish_swap(conn, table, legacy, indexes)
+
+
+def convert_to_plain(conn, table: str) -> None:
+    if conn.dialect.name != "postgresql" or not is_partitioned(conn, table):
+        return
+    partitioned = f"{table}_partitioned"
+    indexes = _swap_table(
+        conn,
+        table,
+        partitioned,
+        f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)",
+        "id",
+    )
+    _finish_swap(conn, table, partitioned, indexes)
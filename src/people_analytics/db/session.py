@@ -5,17 +5,37 @@ from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from people_analytics.core.settings import get_settings
+from people_analytics.core.settings import Settings, get_settings
 from people_analytics.db.base import Base
 
 engine = None
 SessionLocal = None
 
 
+def engine_options(url: str, settings: Settings, is_async: bool = False) -> dict:
+    options: dict = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.startswith("sqlite"):
+        return options
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle_s,
+        pool_timeout=settings.db_pool_timeout_s,
+    )
+    if settings.db_statement_timeout_ms > 0 and url.startswith("postgresql"):
+        timeout = str(settings.db_statement_timeout_ms)
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
 def _init_engine() -> None:
     global engine, SessionLocal
     settings = get_settings()
-    engine = create_engine(settings.database_url, future=True)
+    engine = create_engine(settings.database_url, future=True, **engine_options(settings.database_url, settings))
     SessionLocal = sessionmaker(bind=engine, expire_on_commit=False, future=True)
 
 
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import time
+
+from people_analytics.db.crud import events as events_crud
+from people_analytics.db.crud import faces as faces_crud
+from people_analytics.vision.pipeline import PipelineResult
+from people_analytics.vision.sinks import RECORD_KINDS, ResultSink
+
+
+class DbSink(ResultSink):
+    # Inserts a segment's records in batches while the pipeline runs instead
+    # of all at once at the end. Existing rows of the segment are deleted up
+    # front (same replace semantics as replace_*_for_segment); everything
+    # stays in the caller's transaction.
+    def __init__(self, session, segment_id: int, store_id: int, camera_id: int, batch_size: int = 500):
+        self.session = session
+        self.keys = (store_id, camera_id, segment_id)
+        self.batch_size = batch_size
+        self.rows: list = []
+        # time spent in INSERTs, spread over the run (pa_db_write_seconds)
+        self.write_s = 0.0
+        events_crud.delete_events_for_segment(session, segment_id)
+        faces_crud.delete_faces_for_segment(session, segment_id)
+
+    def write(self, kind: str, record: dict) -> None:
+        if kind == "events":
+            self.rows.append(events_crud.event_row(*self.keys, record))
+        elif kind == "presence_samples":
+            self.rows.append(events_crud.presence_row(*self.keys, record))
+        elif kind == "face_captures":
+            self.rows.append(faces_crud.face_row(*self.keys, record))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.rows:
+            started = time.perf_counter()
+            self.session.add_all(self.rows)
+            self.session.flush()
+            self.rows = []
+            self.write_s += time.perf_counter() - started
+
+    def close(self) -> None:
+        self.flush()
+
+
+def replay_into_db(session, segment_id: int, store_id: int, camera_id: int, result: PipelineResult) -> DbSink:
+    # Same rows as a fresh run, from a cached output. The cache holds no
+    # embeddings, so faces keep the visitor ids of the previous run (read
+    # before DbSink deletes the segment's rows).
+    visitor_ids = faces_crud.visitor_ids_for_segment(session, segment_id)
+    sink = DbSink(session, segment_id, store_id, camera_id)
+    for kind in RECORD_KINDS:
+        for record in getattr(result, kind):
+            if kind == "face_captures":
+                record["visitor_id"] = visitor_ids.get(record.get("path"))
+            sink.write(kind, record)
+    sink.close()
+    return sink
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
 
 def compute_occupancy(events: list[dict]) -> dict:
     current = 0
@@ -11,3 +14,65 @@ def compute_occupancy(events: list[dict]) -> dict:
             current = max(0, current - 1)
         max_occ = max(max_occ, current)
     return {"max": max_occ}
+
+
+class OccupancyAggregator:
+    # Events only increment per-bucket IN/OUT counters, so segments can be fed
+    # in any order; the running occupancy is a cumulative sum over the (at most
+    # a few thousand) bucket keys when the series is read.
+    def __init__(self, resolution_s: int = 60, initial: int = 0):
+        if resolution_s <= 0:
+            raise ValueError("resolution_s must be positive")
+        self.resolution_s = int(resolution_s)
+        self.initial = int(initial)
+        self._buckets: dict[int, list[int]] = {}
+
+    def add(self, event: dict) -> None:
+        direction = event["direction"]
+        if direction not in ("IN", "OUT"):
+            return
+        ts = event["ts"]
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        key = int(ts.timestamp()) // self.resolution_s
+        counts = self._buckets.get(key)
+        if counts is None:
+            counts = self._buckets[key] = [0, 0]
+        counts[0 if direction == "IN" else 1] += 1
+
+    def add_many(self, events) -> None:
+        for event in events:
+            self.add(event)
+
+    def series(self, tz_name: str | None = None, fill_gaps: bool = True) -> list[dict]:
+        if not self._buckets:
+            return []
+        tz = ZoneInfo(tz_name) if tz_name else timezone.utc
+        keys = sorted(self._buckets)
+        if fill_gaps:
+            keys = range(keys[0], keys[-1] + 1)
+
+        current = self.initial
+        rows = []
+        for key in keys:
+            in_count, out_count = self._buckets.get(key, (0, 0))
+            current = max(0, current + in_count - out_count)
+            rows.append(
+                {
+                    "ts": datetime.fromtimestamp(key * self.resolution_s, tz),
+                    "in": in_count,
+                    "out": out_count,
+                    "occupancy": current,
+                }
+            )
+        return rows
+
+    def final_occupancy(self) -> int:
+        current = self.initial
+        for key in sorted(self._buckets):
+            in_count, out_count = self._buckets[key]
+            current = max(0, current + in_count - out_count)
+        return current
+
+    def max(self) -> int:
+        return max((row["occupancy"] for row in self.series(fill_gaps=False)), default=self.initial)
@@ -1,19 +1,90 @@
 from __future__ import annotations
 
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Iterable, Sequence
+
+
+def _window_counts(times: Sequence[float], weights: Sequence[int], window_s: float) -> list[int]:
+    counts = []
+    n = len(times)
+    right = 0
+    running = 0
+    for i in range(n):
+        end = times[i] + window_s
+        while right < n and times[right] < end:
+            running += weights[right]
+            right += 1
+        counts.append(running)
+        running -= weights[i]
+    return counts
+
+
+def _top_k_non_overlapping(
+    starts: Sequence[datetime],
+    counts: Sequence[int],
+    window: timedelta,
+    top_k: int,
+) -> list[dict]:
+    order = sorted(range(len(counts)), key=lambda i: (-counts[i], i))
+    picked: list[dict] = []
+    for i in order:
+        if len(picked) >= top_k:
+            break
+        start = starts[i]
+        end = start + window
+        if any(start < p["end"] and p["start"] < end for p in picked):
+            continue
+        picked.append({"start": start, "end": end, "count": counts[i]})
+    return picked
+
+
+def _peaks(
+    starts: Sequence[datetime],
+    weights: Sequence[int],
+    window_minutes: Iterable[int],
+    top_k: int,
+) -> dict[int, list[dict]]:
+    times = [s.timestamp() for s in starts]
+    peaks: dict[int, list[dict]] = {}
+    for minutes in window_minutes:
+        counts = _window_counts(times, weights, minutes * 60.0)
+        peaks[minutes] = _top_k_non_overlapping(starts, counts, timedelta(minutes=minutes), top_k)
+    return peaks
+
+
+def peak_windows(
+    events: list[dict],
+    window_minutes: Iterable[int] = (15, 60),
+    top_k: int = 1,
+    direction: str = "IN",
+    presorted: bool = False,
+) -> dict[int, list[dict]]:
+    if not events:
+        return {minutes: [] for minutes in window_minutes}
+    if not presorted:
+        events = sorted(events, key=lambda e: e["ts"])
+    starts = [e["ts"] for e in events]
+    weights = [1 if e["direction"] == direction else 0 for e in events]
+    return _peaks(starts, weights, window_minutes, top_k)
+
+
+def peak_windows_from_buckets(
+    buckets: Iterable[tuple[datetime, int]],
+    window_minutes: Iterable[int] = (60,),
+    top_k: int = 1,
+) -> dict[int, list[dict]]:
+    # Buckets are (bucket_start, count) pairs, e.g. hourly or per-minute KPI
+    # rows; windows should be a multiple of the bucket size.
+    rows = sorted(buckets, key=lambda b: b[0])
+    if not rows:
+        return {minutes: [] for minutes in window_minutes}
+    starts = [r[0] for r in rows]
+    weights = [int(r[1]) for r in rows]
+    return _peaks(starts, weights, window_minutes, top_k)
 
 
 def peak_window(events: list[dict], window_minutes: int = 60) -> dict | None:
     if not events:
         return None
-    events = sorted(events, key=lambda e: e["ts"])
-    best = None
-    window = timedelta(minutes=window_minutes)
-
-    for event in events:
-        start = event["ts"]
-        end = start + window
-        count = sum(1 for e in events if start <= e["ts"] < end and e["direction"] == "IN")
-        if not best or count > best["count"]:
-            best = {"start": start, "end": end, "count": count}
-    return best
+    peaks = peak_windows(events, window_minutes=(window_minutes,), top_k=1)[window_minutes]
+    return peaks[0] if peaks else None
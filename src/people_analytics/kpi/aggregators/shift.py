@@ -1,36 +1,122 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime, time
+from functools import lru_cache
+from typing import Sequence
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+MINUTES_PER_DAY = 24 * 60
 
 
 def _parse_time(value: str) -> time:
     return time.fromisoformat(value)
 
 
-def get_shift_id(ts_local: datetime, shifts: list[dict]) -> str | None:
-    for shift in shifts:
-        start = _parse_time(shift["start"])
-        end = _parse_time(shift["end"])
-        if start <= ts_local.time() < end:
-            return shift["id"]
-    return None
+def _minute_of_day(value: time) -> int:
+    return value.hour * 60 + value.minute
+
+
+class ShiftTable:
+    # One byte per minute of the day holding the 1-based index of the shift
+    # covering it (0 = no shift). Overnight shifts (start > end) wrap past
+    # midnight; when shifts overlap the first one listed wins, as before.
+    def __init__(self, shifts: Sequence[dict]):
+        if len(shifts) > 255:
+            raise ValueError("at most 255 shifts supported")
+        self.shift_ids: list[str | None] = [None]
+        self.slots = bytearray(MINUTES_PER_DAY)
+        for shift in shifts:
+            self.shift_ids.append(shift["id"])
+            idx = len(self.shift_ids) - 1
+            start = _minute_of_day(_parse_time(shift["start"]))
+            end = _minute_of_day(_parse_time(shift["end"]))
+            if start < end:
+                minutes = range(start, end)
+            elif start > end:
+                minutes = list(range(start, MINUTES_PER_DAY)) + list(range(0, end))
+            else:
+                minutes = range(MINUTES_PER_DAY)
+            for minute in minutes:
+                if not self.slots[minute]:
+                    self.slots[minute] = idx
+
+    def lookup(self, ts_local: datetime) -> str | None:
+        return self.shift_ids[self.slots[ts_local.hour * 60 + ts_local.minute]]
+
+    def lookup_minutes(self, minutes) -> list[str | None]:
+        if np is not None:
+            idx = np.frombuffer(self.slots, dtype=np.uint8)[np.asarray(minutes, dtype=np.int64)]
+            return [self.shift_ids[i] for i in idx.tolist()]
+        return [self.shift_ids[self.slots[m]] for m in minutes]
+
+
+@lru_cache(maxsize=64)
+def _compile(key: tuple[tuple[str, str, str], ...]) -> ShiftTable:
+    return ShiftTable([{"id": i, "start": s, "end": e} for i, s, e in key])
+
+
+def compile_shifts(shifts: Sequence[dict]) -> ShiftTable:
+    return _compile(tuple((s["id"], s["start"], s["end"]) for s in shifts))
+
+
+def get_shift_id(ts_local: datetime, shifts: list[dict] | ShiftTable) -> str | None:
+    table = shifts if isinstance(shifts, ShiftTable) else compile_shifts(shifts)
+    return table.lookup(ts_local)
 
 
-def aggregate_shift(events: list[dict], shifts: list[dict]) -> dict[str, dict]:
+def _empty_counts() -> dict:
+    return {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
+
+
+def _count(bucket: dict, direction: str, is_staff: bool) -> None:
+    if direction == "IN":
+        bucket["in"] += 1
+        if is_staff:
+            bucket["staff_in"] += 1
+    elif direction == "OUT":
+        bucket["out"] += 1
+        if is_staff:
+            bucket["staff_out"] += 1
+
+
+def aggregate_shift(events: list[dict], shifts: list[dict] | ShiftTable) -> dict[str, dict]:
+    table = shifts if isinstance(shifts, ShiftTable) else compile_shifts(shifts)
     buckets: dict[str, dict] = {}
     for event in events:
-        shift_id = get_shift_id(event["ts"], shifts)
+        shift_id = table.lookup(event["ts"])
         if not shift_id:
             continue
         if shift_id not in buckets:
-            buckets[shift_id] = {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
-        is_staff = event.get("is_staff", False)
-        if event["direction"] == "IN":
-            buckets[shift_id]["in"] += 1
-            if is_staff:
-                buckets[shift_id]["staff_in"] += 1
-        elif event["direction"] == "OUT":
-            buckets[shift_id]["out"] += 1
-            if is_staff:
-                buckets[shift_id]["staff_out"] += 1
+            buckets[shift_id] = _empty_counts()
+        _count(buckets[shift_id], event["direction"], event.get("is_staff", False))
     return buckets
+
+
+def aggregate_hourly_and_shift(
+    events: list[dict],
+    shifts: list[dict] | ShiftTable | None,
+) -> tuple[dict[int, dict], dict[str, dict]]:
+    table = None
+    if shifts:
+        table = shifts if isinstance(shifts, ShiftTable) else compile_shifts(shifts)
+    hourly: dict[int, dict] = defaultdict(_empty_counts)
+    by_shift: dict[str, dict] = {}
+    for event in events:
+        ts = event["ts"]
+        direction = event["direction"]
+        is_staff = event.get("is_staff", False)
+        _count(hourly[ts.hour], direction, is_staff)
+        if table is None:
+            continue
+        shift_id = table.shift_ids[table.slots[ts.hour * 60 + ts.minute]]
+        if not shift_id:
+            continue
+        if shift_id not in by_shift:
+            by_shift[shift_id] = _empty_counts()
+        _count(by_shift[shift_id], direction, is_staff)
+    return hourly, by_shift
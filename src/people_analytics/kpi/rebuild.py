@@ -1,14 +1,38 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime, timedelta, time
 
-from sqlalchemy import select
-
+from people_analytics.core.config import shifts_for_store
 from people_analytics.core.timeutils import parse_date, to_local, to_utc
+from people_analytics.db.crud import events as events_crud
 from people_analytics.db.crud import kpis as kpis_crud
-from people_analytics.db.models.event_flow import PeopleFlowEvent
-from people_analytics.kpi.aggregators.hourly import aggregate_hourly
-from people_analytics.kpi.aggregators.shift import aggregate_shift
+from people_analytics.db.crud import segments as segments_crud
+from people_analytics.kpi.aggregators.shift import aggregate_hourly_and_shift, compile_shifts
+from people_analytics.kpi.rollups import refresh_rollups
+
+
+def _presence_by_hour(samples, tz_name: str) -> dict[int, dict]:
+    counts: dict[int, list[int]] = defaultdict(list)
+    for sample in samples:
+        counts[to_local(sample.ts, tz_name).hour].append(sample.count)
+    return {
+        hour: {"avg_presence": round(sum(values) / len(values)), "max_presence": max(values)}
+        for hour, values in counts.items()
+    }
+
+
+def _daily_row(hourly_rows: list[dict]) -> dict | None:
+    if not hourly_rows:
+        return None
+    presence = [r["max_presence"] for r in hourly_rows if r.get("max_presence") is not None]
+    return {
+        "in_count": sum(r["in_count"] for r in hourly_rows),
+        "out_count": sum(r["out_count"] for r in hourly_rows),
+        "staff_in": sum(r["staff_in"] for r in hourly_rows),
+        "staff_out": sum(r["staff_out"] for r in hourly_rows),
+        "max_presence": max(presence) if presence else None,
+    }
 
 
 def rebuild_for_date(session, store_id: int, camera_id: int | None, day: str, shifts_cfg: dict | None, tz_name: str) -> None:
@@ -20,16 +44,9 @@ def rebuild_for_date(session, store_id: int, camera_id: int | None, day: str, sh
     end_local = start_local + timedelta(days=1)
     start = to_utc(start_local, tz_name)
     end = to_utc(end_local, tz_name)
-    stmt = select(PeopleFlowEvent).where(
-        PeopleFlowEvent.store_id == store_id,
-        PeopleFlowEvent.ts >= start,
-        PeopleFlowEvent.ts < end,
-    )
-    if camera_id is not None:
-        stmt = stmt.where(PeopleFlowEvent.camera_id == camera_id)
 
     events = []
-    for row in session.execute(stmt).scalars():
+    for row in events_crud.list_flow_rows(session, store_id, camera_id, start, end):
         events.append(
             {
                 "ts": to_local(row.ts, tz_name),
@@ -38,21 +55,28 @@ def rebuild_for_date(session, store_id: int, camera_id: int | None, day: str, sh
             }
         )
 
-    hourly = aggregate_hourly(events)
+    store = segments_crud.get_store(session, store_id)
+    shifts = shifts_for_store(shifts_cfg, store.code if store else None)
+    shift_table = compile_shifts(shifts) if shifts else None
+    hourly, shift_counts = aggregate_hourly_and_shift(events, shift_table)
+    presence = _presence_by_hour(events_crud.list_presence(session, store_id, camera_id, start, end), tz_name)
+    empty = {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
     hourly_rows = [
         {
             "hour": hour,
-            "in_count": counts["in"],
-            "out_count": counts["out"],
-            "staff_in": counts["staff_in"],
-            "staff_out": counts["staff_out"],
+            "in_count": hourly.get(hour, empty)["in"],
+            "out_count": hourly.get(hour, empty)["out"],
+            "staff_in": hourly.get(hour, empty)["staff_in"],
+            "staff_out": hourly.get(hour, empty)["staff_out"],
+            "avg_presence": presence.get(hour, {}).get("avg_presence"),
+            "max_presence": presence.get(hour, {}).get("max_presence"),
         }
-        for hour, counts in hourly.items()
+        for hour in sorted(set(hourly) | set(presence))
     ]
     kpis_crud.replace_hourly(session, store_id, camera_id, day_date, hourly_rows)
+    refresh_rollups(session, store_id, camera_id, day_date, _daily_row(hourly_rows))
 
-    if shifts_cfg and shifts_cfg.get("shifts"):
-        shift_counts = aggregate_shift(events, shifts_cfg.get("shifts"))
+    if shift_table is not None:
         shift_rows = [
             {
                 "shift_id": shift_id,
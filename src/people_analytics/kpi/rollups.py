@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, timedelta
+
+from people_analytics.db.crud import kpis as kpis_crud
+
+COUNT_KEYS = ("in_count", "out_count", "staff_in", "staff_out")
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def month_end(day: date) -> date:
+    next_month = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return next_month - timedelta(days=1)
+
+
+def refresh_rollups(session, store_id: int, camera_id: int | None, day: date, daily_row: dict | None) -> None:
+    kpis_crud.replace_rollup(session, "daily", store_id, camera_id, day, daily_row)
+    session.flush()
+
+    ws = week_start(day)
+    weekly = kpis_crud.sum_daily(session, store_id, camera_id, ws, ws + timedelta(days=6))
+    kpis_crud.replace_rollup(session, "weekly", store_id, camera_id, ws, weekly)
+
+    ms = month_start(day)
+    monthly = kpis_crud.sum_daily(session, store_id, camera_id, ms, month_end(day))
+    kpis_crud.replace_rollup(session, "monthly", store_id, camera_id, ms, monthly)
+
+
+def _merge(total: dict, row: dict) -> None:
+    total["days"] += 1
+    for key in COUNT_KEYS:
+        total[key] += row[key]
+    if row["max_presence"] is not None:
+        total["max_presence"] = max(total["max_presence"] or 0, row["max_presence"])
+
+
+def backfill_rollups(session, start: date, end: date, store_id: int | None = None) -> dict:
+    # Widen to whole weeks and months so every touched period is rebuilt from
+    # complete daily data.
+    lo = min(week_start(start), month_start(start))
+    hi = max(week_start(end) + timedelta(days=6), month_end(end))
+    daily_rows = kpis_crud.hourly_daily_sums(session, lo, hi, store_id)
+
+    def _empty() -> dict:
+        return {"days": 0, "in_count": 0, "out_count": 0, "staff_in": 0, "staff_out": 0, "max_presence": None}
+
+    weekly: dict[tuple, dict] = defaultdict(_empty)
+    monthly: dict[tuple, dict] = defaultdict(_empty)
+    for row in daily_rows:
+        key = (row["store_id"], row["camera_id"])
+        ws = week_start(row["date"])
+        ms = month_start(row["date"])
+        # Periods only partly inside the widened range are left untouched.
+        if ws >= lo and ws + timedelta(days=6) <= hi:
+            _merge(weekly[key + (ws,)], row)
+        if ms >= lo and month_end(ms) <= hi:
+            _merge(monthly[key + (ms,)], row)
+
+    kpis_crud.delete_rollups(session, "daily", lo, hi, store_id)
+    kpis_crud.delete_rollups(session, "weekly", lo, hi - timedelta(days=6), store_id)
+    last_month = month_start(hi) if month_end(hi) == hi else month_start(month_start(hi) - timedelta(days=1))
+    kpis_crud.delete_rollups(session, "monthly", lo, last_month, store_id)
+
+    for row in daily_rows:
+        values = {k: row[k] for k in COUNT_KEYS + ("max_presence",)}
+        kpis_crud.add_rollup(session, "daily", row["store_id"], row["camera_id"], row["date"], values)
+    for (sid, cid, ws), values in weekly.items():
+        kpis_crud.add_rollup(session, "weekly", sid, cid, ws, values)
+    for (sid, cid, ms), values in monthly.items():
+        kpis_crud.add_rollup(session, "monthly", sid, cid, ms, values)
+
+    return {"days": len(daily_rows), "weeks": len(weekly), "months": len(monthly), "from": lo, "to": hi}
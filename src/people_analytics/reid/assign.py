@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from people_analytics.core import metrics
+from people_analytics.core.settings import get_settings
+from people_analytics.db.crud import faces as faces_crud
+from people_analytics.reid.visitor_index import (
+    assign_visitors,
+    index_lock,
+    load_or_create_index,
+    visitor_index_path,
+)
+from people_analytics.vision.pipeline import PipelineResult
+
+logger = logging.getLogger(__name__)
+
+# Visitor ids for a processed segment: shared by the worker and
+# `process --segment-id`, which both replace the segment's face rows.
+
+
+def update_visitor_index(session, store_code: str, segment, result: PipelineResult) -> int:
+    if not result.embeddings:
+        return 0
+
+    settings = get_settings()
+    path = visitor_index_path(settings.visitor_index_root, store_code)
+    dim = len(result.embeddings[0][1])
+    with index_lock(path):
+        next_visitor_id = 1
+        if not path.exists():
+            # A lost index (new VISITOR_INDEX_ROOT, deleted file) must not hand
+            # out ids already in face_captures: visitor_summary would merge
+            # unrelated people into "returning" visitors.
+            next_visitor_id = faces_crud.max_visitor_id(session, segment.store_id) + 1
+            if next_visitor_id > 1:
+                logger.warning(
+                    "Visitor index %s not found but store %s has visitor ids up to %s; "
+                    "starting a new index at %s (earlier visitors will not be matched)",
+                    path,
+                    store_code,
+                    next_visitor_id - 1,
+                    next_visitor_id,
+                )
+        index = load_or_create_index(path, dim, settings.visitor_match_threshold, next_visitor_id)
+        if settings.visitor_retention_days > 0:
+            cutoff = segment.start_time - timedelta(days=settings.visitor_retention_days)
+            index.evict_before(cutoff.timestamp())
+        assigned = assign_visitors(index, result.embeddings, segment.id)
+        index.save(path)
+    return assigned
+
+
+def store_visitor_ids(session, store_code: str, segment, result: PipelineResult) -> int:
+    # The segment's face rows must already be in the session (DbSink)
+    if not update_visitor_index(session, store_code, segment, result):
+        return 0
+    with metrics.observe_seconds(metrics.DB_WRITE_SECONDS, "visitor_ids"):
+        visitor_ids = {face["path"]: face["visitor_id"] for face, _ in result.embeddings if face.get("visitor_id")}
+        faces_crud.set_visitor_ids(session, segment.id, visitor_ids)
+        session.flush()
+    return len(visitor_ids)
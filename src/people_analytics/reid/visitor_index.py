@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - windows
+    fcntl = None
+    import msvcrt
+
+
+@dataclass
+class VisitorMatch:
+    visitor_id: int
+    similarity: float
+    is_new: bool
+    first_seen: float
+
+
+class VisitorIndex:
+    # Random-hyperplane LSH over visitor centroids. Each table hashes a centroid
+    # to a `num_bits` signature; queries probe the exact bucket plus every
+    # bucket one bit away, then rescore the candidates with exact cosine.
+    def __init__(
+        self,
+        dim: int,
+        threshold: float = 0.55,
+        num_tables: int = 16,
+        num_bits: int = 10,
+        seed: int = 0,
+    ):
+        if np is None:
+            raise RuntimeError("numpy-not-installed")
+        self.dim = int(dim)
+        self.threshold = float(threshold)
+        self.num_tables = int(num_tables)
+        self.num_bits = int(num_bits)
+        self.seed = int(seed)
+        rng = np.random.default_rng(self.seed)
+        self.planes = rng.standard_normal((self.num_tables, self.num_bits, self.dim)).astype(np.float32)
+        self._powers = (1 << np.arange(self.num_bits)).astype(np.int64)
+        self._tables: list[dict[int, set[int]]] = [{} for _ in range(self.num_tables)]
+        self._centroids = np.zeros((0, self.dim), dtype=np.float32)
+        self._keys = np.zeros((0, self.num_tables), dtype=np.int64)
+        self._visitor_ids = np.zeros(0, dtype=np.int64)
+        self._first_seen = np.zeros(0, dtype=np.float64)
+        self._last_seen = np.zeros(0, dtype=np.float64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._active = np.zeros(0, dtype=bool)
+        self._free_slots: list[int] = []
+        self.next_visitor_id = 1
+        # segment ids whose faces were already added (see assign_visitors)
+        self.segments: set[int] = set()
+
+    def __len__(self) -> int:
+        return int(self._active.sum())
+
+    def _normalize(self, embedding):
+        vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if vec.shape[0] != self.dim:
+            raise ValueError(f"embedding dim {vec.shape[0]} != index dim {self.dim}")
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            raise ValueError("embedding has zero norm")
+        return vec / norm
+
+    def _hash(self, vec) -> "np.ndarray":
+        bits = (self.planes @ vec) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def _candidates(self, keys) -> set[int]:
+        candidates: set[int] = set()
+        for t, key in enumerate(keys.tolist()):
+            table = self._tables[t]
+            bucket = table.get(key)
+            if bucket:
+                candidates.update(bucket)
+            for bit in range(self.num_bits):
+                bucket = table.get(key ^ (1 << bit))
+                if bucket:
+                    candidates.update(bucket)
+        return candidates
+
+    def _grow(self) -> int:
+        if self._free_slots:
+            return self._free_slots.pop()
+        slot = self._centroids.shape[0]
+        capacity = max(64, slot * 2)
+        self._centroids = _resize(self._centroids, (capacity, self.dim))
+        self._keys = _resize(self._keys, (capacity, self.num_tables))
+        self._visitor_ids = _resize(self._visitor_ids, (capacity,))
+        self._first_seen = _resize(self._first_seen, (capacity,))
+        self._last_seen = _resize(self._last_seen, (capacity,))
+        self._counts = _resize(self._counts, (capacity,))
+        self._active = _resize(self._active, (capacity,))
+        self._free_slots.extend(range(capacity - 1, slot, -1))
+        return slot
+
+    def _insert_keys(self, slot: int, keys) -> None:
+        self._keys[slot] = keys
+        for t, key in enumerate(keys.tolist()):
+            self._tables[t].setdefault(key, set()).add(slot)
+
+    def _remove_keys(self, slot: int) -> None:
+        for t, key in enumerate(self._keys[slot].tolist()):
+            bucket = self._tables[t].get(key)
+            if bucket is None:
+                continue
+            bucket.discard(slot)
+            if not bucket:
+                del self._tables[t][key]
+
+    def query(self, embedding, k: int = 1) -> list[tuple[int, float]]:
+        vec = self._normalize(embedding)
+        candidates = self._candidates(self._hash(vec))
+        if not candidates:
+            return []
+        slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        sims = self._centroids[slots] @ vec
+        order = np.argsort(-sims)[:k]
+        return [(int(self._visitor_ids[slots[i]]), float(sims[i])) for i in order]
+
+    def add(self, embedding, ts: float) -> VisitorMatch:
+        vec = self._normalize(embedding)
+        keys = self._hash(vec)
+        candidates = self._candidates(keys)
+        best_slot = None
+        best_sim = -1.0
+        if candidates:
+            slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+            sims = self._centroids[slots] @ vec
+            i = int(np.argmax(sims))
+            best_slot = int(slots[i])
+            best_sim = float(sims[i])
+
+        if best_slot is not None and best_sim >= self.threshold:
+            count = int(self._counts[best_slot])
+            centroid = self._centroids[best_slot] * count + vec
+            centroid /= float(np.linalg.norm(centroid)) or 1.0
+            self._centroids[best_slot] = centroid
+            self._counts[best_slot] = count + 1
+            self._last_seen[best_slot] = max(float(self._last_seen[best_slot]), ts)
+            self._first_seen[best_slot] = min(float(self._first_seen[best_slot]), ts)
+            new_keys = self._hash(centroid)
+            if not np.array_equal(new_keys, self._keys[best_slot]):
+                self._remove_keys(best_slot)
+                self._insert_keys(best_slot, new_keys)
+            return VisitorMatch(
+                visitor_id=int(self._visitor_ids[best_slot]),
+                similarity=best_sim,
+                is_new=False,
+                first_seen=float(self._first_seen[best_slot]),
+            )
+
+        slot = self._grow()
+        visitor_id = self.next_visitor_id
+        self.next_visitor_id += 1
+        self._centroids[slot] = vec
+        self._visitor_ids[slot] = visitor_id
+        self._first_seen[slot] = ts
+        self._last_seen[slot] = ts
+        self._counts[slot] = 1
+        self._active[slot] = True
+        self._insert_keys(slot, keys)
+        return VisitorMatch(visitor_id=visitor_id, similarity=1.0, is_new=True, first_seen=ts)
+
+    def evict_before(self, ts: float) -> int:
+        stale = np.flatnonzero(self._active & (self._last_seen < ts))
+        for slot in stale.tolist():
+            self._remove_keys(slot)
+            self._active[slot] = False
+            self._free_slots.append(slot)
+        return int(stale.shape[0])
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        active = np.flatnonzero(self._active)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            np.savez_compressed(
+                f,
+                params=np.array(
+                    [self.dim, self.num_tables, self.num_bits, self.seed, self.next_visitor_id],
+                    dtype=np.int64,
+                ),
+                threshold=np.array([self.threshold], dtype=np.float64),
+                centroids=self._centroids[active],
+                visitor_ids=self._visitor_ids[active],
+                first_seen=self._first_seen[active],
+                last_seen=self._last_seen[active],
+                counts=self._counts[active],
+                segments=np.array(sorted(self.segments), dtype=np.int64),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, threshold: float | None = None) -> "VisitorIndex":
+        if np is None:
+            raise RuntimeError("numpy-not-installed")
+        with np.load(Path(path)) as data:
+            dim, num_tables, num_bits, seed, next_visitor_id = data["params"].tolist()
+            index = cls(
+                dim=dim,
+                threshold=float(data["threshold"][0]) if threshold is None else threshold,
+                num_tables=num_tables,
+                num_bits=num_bits,
+                seed=seed,
+            )
+            centroids = data["centroids"]
+            n = centroids.shape[0]
+            index._centroids = centroids.astype(np.float32)
+            index._visitor_ids = data["visitor_ids"].astype(np.int64)
+            index._first_seen = data["first_seen"].astype(np.float64)
+            index._last_seen = data["last_seen"].astype(np.float64)
+            index._counts = data["counts"].astype(np.int64)
+            if "segments" in data.files:
+                index.segments = set(data["segments"].tolist())
+        index._active = np.ones(n, dtype=bool)
+        index._keys = np.zeros((n, index.num_tables), dtype=np.int64)
+        index.next_visitor_id = int(next_visitor_id)
+        for slot in range(n):
+            index._insert_keys(slot, index._hash(index._centroids[slot]))
+        return index
+
+
+def _resize(array, shape):
+    grown = np.zeros(shape, dtype=array.dtype)
+    grown[: array.shape[0]] = array
+    return grown
+
+
+def visitor_index_path(root: str | Path, store_code: str) -> Path:
+    return Path(root) / f"store={store_code}.npz"
+
+
+def load_or_create_index(path: Path, dim: int, threshold: float, next_visitor_id: int = 1) -> VisitorIndex:
+    # next_visitor_id only applies to a new index
+    if Path(path).exists():
+        return VisitorIndex.load(path, threshold=threshold)
+    index = VisitorIndex(dim=dim, threshold=threshold)
+    index.next_visitor_id = next_visitor_id
+    return index
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - windows
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:  # pragma: no cover - windows
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def index_lock(path: Path, timeout_s: float = 60.0, poll_s: float = 0.1):
+    # OS lock on an open fd: released when the holder exits or crashes, so a
+    # leftover .lock file never blocks. The file itself is never removed
+    # (unlinking would let two workers lock different inodes).
+    lock_path = Path(path).with_name(Path(path).name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_path), os.O_CREAT | os.O_RDWR)
+    try:
+        deadline = time.monotonic() + timeout_s
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"visitor index locked: {lock_path}")
+            time.sleep(poll_s)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+def assign_visitors(index: VisitorIndex, embeddings: list[tuple[dict, list]], segment_id: int | None = None) -> int:
+    # `embeddings` is PipelineResult.embeddings. A segment already in the index
+    # (job retry, reprocess) only looks its faces up: adding them again would
+    # count the same visit twice in the centroids.
+    indexed = segment_id is not None and segment_id in index.segments
+    assigned = 0
+    for face, embedding in sorted(embeddings, key=lambda pair: pair[0]["ts"]):
+        if indexed:
+            best = index.query(embedding)
+            if not best or best[0][1] < index.threshold:
+                continue
+            face["visitor_id"] = best[0][0]
+        else:
+            ts = face["ts"].timestamp() if hasattr(face["ts"], "timestamp") else float(face["ts"])
+            face["visitor_id"] = index.add(embedding, ts).visitor_id
+        assigned += 1
+    if segment_id is not None:
+        index.segments.add(segment_id)
+    return assigned
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+from people_analytics.core.exceptions import PathParseError
+from people_analytics.core.settings import get_settings
+from people_analytics.db.crud import jobs as jobs_crud
+from people_analytics.db.crud import segments as segments_crud
+from people_analytics.db.session import get_session
+from people_analytics.storage.fingerprint import fingerprints_for_files, full_content_hashes
+from people_analytics.storage.paths import VideoPathInfo, parse_video_path
+from people_analytics.storage.scanner import Partition, ScanState, iter_partitions, scan_partitions
+
+
+class IdCache:
+    # store/camera ids rarely change; resolving them once per code instead of
+    # two SELECTs per file is most of the per-row cost of a large ingest.
+    def __init__(self, store_cfg: dict | None = None):
+        self.store_cfg = store_cfg or {}
+        self.stores: dict[str, int] = {}
+        self.cameras: dict[tuple[int, str], int] = {}
+
+    def resolve(self, session, store_code: str, camera_code: str) -> tuple[int, int]:
+        store_id = self.stores.get(store_code)
+        if store_id is None:
+            store_id = segments_crud.ensure_store(session, store_code, self.store_cfg.get(store_code)).id
+            self.stores[store_code] = store_id
+        camera_id = self.cameras.get((store_id, camera_code))
+        if camera_id is None:
+            camera_id = segments_crud.ensure_camera(session, store_id, camera_code).id
+            self.cameras[(store_id, camera_code)] = camera_id
+        return store_id, camera_id
+
+
+def _mark_duplicates(session, rows: list[dict], key: str) -> tuple[list[dict], list[dict]]:
+    # Rows matching an existing segment are inserted as duplicates right away;
+    # repeats inside the batch wait until their first copy has an id.
+    canonical = segments_crud.canonical_segment_ids(session, key, [r[key] for r in rows])
+    first: list[dict] = []
+    repeats: list[dict] = []
+    seen: set[str] = set()
+    for row in rows:
+        value = row[key]
+        if value and value in canonical:
+            row.update(status="duplicate", duplicate_of=canonical[value])
+        elif value and value in seen:
+            repeats.append(row)
+            continue
+        elif value:
+            seen.add(value)
+        first.append(row)
+    return first, repeats
+
+
+def ingest_infos(
+    session,
+    infos: Iterable[VideoPathInfo],
+    root: Path,
+    ids: IdCache,
+    enqueue: bool = True,
+) -> dict:
+    infos = list(infos)
+    existing = segments_crud.existing_segment_paths(session, [i.relative_path for i in infos])
+    settings = get_settings()
+    new = []
+    for info in infos:
+        if info.relative_path in existing:
+            continue
+        existing.add(info.relative_path)
+        new.append(info)
+    # Only files not registered yet are read (three blocks each), in threads:
+    # on a NAS the reads dominate a bulk ingest.
+    fingerprints = fingerprints_for_files([root / i.relative_path for i in new], settings.ingest_hash_workers)
+    rows = []
+    for info, fingerprint in zip(new, fingerprints):
+        if fingerprint is None:
+            continue
+        store_id, camera_id = ids.resolve(session, info.store_code, info.camera_code)
+        rows.append(segments_crud.segment_values(store_id, camera_id, info, root, settings.timezone, fingerprint))
+
+    key = "fingerprint"
+    if settings.ingest_full_hash:
+        key = "content_sha256"
+        hashes = full_content_hashes([root / r["path"] for r in rows], settings.ingest_hash_workers)
+        for row, digest in zip(rows, hashes):
+            row["content_sha256"] = digest
+
+    first, repeats = _mark_duplicates(session, rows, key)
+    first_ids = segments_crud.insert_segments(session, first)
+    inserted = {row[key]: sid for row, sid in zip(first, first_ids) if row["status"] == "new" and row[key]}
+    for row in repeats:
+        row.update(status="duplicate", duplicate_of=inserted[row[key]])
+    segments_crud.insert_segments(session, repeats)
+
+    new_ids = [sid for row, sid in zip(first, first_ids) if row["status"] == "new"]
+    if enqueue:
+        jobs_crud.enqueue_jobs(session, "PROCESS_SEGMENT", [{"segment_id": sid} for sid in new_ids])
+    return {"created": len(new_ids), "duplicates": len(rows) - len(new_ids)}
+
+
+def register_paths(paths: Iterable[str], root: Path, ids: IdCache, enqueue: bool = True) -> dict:
+    infos = []
+    for path in paths:
+        try:
+            infos.append(parse_video_path(Path(path), root))
+        except PathParseError:
+            continue
+    if not infos:
+        return {"created": 0, "duplicates": 0}
+    with get_session() as session:
+        return ingest_infos(session, infos, root, ids, enqueue)
+
+
+def run_ingest(
+    root: Path,
+    store_cfg: dict | None = None,
+    ids: IdCache | None = None,
+    state: ScanState | None = None,
+    since: date | None = None,
+    workers: int = 8,
+    batch_size: int = 500,
+    enqueue: bool = True,
+    limit: int = 0,
+) -> dict:
+    # Partitions are marked in the scan state only after every file in them
+    # has been committed, so an interrupted ingest rescans them next time.
+    ids = ids or IdCache(store_cfg)
+    stats = {"partitions": 0, "skipped": 0, "scanned": 0, "created": 0, "duplicates": 0}
+    buffer: list[VideoPathInfo] = []
+    ready: list[Partition] = []
+
+    def flush() -> None:
+        if buffer:
+            with get_session() as session:
+                counts = ingest_infos(session, buffer, root, ids, enqueue)
+            stats["created"] += counts["created"]
+            stats["duplicates"] += counts["duplicates"]
+            buffer.clear()
+        if state is not None:
+            for partition in ready:
+                state.mark(partition)
+        ready.clear()
+
+    def selected():
+        for partition in iter_partitions(root, since):
+            if state is not None and not state.changed(partition):
+                stats["skipped"] += 1
+                continue
+            yield partition
+
+    for partition, infos in scan_partitions(root, selected(), workers=workers):
+        stats["partitions"] += 1
+        if limit and stats["scanned"] + len(infos) > limit:
+            buffer.extend(infos[: limit - stats["scanned"]])
+            stats["scanned"] = limit
+            break
+        buffer.extend(infos)
+        ready.append(partition)
+        stats["scanned"] += len(infos)
+        if len(buffer) >= batch_size:
+            flush()
+        if limit and stats["scanned"] >= limit:
+            break
+    flush()
+    return stats
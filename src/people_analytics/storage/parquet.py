@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable
+
+from people_analytics.core import jsonio
+from people_analytics.core.exceptions import ExportError
+from people_analytics.db.crud import kpis as kpis_crud
+from people_analytics.db.crud import segments as segments_crud
+
+try:
+    import pyarrow as pa  # type: ignore
+    import pyarrow.dataset as ds  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    pa = None
+    ds = None
+    pq = None
+
+# Layout mirrors the video tree: <root>/<table>/store=001/camera=entrance/
+# date=2025-12-31/10-00-00__10-05-00.parquet. One file per segment, so
+# exporting a segment again replaces its file instead of duplicating rows.
+# store/camera/date live only in the path (hive partitioning); read with
+# read_table() or duckdb read_parquet(..., hive_partitioning=true).
+# Bump SCHEMA_VERSION on any incompatible column change: a root written
+# with another version is refused instead of mixing schemas.
+SCHEMA_VERSION = 1
+PARTITION_KEYS = ("store", "camera", "date")
+
+
+def _fields() -> dict[str, list]:
+    ts = pa.timestamp("us", tz="UTC")
+    counts = [("in", pa.int32()), ("out", pa.int32()), ("staff_in", pa.int32()), ("staff_out", pa.int32())]
+    return {
+        "segments": [
+            ("segment_start", ts),
+            ("segment_end", ts),
+            *counts,
+            ("frames_read", pa.int32()),
+            ("duration_s", pa.float64()),
+            ("errors", pa.list_(pa.string())),
+        ],
+        "events": [
+            ("segment_start", ts),
+            ("ts", ts),
+            ("direction", pa.string()),
+            ("track_id", pa.string()),
+            ("confidence", pa.float64()),
+            ("is_staff", pa.bool_()),
+        ],
+        "presence_samples": [("segment_start", ts), ("ts", ts), ("count", pa.int32())],
+        "face_captures": [
+            ("segment_start", ts),
+            ("ts", ts),
+            ("track_id", pa.string()),
+            ("source", pa.string()),
+            ("face_score", pa.float64()),
+            ("face_bbox", pa.list_(pa.float64())),
+            ("path", pa.string()),
+            ("visitor_id", pa.int64()),
+        ],
+        "kpi_hourly": [("hour", pa.int32()), *counts, ("avg_presence", pa.int32()), ("max_presence", pa.int32())],
+        "kpi_shift": [("shift_id", pa.string()), *counts],
+        "kpi_daily": [*counts, ("max_presence", pa.int32())],
+        "kpi_weekly": [
+            ("iso_year", pa.int32()),
+            ("iso_week", pa.int32()),
+            ("days", pa.int32()),
+            *counts,
+            ("max_presence", pa.int32()),
+        ],
+        "kpi_monthly": [("days", pa.int32()), *counts, ("max_presence", pa.int32())],
+    }
+
+
+def table_schema(table: str):
+    meta = {"people_analytics.schema_version": str(SCHEMA_VERSION), "people_analytics.table": table}
+    return pa.schema(_fields()[table], metadata=meta)
+
+
+def _ts(value) -> datetime | None:
+    if value is None or isinstance(value, datetime):
+        return value
+    # str(datetime) in older outputs ("2025-12-31 10:01:13.375000-03:00") and ISO both parse
+    return datetime.fromisoformat(str(value))
+
+
+def _iter_jsonl(path: Path) -> Iterable[dict]:
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield jsonio.loads(line)
+
+
+class ParquetExporter:
+    def __init__(self, root: str | Path):
+        if pa is None:
+            raise ExportError("pyarrow-not-installed")
+        self.root = Path(root)
+        self._checked: set[str] = set()
+
+    def _check_schema(self, table: str) -> None:
+        if table in self._checked:
+            return
+        marker = self.root / table / "_schema.json"
+        schema = table_schema(table)
+        if marker.exists():
+            found = json.loads(marker.read_text(encoding="utf-8")).get("schema_version")
+            if found != SCHEMA_VERSION:
+                raise ExportError(f"schema-version-mismatch:{table}:{found}!={SCHEMA_VERSION}")
+        else:
+            marker.parent.mkdir(parents=True, exist_ok=True)
+            fields = {field.name: str(field.type) for field in schema}
+            marker.write_text(json.dumps({"schema_version": SCHEMA_VERSION, "fields": fields}, indent=2) + "\n")
+        self._checked.add(table)
+
+    def write(self, table: str, store: str, camera: str, day: str, name: str, rows: list[dict]) -> Path:
+        self._check_schema(table)
+        directory = self.root / table / f"store={store}" / f"camera={camera}" / f"date={day}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{name}.parquet"
+        tmp = path.with_name(f".{path.name}.tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=table_schema(table)), tmp, compression="zstd")
+        # readers never see a half-written file
+        os.replace(tmp, path)
+        return path
+
+    def export_segment(self, output: dict, spool: dict[str, Path] | None = None) -> list[Path]:
+        # `output` is one split-process/process JSON line (full or --compact) or
+        # PipelineResult.to_output; with `spool` the record lists are read from the JsonlSink files instead.
+        segment = output["segment"]
+        start, end = _ts(segment["start_time"]), _ts(segment["end_time"])
+        store, camera, day = segment["store_code"], segment["camera_code"], start.date().isoformat()
+        name = f"{start:%H-%M-%S}__{end:%H-%M-%S}"
+        meta = output.get("meta") or {}
+        counts = output.get("counts") or {}
+
+        def records(kind: str) -> Iterable[dict]:
+            if spool and kind in spool:
+                return _iter_jsonl(Path(spool[kind]))
+            return jsonio.iter_rows(output.get(kind))
+
+        tables = {
+            "segments": [
+                {
+                    "segment_start": start,
+                    "segment_end": end,
+                    **{key: counts.get(key, 0) for key in ("in", "out", "staff_in", "staff_out")},
+                    "frames_read": meta.get("frames_read"),
+                    "duration_s": meta.get("duration_s"),
+                    "errors": meta.get("errors") or [],
+                }
+            ],
+            "events": [
+                {
+                    "segment_start": start,
+                    "ts": _ts(e["ts"]),
+                    "direction": e.get("direction"),
+                    "track_id": e.get("track_id"),
+                    "confidence": e.get("confidence"),
+                    "is_staff": bool(e.get("is_staff", False)),
+                }
+                for e in records("events")
+            ],
+            "presence_samples": [
+                {"segment_start": start, "ts": _ts(s["ts"]), "count": s.get("count")} for s in records("presence_samples")
+            ],
+            "face_captures": [
+                {
+                    "segment_start": start,
+                    "ts": _ts(f["ts"]),
+                    "track_id": f.get("track_id"),
+                    "source": f.get("source"),
+                    "face_score": f.get("face_score"),
+                    "face_bbox": f.get("face_bbox"),
+                    "path": f.get("path"),
+                    "visitor_id": f.get("visitor_id"),
+                }
+                for f in records("face_captures")
+            ],
+        }
+        return [self.write(table, store, camera, day, name, rows) for table, rows in tables.items()]
+
+    def export_kpis(self, session, start: date, end: date, store_ids: list[int] | None = None) -> list[Path]:
+        # One file per (table, store, camera, day); camera=all holds the store-wide rows.
+        stores = {s.id: s.code for s in segments_crud.list_stores(session)}
+        store_ids = store_ids or list(stores)
+        cameras: dict[int, str] = {}
+        sources = {
+            "kpi_hourly": (kpis_crud.list_hourly_range(session, store_ids, None, start, end), "date"),
+            "kpi_shift": (kpis_crud.list_shift_range(session, store_ids, None, start, end), "date"),
+            "kpi_daily": (kpis_crud.list_rollup(session, "daily", store_ids, None, start, end), "date"),
+            "kpi_weekly": (kpis_crud.list_rollup(session, "weekly", store_ids, None, start, end), "week_start"),
+            "kpi_monthly": (kpis_crud.list_rollup(session, "monthly", store_ids, None, start, end), "month_start"),
+        }
+        written = []
+        for table, (rows, period_key) in sources.items():
+            groups: dict[tuple, list[dict]] = defaultdict(list)
+            for row in rows:
+                values = row.to_dict()
+                camera_id = values.pop("camera_id")
+                if camera_id is not None and camera_id not in cameras:
+                    camera = segments_crud.get_camera(session, camera_id)
+                    cameras[camera_id] = camera.camera_code if camera else str(camera_id)
+                camera = cameras.get(camera_id, "all")
+                key = (stores.get(values.pop("store_id")), camera, values.pop(period_key).isoformat())
+                groups[key].append(values)
+            for (store, camera, day), group in groups.items():
+                written.append(self.write(table, store, camera, day, "part", group))
+        return written
+
+
+def read_table(root: str | Path, table: str):
+    # Partition keys stay strings ("001" would otherwise be inferred as 1).
+    partitioning = ds.partitioning(pa.schema([(key, pa.string()) for key in PARTITION_KEYS]), flavor="hive")
+    # _schema.json and in-flight .tmp files are skipped by the default ignore_prefixes
+    return ds.dataset(Path(root) / table, format="parquet", partitioning=partitioning).to_table()
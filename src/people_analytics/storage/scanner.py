@@ -1,19 +1,133 @@
 from __future__ import annotations
 
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
 
 from people_analytics.storage.paths import VideoPathInfo, parse_video_path
 
+DEFAULT_EXTENSIONS = (".mp4", ".mkv", ".avi", ".dav")
 
-def scan_videos(root: Path, extensions: Sequence[str] | None = None) -> Iterable[VideoPathInfo]:
-    exts = {e.lower() for e in (extensions or [".mp4", ".mkv", ".avi", ".dav"])}
-    for path in root.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() not in exts:
-            continue
+
+@dataclass
+class Partition:
+    # One store=/camera=/date= directory; videos live directly inside it.
+    key: str
+    path: str
+    date: date
+    mtime_ns: int
+
+
+class ScanState:
+    # Directory mtime per partition from the last completed scan. Adding,
+    # removing or renaming a file bumps its directory's mtime, so unchanged
+    # partitions can be skipped without listing them.
+    def __init__(self, partitions: dict[str, int] | None = None):
+        self.partitions = partitions or {}
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ScanState":
         try:
-            yield parse_video_path(path, root)
-        except Exception:
-            continue
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls()
+        return cls({str(k): int(v) for k, v in (data.get("partitions") or {}).items()})
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text(json.dumps({"partitions": self.partitions}, sort_keys=True), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def changed(self, partition: Partition) -> bool:
+        return self.partitions.get(partition.key) != partition.mtime_ns
+
+    def mark(self, partition: Partition) -> None:
+        self.partitions[partition.key] = partition.mtime_ns
+
+
+def _subdirs(path: str, prefix: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return [e for e in it if e.name.startswith(prefix) and e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+
+def iter_partitions(root: Path, since: date | None = None) -> Iterator[Partition]:
+    # Walks only the three partition levels; the (much larger) file listing
+    # happens later, and only for partitions that need it.
+    for store in sorted(_subdirs(str(root), "store="), key=lambda e: e.name):
+        for camera in sorted(_subdirs(store.path, "camera="), key=lambda e: e.name):
+            for day in sorted(_subdirs(camera.path, "date="), key=lambda e: e.name):
+                try:
+                    day_value = date.fromisoformat(day.name[len("date=") :])
+                except ValueError:
+                    continue
+                if since is not None and day_value < since:
+                    continue
+                try:
+                    mtime_ns = day.stat(follow_symlinks=False).st_mtime_ns
+                except OSError:
+                    continue
+                yield Partition(
+                    key=f"{store.name}/{camera.name}/{day.name}",
+                    path=day.path,
+                    date=day_value,
+                    mtime_ns=mtime_ns,
+                )
+
+
+def scan_partition(root: Path, partition: Partition, extensions: Sequence[str] | None = None) -> list[VideoPathInfo]:
+    exts = {e.lower() for e in (extensions or DEFAULT_EXTENSIONS)}
+    infos = []
+    try:
+        with os.scandir(partition.path) as it:
+            entries = sorted((e for e in it if os.path.splitext(e.name)[1].lower() in exts), key=lambda e: e.name)
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                try:
+                    infos.append(parse_video_path(Path(entry.path), root))
+                except Exception:
+                    continue
+    except OSError:
+        return []
+    return infos
+
+
+def scan_partitions(
+    root: Path,
+    partitions: Iterable[Partition],
+    extensions: Sequence[str] | None = None,
+    workers: int = 8,
+) -> Iterator[tuple[Partition, list[VideoPathInfo]]]:
+    # Directory listing is I/O bound (NAS/SMB shares especially), so partitions
+    # are listed concurrently. Only a bounded window is in flight so a slow
+    # consumer (DB inserts) does not buffer the whole archive; results keep
+    # partition order.
+    if workers <= 1:
+        for partition in partitions:
+            yield partition, scan_partition(root, partition, extensions)
+        return
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for partition in partitions:
+            pending.append((partition, pool.submit(scan_partition, root, partition, extensions)))
+            if len(pending) >= workers * 4:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+
+
+def scan_videos(root: Path, extensions: Sequence[str] | None = None, workers: int = 1) -> Iterable[VideoPathInfo]:
+    for _, infos in scan_partitions(root, iter_partitions(root), extensions, workers):
+        yield from infos
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Sequence
+
+from people_analytics.storage.paths import PATH_RE
+from people_analytics.storage.scanner import DEFAULT_EXTENSIONS, ScanState, iter_partitions, scan_partition
+
+try:
+    from watchdog.events import FileSystemEventHandler  # type: ignore
+    from watchdog.observers import Observer  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    FileSystemEventHandler = object
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+
+class StableFileTracker:
+    # A DVR/NAS writer may keep appending to a segment for a while; a file is
+    # handed over once it was closed for writing or its size/mtime stopped
+    # changing for settle_s seconds. Files seen again later (touch, rescan)
+    # are handed over again; the consumer dedupes by path.
+    def __init__(self, settle_s: float = 10.0):
+        self.settle_s = settle_s
+        self._pending: dict[str, tuple[int, int, float, bool]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, path: str, closed: bool = False, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            size, mtime_ns, last_change, was_closed = self._pending.get(path, (-1, -1, now, False))
+            self._pending[path] = (size, mtime_ns, last_change, was_closed or closed)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def ready(self, now: float | None = None) -> list[str]:
+        now = time.monotonic() if now is None else now
+        ready = []
+        with self._lock:
+            for path, (size, mtime_ns, last_change, closed) in list(self._pending.items()):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    del self._pending[path]
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    self._pending[path] = (stat.st_size, stat.st_mtime_ns, now, closed)
+                    if not closed:
+                        continue
+                elif not closed and now - last_change < self.settle_s:
+                    continue
+                if stat.st_size == 0:
+                    continue
+                del self._pending[path]
+                ready.append(path)
+        return sorted(ready)
+
+
+class _VideoEventHandler(FileSystemEventHandler):
+    def __init__(self, tracker: StableFileTracker, accept: Callable[[str], bool]):
+        self.tracker = tracker
+        self.accept = accept
+
+    def on_created(self, event) -> None:
+        if not event.is_directory and self.accept(event.src_path):
+            self.tracker.observe(event.src_path)
+
+    def on_modified(self, event) -> None:
+        self.on_created(event)
+
+    def on_moved(self, event) -> None:
+        if not event.is_directory and self.accept(event.dest_path):
+            self.tracker.observe(event.dest_path, closed=True)
+
+    def on_closed(self, event) -> None:
+        if not event.is_directory and self.accept(event.src_path):
+            self.tracker.observe(event.src_path, closed=True)
+
+
+class VideoWatcher:
+    # Native notifications (inotify via watchdog) when available, otherwise
+    # periodic polling of recently changed date= partitions. Polling also
+    # runs (less often) alongside inotify to catch events lost on network
+    # mounts, where inotify does not see remote writes.
+    def __init__(
+        self,
+        root: Path,
+        on_ready: Callable[[list[str]], None],
+        settle_s: float = 10.0,
+        poll_s: float = 30.0,
+        backend: str = "auto",
+        lookback_days: int = 1,
+        extensions: Sequence[str] | None = None,
+    ):
+        self.root = Path(root)
+        self.on_ready = on_ready
+        self.poll_s = poll_s
+        self.lookback_days = lookback_days
+        self.extensions = {e.lower() for e in (extensions or DEFAULT_EXTENSIONS)}
+        self.tracker = StableFileTracker(settle_s)
+        self.state = ScanState()
+        self.native = backend == "native" or (backend == "auto" and Observer is not None)
+        if self.native and Observer is None:
+            raise RuntimeError("watchdog is not installed; use backend=poll")
+        self._observer = None
+
+    def accept(self, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in self.extensions and PATH_RE.search(path) is not None
+
+    def poll(self) -> None:
+        since = date.today() - timedelta(days=self.lookback_days)
+        for partition in iter_partitions(self.root, since):
+            if not self.state.changed(partition):
+                continue
+            for info in scan_partition(self.root, partition, tuple(self.extensions)):
+                self.tracker.observe(str(self.root / info.relative_path))
+            self.state.mark(partition)
+
+    def start(self) -> None:
+        if self.native:
+            self._observer = Observer()
+            self._observer.schedule(_VideoEventHandler(self.tracker, self.accept), str(self.root), recursive=True)
+            self._observer.start()
+            logger.info("Watching %s with native notifications", self.root)
+        else:
+            logger.info("Watching %s by polling every %ss", self.root, self.poll_s)
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def run(self, stop: threading.Event | None = None, tick_s: float = 1.0) -> None:
+        stop = stop or threading.Event()
+        poll_every = self.poll_s * (10 if self.native else 1)
+        next_poll = 0.0
+        self.start()
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if now >= next_poll:
+                    self.poll()
+                    next_poll = now + poll_every
+                ready = self.tracker.ready()
+                if ready:
+                    try:
+                        self.on_ready(ready)
+                    except Exception:
+                        logger.exception("Failed to register %d files; retrying", len(ready))
+                        for path in ready:
+                            self.tracker.observe(path, closed=True)
+                stop.wait(tick_s)
+        finally:
+            self.stop()
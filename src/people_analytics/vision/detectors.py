@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from people_analytics.core.exceptions import DetectorUnavailable
+
+try:
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+try:
+    from ultralytics import YOLO  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    YOLO = None
+
+try:
+    import onnxruntime as ort  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ort = None
+
+# Detectors return the same dicts the stages already pass around:
+# {"bbox": [x1, y1, x2, y2], "confidence": float, "class_id": int}, in the
+# pixel space of the frame they were given.
+
+BACKENDS = ("ultralytics", "onnx", "openvino")
+PRECISIONS = ("fp32", "int8")
+
+
+def letterbox(image, size: tuple[int, int], color: int = 114):
+    # Resize keeping aspect ratio and pad to size=(w, h), like Ultralytics does
+    # for exported models. Returns the padded image, the scale and the padding.
+    h, w = image.shape[:2]
+    target_w, target_h = size
+    ratio = min(target_w / w, target_h / h)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    pad_x = (target_w - new_w) / 2
+    pad_y = (target_h - new_h) / 2
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    if top or bottom or left or right:
+        image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(color, color, color))
+    return image, ratio, (left, top)
+
+
+def nms(boxes, scores, iou_threshold: float):
+    # Greedy NMS over xyxy boxes; returns kept indices by descending score.
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def input_size_for(width: float, height: float, stride: int = 32, max_size: int = 640) -> tuple[int, int]:
+    # Smallest stride multiple covering the region, shrunk to max_size on the
+    # long side: a 300x180 ROI runs at 320x192 instead of 640x640.
+    scale = min(1.0, max_size / max(width, height, 1))
+    w = max(stride, int(-(-width * scale // stride)) * stride)
+    h = max(stride, int(-(-height * scale // stride)) * stride)
+    return w, h
+
+
+def tile_boxes(
+    x1: float, y1: float, x2: float, y2: float, cols: int = 1, rows: int = 1, overlap: float = 0.2
+) -> list[tuple[float, float, float, float]]:
+    # Split a region into cols x rows tiles overlapping by `overlap` of a tile,
+    # so people standing on a seam are whole in at least one tile.
+    cols, rows = max(1, cols), max(1, rows)
+    tile_w = (x2 - x1) / (cols - (cols - 1) * overlap)
+    tile_h = (y2 - y1) / (rows - (rows - 1) * overlap)
+    tiles = []
+    for r in range(rows):
+        for c in range(cols):
+            tx = x1 + c * tile_w * (1 - overlap)
+            ty = y1 + r * tile_h * (1 - overlap)
+            tiles.append((tx, ty, min(x2, tx + tile_w), min(y2, ty + tile_h)))
+    return tiles
+
+
+def merge_detections(detections: list[dict], iou: float) -> list[dict]:
+    # Per-class NMS over detections gathered from overlapping tiles.
+    if len(detections) < 2:
+        return detections
+    boxes = np.asarray([d["bbox"] for d in detections], dtype=np.float32)
+    scores = np.asarray([d["confidence"] for d in detections], dtype=np.float32)
+    offsets = np.asarray([d["class_id"] for d in detections], dtype=np.float32)[:, None] * 7680
+    return [detections[i] for i in nms(boxes + offsets, scores, iou)]
+
+
+def decode_yolo(
+    output,
+    conf: float,
+    iou: float,
+    classes: list[int] | None,
+    ratio: float,
+    pad: tuple[int, int],
+    frame_shape: tuple[int, ...],
+    num_classes: int | None = None,
+    max_det: int = 300,
+) -> list[dict]:
+    # YOLOv8 export layout: (1, 4 + nc [+ extras], anchors) with cx, cy, w, h
+    # in input pixels. Face models append keypoints after the class scores,
+    # hence num_classes.
+    pred = np.asarray(output)[0]
+    if pred.shape[0] > pred.shape[1]:
+        pred = pred.T
+    nc = num_classes or pred.shape[0] - 4
+    scores_all = pred[4 : 4 + nc]
+    class_ids = scores_all.argmax(axis=0)
+    scores = scores_all[class_ids, np.arange(scores_all.shape[1])]
+    mask = scores >= conf
+    if classes is not None:
+        mask &= np.isin(class_ids, classes)
+    if not mask.any():
+        return []
+    boxes = pred[:4, mask].T
+    scores = scores[mask]
+    class_ids = class_ids[mask]
+
+    xyxy = np.empty_like(boxes)
+    xyxy[:, 0] = boxes[:, 0] - boxes[:, 2] / 2
+    xyxy[:, 1] = boxes[:, 1] - boxes[:, 3] / 2
+    xyxy[:, 2] = boxes[:, 0] + boxes[:, 2] / 2
+    xyxy[:, 3] = boxes[:, 1] + boxes[:, 3] / 2
+    # per-class NMS in one call: shift each class to its own region
+    offsets = class_ids[:, None].astype(xyxy.dtype) * 7680
+    keep = nms(xyxy + offsets, scores, iou)[:max_det]
+
+    xyxy = xyxy[keep]
+    xyxy[:, [0, 2]] = (xyxy[:, [0, 2]] - pad[0]) / ratio
+    xyxy[:, [1, 3]] = (xyxy[:, [1, 3]] - pad[1]) / ratio
+    xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, frame_shape[1])
+    xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, frame_shape[0])
+    return [
+        {"bbox": [float(v) for v in box], "confidence": float(score), "class_id": int(cls)}
+        for box, score, cls in zip(xyxy, scores[keep], class_ids[keep])
+    ]
+
+
+class UltralyticsDetector:
+    def __init__(self, model_path: str, threads: int = 0):
+        if YOLO is None:
+            raise DetectorUnavailable("ultralytics-not-installed")
+        if threads > 0:
+            try:
+                import torch  # type: ignore
+
+                torch.set_num_threads(threads)
+            except Exception:  # pragma: no cover - torch comes with ultralytics
+                pass
+        self.model = YOLO(model_path)
+
+    def detect(
+        self,
+        frame,
+        conf: float,
+        iou: float,
+        classes: list[int] | None = None,
+        imgsz: tuple[int, int] | None = None,
+    ) -> list[dict]:
+        kwargs = {"imgsz": [imgsz[1], imgsz[0]]} if imgsz else {}
+        results = self.model.predict(frame, conf=conf, iou=iou, classes=classes, verbose=False, **kwargs)
+        if not results:
+            return []
+        boxes = results[0].boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+        xyxy = boxes.xyxy.cpu().numpy()
+        scores = boxes.conf.cpu().numpy()
+        cls = boxes.cls.cpu().numpy().astype(int)
+        return [
+            {"bbox": [float(v) for v in xyxy[i]], "confidence": float(scores[i]), "class_id": int(cls[i])}
+            for i in range(len(xyxy))
+        ]
+
+
+class OnnxDetector:
+    # Exported YOLOv8 (`export-onnx` CLI command) on ONNX Runtime, with
+    # letterbox and NMS done here in NumPy: no PyTorch in the worker process.
+    # backend="openvino" uses the OpenVINO execution provider when the
+    # onnxruntime-openvino build is installed, falling back to the CPU one.
+    def __init__(
+        self,
+        model_path: str,
+        imgsz: int = 640,
+        threads: int = 0,
+        inter_op_threads: int = 1,
+        backend: str = "onnx",
+        num_classes: int | None = None,
+    ):
+        if ort is None:
+            raise DetectorUnavailable("onnxruntime-not-installed")
+        if np is None or cv2 is None:
+            raise DetectorUnavailable("opencv-not-installed")
+        if not Path(model_path).exists():
+            raise DetectorUnavailable(f"onnx-model-missing:{model_path}")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        if inter_op_threads > 0:
+            options.inter_op_num_threads = inter_op_threads
+        providers = ["CPUExecutionProvider"]
+        if backend == "openvino" and "OpenVINOExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "OpenVINOExecutionProvider")
+        self.session = ort.InferenceSession(str(model_path), sess_options=options, providers=providers)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.fp16 = "float16" in model_input.type
+        # static exports fix the input size; dynamic ones use imgsz
+        h, w = model_input.shape[2:4]
+        self.input_size = (w if isinstance(w, int) else imgsz, h if isinstance(h, int) else imgsz)
+        # dynamic exports (`export-onnx --dynamic`) accept per-call sizes
+        self.dynamic = not (isinstance(w, int) and isinstance(h, int))
+        self.num_classes = num_classes
+
+    def preprocess(self, frame, size: tuple[int, int] | None = None):
+        image, ratio, pad = letterbox(frame, size if size and self.dynamic else self.input_size)
+        blob = cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True)
+        if self.fp16:
+            blob = blob.astype(np.float16)
+        return blob, ratio, pad
+
+    def detect(
+        self,
+        frame,
+        conf: float,
+        iou: float,
+        classes: list[int] | None = None,
+        imgsz: tuple[int, int] | None = None,
+    ) -> list[dict]:
+        blob, ratio, pad = self.preprocess(frame, imgsz)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return decode_yolo(
+            output.astype(np.float32, copy=False),
+            conf,
+            iou,
+            classes,
+            ratio,
+            pad,
+            frame.shape,
+            num_classes=self.num_classes,
+        )
+
+
+def onnx_model_path(cfg: dict, default: str, precision: str = "fp32") -> str:
+    # `onnx_model` wins; otherwise the .pt path with an .onnx suffix, which is
+    # where `export-onnx` writes it. INT8 models sit next to it as .int8.onnx
+    # (`quantize-onnx`) unless `onnx_model_int8` says otherwise.
+    path = Path(cfg["onnx_model"]) if cfg.get("onnx_model") else Path(default).with_suffix(".onnx")
+    if precision == "int8":
+        if cfg.get("onnx_model_int8"):
+            return str(cfg["onnx_model_int8"])
+        return str(path.with_suffix(".int8.onnx"))
+    return str(path)
+
+
+def create_detector(
+    backend: str,
+    model_path: str,
+    imgsz: int = 640,
+    threads: int = 0,
+    inter_op_threads: int = 1,
+    num_classes: int | None = None,
+    precision: str = "fp32",
+):
+    if precision not in PRECISIONS:
+        raise DetectorUnavailable(f"unknown-precision:{precision}")
+    if backend == "ultralytics":
+        if precision != "fp32":
+            raise DetectorUnavailable("int8-requires-onnx-backend")
+        return UltralyticsDetector(model_path, threads=threads)
+    if backend in ("onnx", "openvino"):
+        return OnnxDetector(
+            model_path,
+            imgsz=imgsz,
+            threads=threads,
+            inter_op_threads=inter_op_threads,
+            backend=backend,
+            num_classes=num_classes,
+        )
+    raise DetectorUnavailable(f"unknown-detector-backend:{backend}")
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+# Agreement between two detectors on the same frames (e.g. FP32 vs INT8):
+# the reference detections play the role of ground truth.
+
+
+def box_iou(a: list[float], b: list[float]) -> float:
+    ix1, iy1 = max(a[0], b[0]), max(a[1], b[1])
+    ix2, iy2 = min(a[2], b[2]), min(a[3], b[3])
+    if ix2 <= ix1 or iy2 <= iy1:
+        return 0.0
+    inter = (ix2 - ix1) * (iy2 - iy1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def match_boxes(reference: list[list[float]], candidate: list[list[float]], iou: float = 0.5) -> list[float]:
+    # Greedy one-to-one matching by best IoU; returns the IoU of each match.
+    pairs = sorted(
+        ((box_iou(r, c), i, j) for i, r in enumerate(reference) for j, c in enumerate(candidate)),
+        reverse=True,
+    )
+    used_r: set[int] = set()
+    used_c: set[int] = set()
+    matches = []
+    for value, i, j in pairs:
+        if value < iou:
+            break
+        if i in used_r or j in used_c:
+            continue
+        used_r.add(i)
+        used_c.add(j)
+        matches.append(value)
+    return matches
+
+
+class DetectionAgreement:
+    def __init__(self, iou: float = 0.5):
+        self.iou = iou
+        self.frames = 0
+        self.identical_frames = 0
+        self.reference = 0
+        self.candidate = 0
+        self.matched = 0
+        self.iou_sum = 0.0
+
+    def add(self, reference: list[list[float]], candidate: list[list[float]]) -> None:
+        matches = match_boxes(reference, candidate, self.iou)
+        self.frames += 1
+        self.reference += len(reference)
+        self.candidate += len(candidate)
+        self.matched += len(matches)
+        self.iou_sum += sum(matches)
+        if len(matches) == len(reference) == len(candidate):
+            self.identical_frames += 1
+
+    def to_dict(self) -> dict:
+        precision = self.matched / self.candidate if self.candidate else 1.0
+        recall = self.matched / self.reference if self.reference else 1.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return {
+            "frames": self.frames,
+            "frame_agreement": round(self.identical_frames / self.frames, 4) if self.frames else None,
+            "reference_boxes": self.reference,
+            "candidate_boxes": self.candidate,
+            "precision": round(precision, 4),
+            "recall": round(recall, 4),
+            "f1": round(f1, 4),
+            "mean_iou": round(self.iou_sum / self.matched, 4) if self.matched else None,
+        }
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import queue
+from multiprocessing import resource_tracker
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from people_analytics.storage.paths import VideoPathInfo
+from people_analytics.vision.pipeline import PipelineResult
+from people_analytics.vision.profiling import PipelineProfile, summarize_timings
+from people_analytics.vision.shm_ring import FrameRing
+from people_analytics.vision.sinks import ResultSink
+from people_analytics.vision.stages.detect_people import DetectPeopleStage
+from people_analytics.vision.video_reader import build_reader
+
+logger = logging.getLogger(__name__)
+
+# Frame-level parallelism inside one segment: a decoder process writes frames
+# into a shared memory ring, N detector processes read them in place, and the
+# main process puts detections back in frame order before tracking and the
+# remaining stages (which are stateful and stay sequential).
+
+
+def _decode_worker(camera_cfg, target_fps, path, max_seconds, slots, free, tasks, results) -> None:
+    ring = None
+    seq = 0
+    error = None
+    try:
+        reader = build_reader(camera_cfg, target_fps)
+        for frame, ts in reader.iter_frames(Path(path)):
+            if max_seconds is not None and ts > max_seconds:
+                break
+            if ring is None:
+                ring = FrameRing(slots, frame.shape)
+                results.put(("ring", ring.spec))
+            slot = free.get()
+            ring.write(slot, frame)
+            tasks.put((ring.spec, seq, slot, ts))
+            seq += 1
+    except Exception as exc:
+        error = str(exc)
+    finally:
+        # the main process unlinks the block once every slot is consumed
+        if ring is not None:
+            ring.close()
+        results.put(("eof", seq, error))
+
+
+def _detect_worker(detector_factory, camera_cfg, tasks, results) -> None:
+    stage = detector_factory(camera_cfg)
+    ring = None
+    context: dict = {}
+    perf = time.perf_counter
+    cpu = time.process_time
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        spec, seq, slot, ts = task
+        errors: list[str] = []
+        if ring is None or ring.spec != spec:
+            # new segment: reattach and rerun setup (the model stays loaded)
+            context = {"result": PipelineResult()}
+            if ring is not None:
+                ring.close()
+            ring = FrameRing.attach(spec)
+            stage.setup(context)
+            errors = context["result"].errors
+        context["frame"] = ring.view(slot)
+        context["ts"] = ts
+        try:
+            w, c = perf(), cpu()
+            stage.on_frame(context)
+            results.put(("det", seq, slot, ts, context["detections"], perf() - w, cpu() - c, errors))
+        except Exception as exc:
+            results.put(("error", seq, slot, str(exc)))
+        context["frame"] = None
+    if ring is not None:
+        ring.close()
+
+
+class ParallelPipeline:
+    # Same run() contract as Pipeline. `stages` are the stages after detection;
+    # detector_factory(camera_cfg) builds the detection stage inside each
+    # worker and must be importable (picklable) for that reason. Workers
+    # outlive a run so models load once per process; call close() when done.
+    def __init__(
+        self,
+        camera_cfg: dict,
+        stages: list,
+        target_fps: int | None = None,
+        workers: int = 2,
+        slots: int | None = None,
+        detector_factory=DetectPeopleStage,
+    ):
+        self.camera_cfg = camera_cfg
+        self.stages = stages
+        self.target_fps = target_fps
+        self.workers = max(1, int(workers))
+        # enough slots for every worker to hold one frame while the next ones queue
+        self.slots = int(slots or self.workers * 2 + 2)
+        self.detector_factory = detector_factory
+        self._ctx = mp.get_context()
+        self._procs: list = []
+        self._tasks = None
+        self._results = None
+
+    def _start_workers(self) -> None:
+        if self._procs:
+            return
+        # one tracker shared by every child: blocks created by the decoder and
+        # unlinked here are not reported as leaked by per-process trackers
+        resource_tracker.ensure_running()
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        for _ in range(self.workers):
+            proc = self._ctx.Process(
+                target=_detect_worker,
+                args=(self.detector_factory, self.camera_cfg, self._tasks, self._results),
+                daemon=True,
+            )
+            proc.start()
+            self._procs.append(proc)
+
+    def close(self) -> None:
+        if not self._procs:
+            return
+        for _ in self._procs:
+            self._tasks.put(None)
+        for proc in self._procs:
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join()
+        self._procs = []
+
+    def _kill(self) -> None:
+        # after a failure the queues may hold stale frames: start over next run
+        for proc in self._procs:
+            proc.terminate()
+            proc.join()
+        self._procs = []
+
+    def _next_message(self, decoder) -> tuple:
+        while True:
+            try:
+                return self._results.get(timeout=1.0)
+            except queue.Empty:
+                if any(not proc.is_alive() for proc in self._procs):
+                    raise RuntimeError("detect-worker-died")
+                if not decoder.is_alive() and decoder.exitcode:
+                    raise RuntimeError(f"decoder-died:{decoder.exitcode}")
+
+    def run(
+        self,
+        path: Path,
+        base_ts: datetime | None = None,
+        max_seconds: float | None = None,
+        segment_info: VideoPathInfo | None = None,
+        sink: ResultSink | None = None,
+        keep_records: bool = True,
+    ) -> PipelineResult:
+        result = PipelineResult(sink=sink, keep_records=keep_records)
+        context = {
+            "result": result,
+            "now": datetime.now(timezone.utc),
+            "base_ts": base_ts,
+            "segment_info": segment_info,
+            "video_path": path,
+        }
+        detect_name = self.detector_factory.__name__
+        names = [type(stage).__name__ for stage in self.stages]
+        profile = PipelineProfile([detect_name, *names])
+        perf = time.perf_counter
+        cpu = time.process_time
+        run_wall = perf()
+        run_cpu = cpu()
+
+        self._start_workers()
+        free = self._ctx.Queue()
+        for slot in range(self.slots):
+            free.put(slot)
+        decoder = self._ctx.Process(
+            target=_decode_worker,
+            args=(
+                self.camera_cfg,
+                self.target_fps,
+                str(path),
+                max_seconds,
+                self.slots,
+                free,
+                self._tasks,
+                self._results,
+            ),
+            daemon=True,
+        )
+        decoder.start()
+
+        for name, stage in zip(names, self.stages):
+            w, c = perf(), cpu()
+            stage.setup(context)
+            profile.setup[name].add(perf() - w, cpu() - c)
+
+        timers = [(stage, profile.frame[name]) for name, stage in zip(names, self.stages)]
+        ring = None
+        pending: dict[int, tuple] = {}
+        next_seq = 0
+        total = None
+        last_ts = None
+        try:
+            while total is None or next_seq < total:
+                # "decode" here is the time spent waiting for the next detected frame
+                w, c = perf(), cpu()
+                message = self._next_message(decoder)
+                profile.decode.add(perf() - w, cpu() - c)
+                kind = message[0]
+                if kind == "ring":
+                    ring = FrameRing.attach(message[1])
+                elif kind == "eof":
+                    total = message[1]
+                    if message[2]:
+                        result.errors.append(message[2])
+                elif kind == "error":
+                    raise RuntimeError(message[3])
+                else:
+                    _kind, seq, slot, ts, detections, wall_s, cpu_s, errors = message
+                    for error in errors:
+                        if error not in result.errors:
+                            result.errors.append(error)
+                    profile.frame[detect_name].add(wall_s, cpu_s)
+                    pending[seq] = (slot, ts, detections)
+                # the ring notice and detections come from different processes,
+                # so detections may arrive before the ring is attached
+                while ring is not None and next_seq in pending:
+                    slot, ts, detections = pending.pop(next_seq)
+                    context["frame"] = ring.view(slot)
+                    context["ts"] = ts
+                    context["detections"] = detections
+                    last_ts = ts
+                    for stage, timer in timers:
+                        w, c = perf(), cpu()
+                        stage.on_frame(context)
+                        timer.add(perf() - w, cpu() - c)
+                    result.flush()
+                    result.frames_read += 1
+                    context["frame"] = None
+                    free.put(slot)
+                    next_seq += 1
+        except Exception as exc:
+            result.errors.append(str(exc))
+            self._kill()
+            # the decoder may be blocked waiting for a free slot
+            decoder.terminate()
+        finally:
+            context["frame"] = None
+            decoder.join(timeout=5)
+            if decoder.is_alive():
+                decoder.terminate()
+                decoder.join()
+            if ring is not None:
+                ring.close()
+                ring.unlink()
+
+        for name, stage in zip(names, self.stages):
+            w, c = perf(), cpu()
+            stage.on_finish(context)
+            profile.finish[name].add(perf() - w, cpu() - c)
+        result.flush()
+
+        if last_ts is not None:
+            result.duration_s = last_ts
+
+        profile.wall_s = perf() - run_wall
+        profile.cpu_s = cpu() - run_cpu
+        result.timings = profile.to_dict(result.frames_read, result.duration_s)
+        result.timings["detect_workers"] = self.workers
+        logger.info("Pipeline %s: %d frames %s", path, result.frames_read, summarize_timings(result.timings))
+        return result
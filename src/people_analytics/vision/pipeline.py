@@ -1,17 +1,43 @@
 from __future__ import annotations
 
+import logging
+import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from people_analytics.storage.paths import VideoPathInfo
-from people_analytics.vision.video_reader import VideoReader
+from people_analytics.vision.profiling import PipelineProfile, summarize_timings
+from people_analytics.vision.sinks import RECORD_KINDS, ResultSink
+from people_analytics.vision.video_reader import VideoReader, build_reader
 from people_analytics.vision.stages.detect_people import DetectPeopleStage
 from people_analytics.vision.stages.track_people import TrackPeopleStage
 from people_analytics.vision.stages.count_line import CountLineStage
+from people_analytics.vision.stages.presence_sampling import PresenceSamplingStage
+from people_analytics.vision.stages.record_tracks import RecordTracksStage
 from people_analytics.vision.stages.extract_faces import ExtractFacesStage
+from people_analytics.vision.stages.reid_embeddings import ReIdEmbeddingsStage
 from people_analytics.vision.stages.staff_exclusion import StaffExclusionStage
 
+if TYPE_CHECKING:
+    from people_analytics.vision.parallel import ParallelPipeline
+
+logger = logging.getLogger(__name__)
+
+
+def _count_event(counts: dict, event: dict) -> None:
+    direction = event.get("direction")
+    is_staff = event.get("is_staff", False)
+    if direction == "IN":
+        counts["in"] += 1
+        if is_staff:
+            counts["staff_in"] += 1
+    elif direction == "OUT":
+        counts["out"] += 1
+        if is_staff:
+            counts["staff_out"] += 1
+
 
 @dataclass
 class PipelineResult:
@@ -21,20 +47,49 @@ class PipelineResult:
     frames_read: int = 0
     duration_s: float | None = None
     errors: list[str] = field(default_factory=list)
+    timings: dict = field(default_factory=dict)
+    # (face record, embedding) pairs from ReIdEmbeddingsStage. Kept beside the
+    # records so vectors never reach the JSON output, spools or result cache.
+    embeddings: list = field(default_factory=list, repr=False)
+    # Records go to `sink` once per frame, after every stage saw them (ReId
+    # and staff flags land in the same frame). keep_records=False leaves the
+    # lists empty so memory stays flat on long segments; counts and totals
+    # are kept running either way.
+    sink: ResultSink | None = field(default=None, repr=False)
+    keep_records: bool = True
+    totals: dict = field(default_factory=lambda: {kind: 0 for kind in RECORD_KINDS})
+    _counts: dict = field(default_factory=lambda: {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}, repr=False)
+    _pending: list = field(default_factory=list, repr=False)
+
+    def _add(self, kind: str, record: dict) -> None:
+        if self.keep_records:
+            getattr(self, kind).append(record)
+        self._pending.append((kind, record))
+
+    def add_event(self, event: dict) -> None:
+        self._add("events", event)
+
+    def add_presence_sample(self, sample: dict) -> None:
+        self._add("presence_samples", sample)
+
+    def add_face_capture(self, face: dict) -> None:
+        self._add("face_captures", face)
+
+    def flush(self) -> None:
+        for kind, record in self._pending:
+            self.totals[kind] += 1
+            if kind == "events":
+                _count_event(self._counts, record)
+            if self.sink is not None:
+                self.sink.write(kind, record)
+        self._pending.clear()
 
     def summarize_counts(self) -> dict:
+        if not self.keep_records:
+            return dict(self._counts)
         counts = {"in": 0, "out": 0, "staff_in": 0, "staff_out": 0}
         for event in self.events:
-            direction = event.get("direction")
-            is_staff = event.get("is_staff", False)
-            if direction == "IN":
-                counts["in"] += 1
-                if is_staff:
-                    counts["staff_in"] += 1
-            elif direction == "OUT":
-                counts["out"] += 1
-                if is_staff:
-                    counts["staff_out"] += 1
+            _count_event(counts, event)
         return counts
 
     def to_output(self, info: VideoPathInfo, tz_name: str | None = None) -> dict:
@@ -60,14 +115,19 @@ class PipelineResult:
                 "frames_read": self.frames_read,
                 "duration_s": self.duration_s,
                 "errors": self.errors,
+                "timings": self.timings,
             },
         }
 
 
 class Pipeline:
-    def __init__(self, stages: list, target_fps: int | None = None):
+    def __init__(self, stages: list, target_fps: int | None = None, reader=None):
         self.stages = stages
-        self.reader = VideoReader(target_fps=target_fps)
+        self.reader = reader or VideoReader(target_fps=target_fps)
+
+    def close(self) -> None:
+        # nothing to release; ParallelPipeline stops its workers here
+        pass
 
     def run(
         self,
@@ -75,8 +135,10 @@ class Pipeline:
         base_ts: datetime | None = None,
         max_seconds: float | None = None,
         segment_info: VideoPathInfo | None = None,
+        sink: ResultSink | None = None,
+        keep_records: bool = True,
     ) -> PipelineResult:
-        result = PipelineResult()
+        result = PipelineResult(sink=sink, keep_records=keep_records)
         context = {
             "result": result,
             "now": datetime.now(timezone.utc),
@@ -85,33 +147,61 @@ class Pipeline:
             "video_path": path,
         }
         last_ts = None
-
-        for stage in self.stages:
+        names = [type(stage).__name__ for stage in self.stages]
+        profile = PipelineProfile(names)
+        perf = time.perf_counter
+        cpu = time.process_time
+        run_wall = perf()
+        run_cpu = cpu()
+
+        for name, stage in zip(names, self.stages):
+            w, c = perf(), cpu()
             stage.setup(context)
+            profile.setup[name].add(perf() - w, cpu() - c)
 
+        timers = [(stage, profile.frame[name]) for name, stage in zip(names, self.stages)]
         try:
-            for frame, ts in self.reader.iter_frames(path):
+            frames = iter(self.reader.iter_frames(path))
+            while True:
+                w, c = perf(), cpu()
+                item = next(frames, None)
+                profile.decode.add(perf() - w, cpu() - c)
+                if item is None:
+                    break
+                frame, ts = item
                 if max_seconds is not None and ts > max_seconds:
                     break
                 context["frame"] = frame
                 context["ts"] = ts
                 last_ts = ts
-                for stage in self.stages:
+                for stage, timer in timers:
+                    w, c = perf(), cpu()
                     stage.on_frame(context)
+                    timer.add(perf() - w, cpu() - c)
+                result.flush()
                 result.frames_read += 1
         except Exception as exc:
             result.errors.append(str(exc))
 
-        for stage in self.stages:
+        for name, stage in zip(names, self.stages):
+            w, c = perf(), cpu()
             stage.on_finish(context)
+            profile.finish[name].add(perf() - w, cpu() - c)
+        result.flush()
 
         if last_ts is not None:
             result.duration_s = last_ts
 
+        profile.wall_s = perf() - run_wall
+        profile.cpu_s = cpu() - run_cpu
+        result.timings = profile.to_dict(result.frames_read, result.duration_s)
+        logger.info("Pipeline %s: %d frames %s", path, result.frames_read, summarize_timings(result.timings))
         return result
 
 
-def build_pipeline(camera_cfg: dict, faces_root: str | None = None) -> Pipeline:
+def build_pipeline(
+    camera_cfg: dict, faces_root: str | None = None, detect_workers: int = 0, tracks_root: str | None = None
+) -> Pipeline | ParallelPipeline:
     target_fps = None
     if camera_cfg.get("processing"):
         target_fps = camera_cfg["processing"].get("target_fps")
@@ -120,7 +210,16 @@ def build_pipeline(camera_cfg: dict, faces_root: str | None = None) -> Pipeline:
         DetectPeopleStage(camera_cfg),
         TrackPeopleStage(camera_cfg),
         CountLineStage(camera_cfg),
+        PresenceSamplingStage(camera_cfg),
         ExtractFacesStage(camera_cfg, faces_root=faces_root),
+        ReIdEmbeddingsStage(camera_cfg),
         StaffExclusionStage(camera_cfg),
     ]
-    return Pipeline(stages=stages, target_fps=target_fps)
+    if tracks_root:
+        # detections and tracks per frame, for `recount` (see vision/replay.py)
+        stages.insert(2, RecordTracksStage(camera_cfg, tracks_root))
+    if detect_workers > 1:
+        from people_analytics.vision.parallel import ParallelPipeline
+
+        return ParallelPipeline(camera_cfg, stages[1:], target_fps=target_fps, workers=detect_workers)
+    return Pipeline(stages=stages, target_fps=target_fps, reader=build_reader(camera_cfg, target_fps))
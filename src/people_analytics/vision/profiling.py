@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import cProfile
+import random
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class StageTimer:
+    # Wall/CPU totals plus a bounded reservoir of per-call wall times, so
+    # percentiles stay cheap on long segments. CPU is process time: it
+    # includes the intra-op threads of detectors/decoders the call spawned.
+    def __init__(self, reservoir_size: int = 4096, seed: int = 0):
+        self.calls = 0
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+        self.max_s = 0.0
+        self.reservoir_size = reservoir_size
+        self.samples: list[float] = []
+        self._rng = random.Random(seed)
+
+    def add(self, wall_s: float, cpu_s: float) -> None:
+        self.calls += 1
+        self.wall_s += wall_s
+        self.cpu_s += cpu_s
+        if wall_s > self.max_s:
+            self.max_s = wall_s
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(wall_s)
+        else:
+            slot = self._rng.randrange(self.calls)
+            if slot < self.reservoir_size:
+                self.samples[slot] = wall_s
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            self.add(time.perf_counter() - wall, time.process_time() - cpu)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "max_ms": round(self.max_s * 1000, 3),
+        }
+
+
+class PipelineProfile:
+    def __init__(self, stage_names: list[str]):
+        self.setup = {name: StageTimer() for name in stage_names}
+        self.frame = {name: StageTimer() for name in stage_names}
+        self.finish = {name: StageTimer() for name in stage_names}
+        self.decode = StageTimer()
+        self.wall_s = 0.0
+        self.cpu_s = 0.0
+
+    def to_dict(self, frames: int, media_s: float | None) -> dict:
+        stages = {
+            name: {
+                "setup_s": round(self.setup[name].wall_s, 4),
+                "frame": self.frame[name].to_dict(),
+                "finish_s": round(self.finish[name].wall_s, 4),
+            }
+            for name in self.frame
+        }
+        return {
+            "wall_s": round(self.wall_s, 4),
+            "cpu_s": round(self.cpu_s, 4),
+            "fps": round(frames / self.wall_s, 2) if self.wall_s > 0 else None,
+            # >1 means faster than real time (seconds of video per second of wall clock).
+            "realtime_factor": round(media_s / self.wall_s, 3) if media_s and self.wall_s > 0 else None,
+            "decode": self.decode.to_dict(),
+            "stages": stages,
+        }
+
+
+def summarize_timings(timings: dict) -> str:
+    if not timings:
+        return ""
+    parts = [f"decode={timings['decode']['wall_s']}s"]
+    for name, stage in timings["stages"].items():
+        parts.append(f"{name}={stage['frame']['wall_s']}s(p95 {stage['frame']['p95_ms']}ms)")
+    return (
+        f"wall={timings['wall_s']}s fps={timings['fps']} realtime={timings['realtime_factor']}x " + " ".join(parts)
+    )
+
+
+@contextmanager
+def profile_to(path: str | Path | None) -> Iterator[cProfile.Profile | None]:
+    # Opt-in cProfile for a single segment; inspect with `python -m pstats` or
+    # snakeviz. For sampling profilers (py-spy) just run the same CLI command
+    # under `py-spy record`; no hook is needed.
+    if not path:
+        yield None
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(path))
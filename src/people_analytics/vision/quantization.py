@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from people_analytics.core.exceptions import DetectorUnavailable
+from people_analytics.vision.detectors import letterbox
+from people_analytics.vision.video_reader import VideoReader
+
+try:
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+try:
+    import onnxruntime as ort  # type: ignore
+    from onnxruntime.quantization import (  # type: ignore
+        CalibrationDataReader,
+        CalibrationMethod,
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    ort = None
+    CalibrationDataReader = object
+
+
+def sample_frames(videos: Sequence[str | Path], count: int, target_fps: int | None = 1, seed: int = 0) -> list:
+    # Reservoir sample per video so memory stays at `count` frames; calibration
+    # wants the scenes the cameras actually see (lighting, crowding), not a
+    # generic dataset.
+    rng = random.Random(seed)
+    per_video = max(1, count // max(1, len(videos)))
+    reader = VideoReader(target_fps=target_fps)
+    frames = []
+    for video in videos:
+        reservoir: list = []
+        for seen, (frame, _ts) in enumerate(reader.iter_frames(Path(video))):
+            if len(reservoir) < per_video:
+                reservoir.append(frame)
+            else:
+                slot = rng.randrange(seen + 1)
+                if slot < per_video:
+                    reservoir[slot] = frame
+        frames.extend(reservoir)
+    return frames[:count]
+
+
+class FrameCalibrationReader(CalibrationDataReader):
+    # Feeds frames with the same letterbox/normalisation as OnnxDetector.
+    def __init__(self, frames: Iterable, input_name: str, input_size: tuple[int, int]):
+        self.input_name = input_name
+        self.input_size = input_size
+        self._frames = iter(frames)
+
+    def get_next(self) -> dict | None:
+        frame = next(self._frames, None)
+        if frame is None:
+            return None
+        image, _ratio, _pad = letterbox(frame, self.input_size)
+        return {self.input_name: cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True)}
+
+
+def quantize_model(
+    src: str | Path,
+    dst: str | Path,
+    frames: Sequence | None = None,
+    imgsz: int = 640,
+    per_channel: bool = True,
+    nodes_to_exclude: Sequence[str] = (),
+) -> Path:
+    # With calibration frames: static QDQ INT8 (activations and weights), the
+    # fast path on x86 VNNI/AVX512 and ARM. Without: dynamic quantization of
+    # weights only, which needs no data but gains much less on conv nets.
+    if ort is None:
+        raise DetectorUnavailable("onnxruntime-not-installed")
+    src, dst = Path(src), Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if not frames:
+        quantize_dynamic(
+            str(src),
+            str(dst),
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            nodes_to_exclude=list(nodes_to_exclude),
+        )
+        return dst
+
+    # shape inference + graph folding first, as the ORT docs recommend for QDQ
+    prepared = dst.with_suffix(".prep.onnx")
+    quant_pre_process(str(src), str(prepared), skip_symbolic_shape=True)
+    try:
+        session = ort.InferenceSession(str(prepared), providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        h, w = model_input.shape[2:4]
+        input_size = (w if isinstance(w, int) else imgsz, h if isinstance(h, int) else imgsz)
+        del session
+        quantize_static(
+            str(prepared),
+            str(dst),
+            FrameCalibrationReader(frames, model_input.name, input_size),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=per_channel,
+            calibrate_method=CalibrationMethod.MinMax,
+            nodes_to_exclude=list(nodes_to_exclude),
+        )
+    finally:
+        prepared.unlink(missing_ok=True)
+    return dst
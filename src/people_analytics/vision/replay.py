@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from pathlib import Path
+
+from people_analytics.core.exceptions import AnalyticsError
+from people_analytics.storage.paths import VideoPathInfo
+from people_analytics.vision.pipeline import Pipeline, PipelineResult
+from people_analytics.vision.stages.count_line import CountLineStage
+from people_analytics.vision.stages.presence_sampling import PresenceSamplingStage
+from people_analytics.vision.stages.track_people import TrackPeopleStage
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# Replays a RecordTracksStage recording through the counting stages: no video
+# decode and no inference, so a new line/direction/min_interval_s costs
+# milliseconds per segment. With retrack=True the recorded detections go
+# through ByteTrack again (new tracking params, or a narrower roi when the
+# run did not crop to it); otherwise the recorded tracks are used as-is.
+
+
+@dataclass
+class Recording:
+    path: Path
+    arrays: dict
+    meta: dict
+
+    @property
+    def frames(self) -> int:
+        return len(self.arrays["frame_ts"])
+
+    def segment_info(self) -> VideoPathInfo | None:
+        segment = self.meta.get("segment")
+        if not segment:
+            return None
+        return VideoPathInfo(
+            store_code=segment["store_code"],
+            camera_code=segment["camera_code"],
+            date=date.fromisoformat(segment["date"]),
+            start_time=time.fromisoformat(segment["start_time"]),
+            end_time=time.fromisoformat(segment["end_time"]),
+            relative_path=segment["relative_path"],
+        )
+
+    def base_ts(self) -> datetime | None:
+        value = self.meta.get("base_ts")
+        return datetime.fromisoformat(value) if value else None
+
+    def detections(self, i: int) -> list[dict]:
+        a = self.arrays
+        start, end = a["det_offsets"][i], a["det_offsets"][i + 1]
+        return [
+            {
+                "bbox": a["det_bbox"][j].tolist(),
+                "confidence": float(a["det_conf"][j]),
+                "class_id": int(a["det_class"][j]),
+            }
+            for j in range(start, end)
+        ]
+
+    def tracks(self, i: int) -> list[dict]:
+        a = self.arrays
+        start, end = a["track_offsets"][i], a["track_offsets"][i + 1]
+        tracks = []
+        for j in range(start, end):
+            confidence = float(a["track_conf"][j])
+            tracks.append(
+                {
+                    "track_id": str(int(a["track_id"][j])),
+                    "bbox": a["track_bbox"][j].tolist(),
+                    "confidence": None if math.isnan(confidence) else confidence,
+                }
+            )
+        return tracks
+
+
+def load_recording(path: str | Path) -> Recording:
+    if np is None:
+        raise AnalyticsError("numpy-not-installed")
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    meta = json.loads(str(arrays.pop("meta")))
+    return Recording(Path(path), arrays, meta)
+
+
+class _RecordedFramesReader:
+    # Stands in for the video reader: the "frame" is the recorded frame index
+    def __init__(self, recording: Recording):
+        self.recording = recording
+
+    def iter_frames(self, path):
+        for i, ts in enumerate(self.recording.arrays["frame_ts"].tolist()):
+            yield i, ts
+
+
+class ReplayDetectionsStage:
+    def __init__(self, recording: Recording, camera_cfg: dict, retrack: bool = False):
+        self.recording = recording
+        self.retrack = retrack
+        roi = camera_cfg.get("roi")
+        crop_roi = bool((camera_cfg.get("processing") or {}).get("crop_roi", False))
+        # same center-in-roi rule as DetectPeopleStage applies when it does not crop
+        self.roi = roi if retrack and roi and not crop_roi else None
+
+    def setup(self, context: dict) -> None:
+        context["detections"] = []
+        context["tracks"] = []
+
+    def _in_roi(self, det: dict) -> bool:
+        x1, y1, x2, y2 = det["bbox"]
+        cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+        x0, y0 = self.roi.get("x", 0), self.roi.get("y", 0)
+        return x0 <= cx <= x0 + self.roi.get("w", 0) and y0 <= cy <= y0 + self.roi.get("h", 0)
+
+    def on_frame(self, context: dict) -> None:
+        i = context["frame"]
+        if self.retrack:
+            detections = self.recording.detections(i)
+            context["detections"] = [d for d in detections if self._in_roi(d)] if self.roi else detections
+        else:
+            context["tracks"] = self.recording.tracks(i)
+
+    def on_finish(self, context: dict) -> None:
+        pass
+
+
+def replay_recording(recording: Recording, camera_cfg: dict, retrack: bool = False) -> PipelineResult:
+    stages = [ReplayDetectionsStage(recording, camera_cfg, retrack)]
+    if retrack:
+        stages.append(TrackPeopleStage(camera_cfg))
+    stages += [CountLineStage(camera_cfg), PresenceSamplingStage(camera_cfg)]
+    pipeline = Pipeline(stages, reader=_RecordedFramesReader(recording))
+    return pipeline.run(recording.path, base_ts=recording.base_ts(), segment_info=recording.segment_info())
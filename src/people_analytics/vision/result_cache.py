@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from people_analytics.core import jsonio
+from people_analytics.storage.fingerprint import fingerprint_for_file, full_content_hash
+from people_analytics.vision.pipeline import PipelineResult
+from people_analytics.vision.sinks import RECORD_KINDS, write_segment_line
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed cache of segment outputs. The key covers everything the
+# output depends on: the video content (sampled fingerprint), the camera YAML,
+# the model files it points at, the vision code itself and the run context
+# (segment path info, timezone, max_seconds, faces_root). Any change is a new
+# key, so entries are never invalidated, only evicted (least recently used
+# first once the cache is over max_bytes). Each entry is the segment JSONL line.
+CACHE_VERSION = 1
+MODEL_SUFFIXES = (".pt", ".onnx", ".caffemodel", ".prototxt", ".xml", ".bin")
+
+
+def _model_paths(value, found: set[str]) -> set[str]:
+    if isinstance(value, dict):
+        for item in value.values():
+            _model_paths(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _model_paths(item, found)
+    elif isinstance(value, str) and value.endswith(MODEL_SUFFIXES):
+        found.add(value)
+        if value.endswith(".pt"):
+            # the ONNX exports the onnx/openvino backends load instead (see onnx_model_path)
+            found.add(str(Path(value).with_suffix(".onnx")))
+            found.add(str(Path(value).with_suffix(".int8.onnx")))
+    return found
+
+
+@lru_cache(maxsize=64)
+def _file_hash(path: str, size: int, mtime_ns: int) -> str:
+    return full_content_hash(Path(path))
+
+
+def model_hashes(camera_cfg: dict) -> dict[str, str | None]:
+    hashes: dict[str, str | None] = {}
+    for path in sorted(_model_paths(camera_cfg, set())):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            hashes[path] = None
+            continue
+        hashes[path] = _file_hash(path, stat.st_size, stat.st_mtime_ns)
+    return hashes
+
+
+@lru_cache(maxsize=1)
+def code_hash() -> str:
+    # stage code changes results as much as config does
+    digest = hashlib.sha256()
+    root = Path(__file__).resolve().parent
+    for path in sorted(root.rglob("*.py")):
+        digest.update(str(path.relative_to(root)).encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def segment_cache_key(video_path: Path, camera_cfg: dict, **context) -> str:
+    payload = {
+        "version": CACHE_VERSION,
+        "code": code_hash(),
+        "video": fingerprint_for_file(video_path),
+        "camera": camera_cfg,
+        "models": model_hashes(camera_cfg),
+        "context": context,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def run_cache_key(settings, video_path: Path, camera_cfg: dict, info, max_seconds: float | None = None) -> str:
+    # `info` is the segment's VideoPathInfo: output timestamps derive from it
+    return segment_cache_key(
+        video_path,
+        camera_cfg,
+        segment=[info.store_code, info.camera_code, info.date, info.start_time, info.end_time],
+        tz_name=settings.timezone,
+        max_seconds=max_seconds,
+        faces_root=settings.faces_root,
+    )
+
+
+class ResultCache:
+    def __init__(self, root: str | Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+
+    def path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def contains(self, key: str) -> bool:
+        # cheap check; get() may still miss (unreadable entry, deleted face crops)
+        return self.path(key).exists()
+
+    def get(self, key: str, faces_root: str | Path | None = None) -> dict | None:
+        # With faces_root, an entry whose face crops were deleted is a miss
+        path = self.path(key)
+        try:
+            text = path.read_bytes()
+            # reads refresh the LRU position
+            os.utime(path)
+        except OSError:
+            return None
+        try:
+            output = jsonio.loads(text)
+        except ValueError:
+            logger.warning("Dropping unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            return None
+        if faces_root is not None:
+            for face in jsonio.iter_rows(output.get("face_captures")):
+                if face.get("path") and not (Path(faces_root) / face["path"]).exists():
+                    return None
+        output.setdefault("meta", {})["cache_hit"] = True
+        return output
+
+    def put(self, key: str, output: dict, spool: dict[str, Path] | None = None) -> Path | None:
+        # runs with errors (missing model, unreadable video...) may succeed next time
+        if (output.get("meta") or {}).get("errors"):
+            return None
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            write_segment_line(f, output, spool)
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        removed = 0
+        for _mtime, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def build_result_cache(settings) -> ResultCache:
+    return ResultCache(settings.result_cache_root, settings.result_cache_max_mb * 1024 * 1024)
+
+
+def load_result(output: dict) -> PipelineResult:
+    # PipelineResult with the records of a cached output (timestamps back to datetime)
+    result = PipelineResult()
+    for kind in RECORD_KINDS:
+        records = getattr(result, kind)
+        for record in jsonio.iter_rows(output.get(kind)):
+            if isinstance(record.get("ts"), str):
+                record["ts"] = datetime.fromisoformat(record["ts"])
+            records.append(record)
+    meta = output.get("meta") or {}
+    result.frames_read = meta.get("frames_read", 0)
+    result.duration_s = meta.get("duration_s")
+    result.errors = list(meta.get("errors") or [])
+    result.timings = meta.get("timings") or {}
+    return result
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from math import prod
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+
+class FrameRing:
+    # Fixed-size uint8 frame slots in one shared memory block. Frames cross
+    # process boundaries as slot indices; every process maps the same pages,
+    # so nothing is pickled or copied after the decoder writes a slot.
+    # `spec` (name, slots, shape) is all another process needs to attach.
+    def __init__(self, slots: int, shape: tuple[int, ...], name: str | None = None):
+        if np is None:
+            raise RuntimeError("numpy-not-installed")
+        self.slots = int(slots)
+        self.shape = tuple(int(v) for v in shape)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=self.slots * prod(self.shape))
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.frames = np.ndarray((self.slots, *self.shape), dtype=np.uint8, buffer=self.shm.buf)
+
+    @classmethod
+    def attach(cls, spec: tuple) -> "FrameRing":
+        name, slots, shape = spec
+        return cls(slots, shape, name=name)
+
+    @property
+    def spec(self) -> tuple:
+        return (self.shm.name, self.slots, self.shape)
+
+    def write(self, slot: int, frame) -> None:
+        if frame.shape != self.shape:
+            raise RuntimeError(f"frame-shape-changed:{frame.shape}")
+        np.copyto(self.frames[slot], frame)
+
+    def view(self, slot: int):
+        return self.frames[slot]
+
+    def close(self) -> None:
+        # views handed out by view() must be dropped first
+        self.frames = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO
+
+from people_analytics.core import jsonio
+
+RECORD_KINDS = ("events", "presence_samples", "face_captures")
+
+
+class ResultSink(ABC):
+    # Receives pipeline records as they are produced (see PipelineResult.flush).
+    # `kind` is one of RECORD_KINDS. Abstract so a sink without write() fails
+    # when it is built, not mid-run after DbSink already replaced the rows.
+    @abstractmethod
+    def write(self, kind: str, record: dict) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlSink(ResultSink):
+    # Spools each record kind to its own JSONL file under `directory`, so a
+    # segment's records live on disk instead of in PipelineResult lists.
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.paths = spool_paths(self.directory)
+        self._files = {kind: path.open("w", encoding="utf-8") for kind, path in self.paths.items()}
+
+    def write(self, kind: str, record: dict) -> None:
+        self._files[kind].write(jsonio.dumps(record) + "\n")
+
+    def close(self) -> None:
+        for f in self._files.values():
+            f.close()
+
+
+class TeeSink(ResultSink):
+    # Same records to several sinks (e.g. the database and a spool for the cache)
+    def __init__(self, sinks: list[ResultSink]):
+        self.sinks = sinks
+
+    def write(self, kind: str, record: dict) -> None:
+        for sink in self.sinks:
+            sink.write(kind, record)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def spool_paths(directory: str | Path) -> dict[str, Path]:
+    return {kind: Path(directory) / f"{kind}.jsonl" for kind in RECORD_KINDS}
+
+
+def write_segment_line(
+    out: IO[str], output: dict, spool: dict[str, Path] | None = None, compact: bool = False
+) -> None:
+    # Same line as jsonio.dumps(output) (or of compact_output(output)), but
+    # the record lists are copied from the spool files one record at a time.
+    spool = spool or {}
+    out.write("{")
+    for i, (key, value) in enumerate(output.items()):
+        if i:
+            out.write(",")
+        out.write(jsonio.dumps(key) + ":")
+        path = spool.get(key)
+        if path is None:
+            out.write(jsonio.dumps(jsonio.to_columns(value) if compact and key in jsonio.COLUMNAR_KINDS else value))
+            continue
+        with Path(path).open("r", encoding="utf-8") as f:
+            if compact:
+                # columns are built in memory, but as scalars instead of one dict per record
+                out.write(jsonio.dumps(jsonio.to_columns(jsonio.loads(line) for line in f)))
+                continue
+            out.write("[")
+            for n, line in enumerate(f):
+                if n:
+                    out.write(",")
+                out.write(line.rstrip("\n"))
+            out.write("]")
+    out.write("}\n")
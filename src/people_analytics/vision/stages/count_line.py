@@ -83,7 +83,7 @@ class CountLineStage:
                 event_ts = (
                     base_ts + timedelta(seconds=float(ts)) if base_ts else datetime.now(timezone.utc)
                 )
-                context["result"].events.append(
+                context["result"].add_event(
                     {
                         "ts": event_ts,
                         "direction": direction,
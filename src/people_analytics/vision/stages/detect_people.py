@@ -2,10 +2,15 @@ from __future__ import annotations
 
 from typing import Any
 
-try:
-    from ultralytics import YOLO  # type: ignore
-except Exception:  # pragma: no cover - optional dependency
-    YOLO = None
+from people_analytics.core.exceptions import DetectorUnavailable
+from people_analytics.core.settings import get_settings
+from people_analytics.vision.detectors import (
+    create_detector,
+    input_size_for,
+    merge_detections,
+    onnx_model_path,
+    tile_boxes,
+)
 
 try:
     import cv2  # type: ignore
@@ -16,31 +21,51 @@ except Exception:  # pragma: no cover - optional dependency
 class DetectPeopleStage:
     def __init__(self, camera_cfg: dict):
         self.camera_cfg = camera_cfg
-        self.model = None
+        self.detector = None
         self.disabled_reason: str | None = None
         self.conf = 0.35
         self.iou = 0.45
         self.person_class_id = 0
         self.crop_roi = False
+        self.auto_imgsz = False
+        self.max_imgsz = 640
+        self.stride = 32
+        self.tiles = {"cols": 1, "rows": 1, "overlap": 0.2}
+        self._regions: tuple | None = None
 
     def setup(self, context: dict) -> None:
         context["detections"] = []
 
-        if YOLO is None:
-            self.disabled_reason = "ultralytics-not-installed"
-            context["result"].errors.append(self.disabled_reason)
-            return
-
         processing = self.camera_cfg.get("processing", {})
+        backend = str(processing.get("backend", "ultralytics"))
+        precision = str(processing.get("precision", "fp32"))
         model_path = processing.get("yolo_model", "yolov8n.pt")
+        if backend != "ultralytics":
+            model_path = onnx_model_path(processing, model_path, precision)
         self.conf = float(processing.get("conf", 0.35))
         self.iou = float(processing.get("iou", 0.45))
         self.person_class_id = int(processing.get("person_class_id", 0))
         self.crop_roi = bool(processing.get("crop_roi", False))
-
-        if self.model is None:
+        self.auto_imgsz = bool(processing.get("auto_imgsz", False))
+        self.max_imgsz = int(processing.get("imgsz", 640))
+        self.stride = int(processing.get("stride", 32))
+        self.tiles = {"cols": 1, "rows": 1, "overlap": 0.2, **(processing.get("tiles") or {})}
+        self._regions = None
+
+        if self.detector is None:
+            settings = get_settings()
             try:
-                self.model = YOLO(model_path)
+                self.detector = create_detector(
+                    backend,
+                    model_path,
+                    imgsz=int(processing.get("imgsz", 640)),
+                    threads=int(processing.get("threads", 0)) or settings.inference_threads,
+                    inter_op_threads=settings.inference_inter_op_threads,
+                    precision=precision,
+                )
+            except DetectorUnavailable as exc:
+                self.disabled_reason = str(exc)
+                context["result"].errors.append(self.disabled_reason)
             except Exception as exc:
                 self.disabled_reason = f"yolo-load-failed:{exc}"
                 context["result"].errors.append("yolo-load-failed")
@@ -55,6 +80,8 @@ class DetectPeopleStage:
             return frame
         w = int(resize_cfg.get("w", frame.shape[1]))
         h = int(resize_cfg.get("h", frame.shape[0]))
+        if frame.shape[:2] == (h, w):
+            return frame
         return cv2.resize(frame, (w, h))
 
     def _crop_to_roi(self, frame, roi: dict):
@@ -68,40 +95,64 @@ class DetectPeopleStage:
         y2 = min(frame.shape[0], y1 + max(1, h))
         return frame[y1:y2, x1:x2], (x1, y1)
 
+    def _plan_regions(self, frame_shape) -> tuple:
+        # Regions are configured in resized-frame coordinates (like roi and the
+        # line); crops are taken from the source frame so the full frame is
+        # never resized, and each crop gets the smallest input that covers it.
+        src_h, src_w = frame_shape[:2]
+        resize_cfg = self.camera_cfg.get("resize") or {}
+        out_w = int(resize_cfg.get("w", src_w))
+        out_h = int(resize_cfg.get("h", src_h))
+        sx, sy = src_w / out_w, src_h / out_h
+        x1, y1, x2, y2 = 0, 0, out_w, out_h
+        roi = self.camera_cfg.get("roi")
+        if self.crop_roi and roi:
+            x1 = max(0, int(roi.get("x", 0)))
+            y1 = max(0, int(roi.get("y", 0)))
+            x2 = min(out_w, x1 + max(1, int(roi.get("w", out_w - x1))))
+            y2 = min(out_h, y1 + max(1, int(roi.get("h", out_h - y1))))
+        cols, rows, overlap = int(self.tiles["cols"]), int(self.tiles["rows"]), float(self.tiles["overlap"])
+        regions = []
+        for tx1, ty1, tx2, ty2 in tile_boxes(x1, y1, x2, y2, cols, rows, overlap):
+            crop = (int(tx1 * sx), int(ty1 * sy), int(round(tx2 * sx)), int(round(ty2 * sy)))
+            regions.append((crop, input_size_for(tx2 - tx1, ty2 - ty1, self.stride, self.max_imgsz)))
+        return frame_shape, (sx, sy), regions
+
+    def _detect_regions(self, frame) -> list[dict]:
+        if self._regions is None or self._regions[0] != frame.shape:
+            self._regions = self._plan_regions(frame.shape)
+        _shape, (sx, sy), regions = self._regions
+        found = []
+        for (cx1, cy1, cx2, cy2), size in regions:
+            for det in self.detector.detect(
+                frame[cy1:cy2, cx1:cx2], conf=self.conf, iou=self.iou, classes=[self.person_class_id], imgsz=size
+            ):
+                bx1, by1, bx2, by2 = det["bbox"]
+                det["bbox"] = [(bx1 + cx1) / sx, (by1 + cy1) / sy, (bx2 + cx1) / sx, (by2 + cy1) / sy]
+                found.append(det)
+        if len(regions) > 1:
+            found = merge_detections(found, self.iou)
+        return found
+
     def on_frame(self, context: dict) -> None:
-        if self.disabled_reason or self.model is None:
+        if self.disabled_reason or self.detector is None:
             context["detections"] = []
             return
 
-        frame = self._resize_frame(context["frame"])
         roi = self.camera_cfg.get("roi")
         offset_x = 0
         offset_y = 0
-        if self.crop_roi and roi:
-            frame, (offset_x, offset_y) = self._crop_to_roi(frame, roi)
-        results = self.model.predict(
-            frame,
-            conf=self.conf,
-            iou=self.iou,
-            classes=[self.person_class_id],
-            verbose=False,
-        )
-        if not results:
-            context["detections"] = []
-            return
-
-        boxes = results[0].boxes
-        if boxes is None or len(boxes) == 0:
-            context["detections"] = []
-            return
-
-        xyxy = boxes.xyxy.cpu().numpy()
-        conf = boxes.conf.cpu().numpy()
-        cls = boxes.cls.cpu().numpy().astype(int)
+        if self.auto_imgsz:
+            found = self._detect_regions(context["frame"])
+        else:
+            frame = self._resize_frame(context["frame"])
+            if self.crop_roi and roi:
+                frame, (offset_x, offset_y) = self._crop_to_roi(frame, roi)
+            found = self.detector.detect(frame, conf=self.conf, iou=self.iou, classes=[self.person_class_id])
 
         detections = []
-        for i in range(len(xyxy)):
-            x1, y1, x2, y2 = xyxy[i].tolist()
+        for det in found:
+            x1, y1, x2, y2 = det["bbox"]
             x1 += offset_x
             x2 += offset_x
             y1 += offset_y
@@ -118,8 +169,8 @@ class DetectPeopleStage:
             detections.append(
                 {
                     "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                    "confidence": float(conf[i]),
-                    "class_id": int(cls[i]),
+                    "confidence": det["confidence"],
+                    "class_id": det["class_id"],
                 }
             )
 
@@ -4,6 +4,9 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from people_analytics.core.settings import get_settings
+from people_analytics.vision.detectors import create_detector, input_size_for, onnx_model_path
+
 try:
     import cv2  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
@@ -19,11 +22,17 @@ except Exception:  # pragma: no cover - optional dependency
 class FaceCaptureConfig:
     enabled: bool = False
     model: str = "yolov8n-face.pt"
+    backend: str = "ultralytics"
+    precision: str = "fp32"
     conf: float = 0.85
+    iou: float = 0.7
     min_width: int = 80
     min_interval_s: float = 2.0
     save_on_crossing: bool = True
     crop_roi: bool = False
+    auto_imgsz: bool = False
+    imgsz: int = 640
+    stride: int = 32
     padding: float = 0.2
     min_overlap: float = 0.3
     max_faces_per_frame: int = 5
@@ -55,11 +64,18 @@ class ExtractFacesStage:
         face_cfg = self.camera_cfg.get("face_capture", {})
         self.cfg.enabled = bool(face_cfg.get("enabled", False))
         self.cfg.model = str(face_cfg.get("model", self.cfg.model))
+        processing = self.camera_cfg.get("processing", {})
+        self.cfg.backend = str(face_cfg.get("backend", processing.get("backend", self.cfg.backend)))
+        self.cfg.precision = str(face_cfg.get("precision", processing.get("precision", self.cfg.precision)))
         self.cfg.conf = float(face_cfg.get("conf", self.cfg.conf))
+        self.cfg.iou = float(face_cfg.get("iou", self.cfg.iou))
         self.cfg.min_width = int(face_cfg.get("min_width", self.cfg.min_width))
         self.cfg.min_interval_s = float(face_cfg.get("min_interval_s", self.cfg.min_interval_s))
         self.cfg.save_on_crossing = bool(face_cfg.get("save_on_crossing", self.cfg.save_on_crossing))
         self.cfg.crop_roi = bool(face_cfg.get("crop_roi", self.cfg.crop_roi))
+        self.cfg.auto_imgsz = bool(face_cfg.get("auto_imgsz", self.cfg.auto_imgsz))
+        self.cfg.imgsz = int(face_cfg.get("imgsz", processing.get("imgsz", self.cfg.imgsz)))
+        self.cfg.stride = int(face_cfg.get("stride", processing.get("stride", self.cfg.stride)))
         self.cfg.padding = float(face_cfg.get("padding", self.cfg.padding))
         self.cfg.min_overlap = float(face_cfg.get("min_overlap", self.cfg.min_overlap))
         self.cfg.max_faces_per_frame = int(face_cfg.get("max_faces_per_frame", self.cfg.max_faces_per_frame))
@@ -79,7 +95,7 @@ class ExtractFacesStage:
             context["result"].errors.append(self.disabled_reason)
             return
 
-        if YOLO is None:
+        if self.cfg.backend == "ultralytics" and YOLO is None:
             self.disabled_reason = "ultralytics-not-installed"
             context["result"].errors.append(self.disabled_reason)
             return
@@ -92,9 +108,22 @@ class ExtractFacesStage:
             context["result"].errors.append(self.disabled_reason)
             return
 
-        if self.model is None and YOLO is not None:
+        if self.model is None:
+            settings = get_settings()
+            model_path = self.cfg.model
+            if self.cfg.backend != "ultralytics":
+                model_path = onnx_model_path(face_cfg, model_path, self.cfg.precision)
             try:
-                self.model = YOLO(self.cfg.model)
+                # yolov8-face exports carry keypoints after the single class score
+                self.model = create_detector(
+                    self.cfg.backend,
+                    model_path,
+                    imgsz=self.cfg.imgsz,
+                    threads=int(processing.get("threads", 0)) or settings.inference_threads,
+                    inter_op_threads=settings.inference_inter_op_threads,
+                    num_classes=int(face_cfg.get("num_classes", 1)),
+                    precision=self.cfg.precision,
+                )
                 self.detector = "yolo"
             except Exception as exc:
                 self.disabled_reason = f"face-model-load-failed:{exc}"
@@ -125,6 +154,8 @@ class ExtractFacesStage:
             return frame
         w = int(resize_cfg.get("w", frame.shape[1]))
         h = int(resize_cfg.get("h", frame.shape[0]))
+        if frame.shape[:2] == (h, w):
+            return frame
         return cv2.resize(frame, (w, h))
 
     def _load_haar_detectors(self):
@@ -222,6 +253,7 @@ class ExtractFacesStage:
         return f"{base}-{ms:03d}"
 
     def on_frame(self, context: dict) -> None:
+        context["face_crops"] = []
         if self.disabled_reason or not self.cfg.enabled:
             return
         if self.detector == "yolo" and self.model is None:
@@ -271,26 +303,19 @@ class ExtractFacesStage:
 
         detections = []
         if self.detector == "yolo" and self.model is not None:
-            results = self.model.predict(
-                infer_frame,
-                conf=self.cfg.conf,
-                classes=[self.cfg.class_id],
-                verbose=False,
+            kwargs = {}
+            if self.cfg.auto_imgsz:
+                # smallest stride multiple covering the (ROI) crop instead of a fixed imgsz square
+                h, w = infer_frame.shape[:2]
+                kwargs["imgsz"] = input_size_for(w, h, self.cfg.stride, self.cfg.imgsz)
+            found = self.model.detect(
+                infer_frame, conf=self.cfg.conf, iou=self.cfg.iou, classes=[self.cfg.class_id], **kwargs
             )
-            if not results:
-                return
-
-            boxes = results[0].boxes
-            if boxes is None or len(boxes) == 0:
-                return
-
-            xyxy = boxes.xyxy.cpu().numpy()
-            conf = boxes.conf.cpu().numpy()
-            for i in range(len(xyxy)):
+            for det in found:
                 detections.append(
                     {
-                        "bbox": xyxy[i].tolist(),
-                        "score": float(conf[i]),
+                        "bbox": det["bbox"],
+                        "score": det["confidence"],
                     }
                 )
         elif self.detector == "dnn" and self.dnn_net is not None:
@@ -414,20 +439,20 @@ class ExtractFacesStage:
             except Exception:
                 pass
 
-            context["result"].face_captures.append(
-                {
-                    "ts": event_ts,
-                    "track_id": track_id,
-                    "store_code": store_code,
-                    "camera_code": camera_code,
-                    "segment_date": date_str,
-                    "segment_start": seg_start,
-                    "source": source,
-                    "face_score": score,
-                    "face_bbox": face_bbox,
-                    "path": str(rel_path),
-                }
-            )
+            face = {
+                "ts": event_ts,
+                "track_id": track_id,
+                "store_code": store_code,
+                "camera_code": camera_code,
+                "segment_date": date_str,
+                "segment_start": seg_start,
+                "source": source,
+                "face_score": score,
+                "face_bbox": face_bbox,
+                "path": str(rel_path),
+            }
+            context["result"].add_face_capture(face)
+            context["face_crops"].append((face, face_crop))
             self.last_saved_by_track[track_id] = float(ts)
             saved_this_frame.add(track_id)
 
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+
+class PresenceSamplingStage:
+    def __init__(self, camera_cfg: dict):
+        self.camera_cfg = camera_cfg
+        presence_cfg = camera_cfg.get("presence", {})
+        self.enabled = bool(presence_cfg.get("enabled", True))
+        self.interval_s = float(presence_cfg.get("interval_s", 60))
+        self.bucket: int | None = None
+        self.bucket_max = 0
+        self.started_at: datetime | None = None
+
+    def setup(self, context: dict) -> None:
+        context["result"].presence_samples = []
+        self.bucket = None
+        self.bucket_max = 0
+        self.started_at = None
+        if self.interval_s <= 0:
+            self.enabled = False
+            context["result"].errors.append("presence-interval-invalid")
+
+    def _flush(self, context: dict) -> None:
+        if self.bucket is None:
+            return
+        base_ts = context.get("base_ts") or self.started_at
+        context["result"].add_presence_sample(
+            {
+                "ts": base_ts + timedelta(seconds=self.bucket * self.interval_s),
+                "count": self.bucket_max,
+            }
+        )
+
+    def on_frame(self, context: dict) -> None:
+        if not self.enabled:
+            return
+
+        ts = context.get("ts")
+        if ts is None:
+            return
+        if self.started_at is None:
+            self.started_at = datetime.now(timezone.utc)
+
+        bucket = int(float(ts) // self.interval_s)
+        if bucket != self.bucket:
+            self._flush(context)
+            self.bucket = bucket
+            self.bucket_max = 0
+
+        self.bucket_max = max(self.bucket_max, len(context.get("tracks", [])))
+
+    def on_finish(self, context: dict) -> None:
+        if not self.enabled:
+            return
+        self._flush(context)
+        self.bucket = None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+# Recording layout (one .npz per segment, same tree as the videos):
+#   frame_ts [F]                      seconds from the segment start
+#   det_offsets [F+1], det_bbox [D,4], det_conf [D], det_class [D]
+#   track_offsets [F+1], track_id [T], track_bbox [T,4], track_conf [T]
+#   meta                              JSON: segment info, base_ts, camera config, counts
+# Frame i owns det_*[det_offsets[i]:det_offsets[i+1]] (same for track_*).
+# Track boxes/confidences stay float64 so a replay with the recorded config
+# reproduces the run's events exactly.
+RECORDING_VERSION = 1
+
+
+def recording_path(root: str | Path, context: dict) -> Path:
+    info = context.get("segment_info")
+    stem = Path(context["video_path"]).stem
+    if info is None:
+        return Path(root) / f"{stem}.npz"
+    return (
+        Path(root)
+        / f"store={info.store_code}"
+        / f"camera={info.camera_code}"
+        / f"date={info.date.isoformat()}"
+        / f"{stem}.npz"
+    )
+
+
+class RecordTracksStage:
+    # Sits between tracking and counting; see people_analytics.vision.replay
+    def __init__(self, camera_cfg: dict, root: str | Path):
+        self.camera_cfg = camera_cfg
+        self.root = Path(root)
+        self.disabled_reason: str | None = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.frame_ts: list[float] = []
+        self.det_counts: list[int] = []
+        self.det_rows: list[tuple] = []
+        self.track_counts: list[int] = []
+        self.track_rows: list[tuple] = []
+
+    def setup(self, context: dict) -> None:
+        self._reset()
+        if np is None:
+            self.disabled_reason = "numpy-not-installed"
+            context["result"].errors.append(self.disabled_reason)
+
+    def on_frame(self, context: dict) -> None:
+        if self.disabled_reason:
+            return
+        detections = context.get("detections") or []
+        tracks = context.get("tracks") or []
+        self.frame_ts.append(float(context["ts"]))
+        self.det_counts.append(len(detections))
+        for det in detections:
+            self.det_rows.append((*det["bbox"], det["confidence"], det.get("class_id") or 0))
+        self.track_counts.append(len(tracks))
+        for track in tracks:
+            confidence = track.get("confidence")
+            self.track_rows.append(
+                (int(track["track_id"]), *track["bbox"], float("nan") if confidence is None else confidence)
+            )
+
+    def on_finish(self, context: dict) -> None:
+        if self.disabled_reason:
+            return
+        info = context.get("segment_info")
+        base_ts = context.get("base_ts")
+        meta = {
+            "version": RECORDING_VERSION,
+            "video_path": str(context.get("video_path")),
+            "segment": None
+            if info is None
+            else {
+                "store_code": info.store_code,
+                "camera_code": info.camera_code,
+                "date": info.date.isoformat(),
+                "start_time": info.start_time.isoformat(),
+                "end_time": info.end_time.isoformat(),
+                "relative_path": info.relative_path,
+            },
+            "base_ts": base_ts.isoformat() if base_ts else None,
+            "camera": self.camera_cfg,
+            "counts": context["result"].summarize_counts(),
+        }
+        dets = np.array(self.det_rows, dtype=np.float64).reshape(-1, 6)
+        tracks = np.array(self.track_rows, dtype=np.float64).reshape(-1, 6)
+        path = recording_path(self.root, context)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.stem}.tmp.npz")
+        try:
+            np.savez_compressed(
+                tmp,
+                frame_ts=np.array(self.frame_ts, dtype=np.float64),
+                det_offsets=np.concatenate([[0], np.cumsum(self.det_counts, dtype=np.int64)]),
+                det_bbox=dets[:, :4].astype(np.float32),
+                det_conf=dets[:, 4].astype(np.float32),
+                det_class=dets[:, 5].astype(np.int16),
+                track_offsets=np.concatenate([[0], np.cumsum(self.track_counts, dtype=np.int64)]),
+                track_id=tracks[:, 0].astype(np.int64),
+                track_bbox=tracks[:, 1:5],
+                track_conf=tracks[:, 5],
+                meta=np.array(json.dumps(meta, default=str)),
+            )
+            os.replace(tmp, path)
+        except OSError as exc:
+            context["result"].errors.append(f"track-recording-failed:{exc}")
+        self._reset()
@@ -1,13 +1,76 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+try:
+    import cv2  # type: ignore
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    cv2 = None
+    np = None
+
+
 class ReIdEmbeddingsStage:
     def __init__(self, camera_cfg: dict):
         self.camera_cfg = camera_cfg
+        self.net = None
+        self.disabled_reason: str | None = None
+        self.enabled = False
+        self.input_size = (112, 112)
+        self.scale = 1.0 / 255.0
+        self.mean = (0.0, 0.0, 0.0)
+        self.swap_rb = True
 
     def setup(self, context: dict) -> None:
-        pass
+        reid_cfg = self.camera_cfg.get("reid", {})
+        self.enabled = bool(reid_cfg.get("enabled", False))
+        if not self.enabled:
+            return
+
+        if cv2 is None or np is None:
+            self.disabled_reason = "opencv-not-installed"
+            context["result"].errors.append(self.disabled_reason)
+            return
+
+        size = reid_cfg.get("input_size", list(self.input_size))
+        self.input_size = (int(size[0]), int(size[1]))
+        self.scale = float(reid_cfg.get("scale", self.scale))
+        self.mean = tuple(float(v) for v in reid_cfg.get("mean", self.mean))
+        self.swap_rb = bool(reid_cfg.get("swap_rb", self.swap_rb))
+
+        if self.net is None:
+            model_path = Path(reid_cfg.get("model", "models/face_embedding.onnx"))
+            if not model_path.exists():
+                self.disabled_reason = "reid-model-missing"
+                context["result"].errors.append(self.disabled_reason)
+                return
+            try:
+                self.net = cv2.dnn.readNet(str(model_path))
+            except Exception as exc:
+                self.disabled_reason = f"reid-model-load-failed:{exc}"
+                context["result"].errors.append("reid-model-load-failed")
+
+    def _embed(self, crop) -> list[float] | None:
+        blob = cv2.dnn.blobFromImage(crop, self.scale, self.input_size, self.mean, self.swap_rb, False)
+        self.net.setInput(blob)
+        vec = self.net.forward().reshape(-1).astype(np.float32)
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            return None
+        return [round(float(v), 6) for v in vec / norm]
 
     def on_frame(self, context: dict) -> None:
-        # Future stage for re-identification embeddings.
-        pass
+        if not self.enabled or self.disabled_reason or self.net is None:
+            return
+
+        for face, crop in context.get("face_crops", []):
+            try:
+                embedding = self._embed(crop)
+            except Exception:
+                context["result"].errors.append("reid-embed-failed")
+                continue
+            if embedding:
+                context["result"].embeddings.append((face, embedding))
 
     def on_finish(self, context: dict) -> None:
         pass
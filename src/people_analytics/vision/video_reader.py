@@ -1,12 +1,48 @@
 from __future__ import annotations
 
+import json
+import queue
+import re
+import shutil
+import subprocess
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+from people_analytics.core.settings import get_settings
+
 try:
     import cv2  # type: ignore
 except Exception:  # pragma: no cover - optional dependency
     cv2 = None
 
+try:
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    np = None
+
+_PTS_RE = re.compile(r"pts_time:\s*(-?[0-9.]+(?:e-?[0-9]+)?)")
+_VERSION_RE = re.compile(r"version n?(\d+)\.(\d+)")
+
+
+@lru_cache(maxsize=8)
+def ffmpeg_version(ffmpeg_bin: str) -> tuple[int, int] | None:
+    # (major, minor) of a release build; None for git builds or when unknown
+    try:
+        out = subprocess.run([ffmpeg_bin, "-hide_banner", "-version"], capture_output=True, check=False, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_RE.search(out.stdout.decode("utf-8", "replace").split("\n", 1)[0])
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+def passthrough_args(version: tuple[int, int] | None) -> list[str]:
+    # -fps_mode appeared in ffmpeg 5.1 and -vsync is deprecated since; 4.x
+    # builds (Ubuntu 22.04, Debian 11) only know -vsync
+    if version is not None and version < (5, 1):
+        return ["-vsync", "passthrough"]
+    return ["-fps_mode", "passthrough"]
+
 
 class VideoReader:
     def __init__(self, target_fps: int | None = None):
@@ -33,3 +69,166 @@ class VideoReader:
                 yield frame, ts_ms / 1000.0
             idx += 1
         cap.release()
+
+
+class FfmpegReader:
+    # Decodes in an ffmpeg subprocess: frame decimation (select), scaling and
+    # BGR conversion happen before frames cross the pipe, so full-resolution
+    # frames never reach Python. Timestamps are the real PTS of each kept
+    # frame (showinfo), not a frame index estimate. The yielded array is one
+    # reused buffer: it is only valid until the next frame is read.
+    def __init__(
+        self,
+        target_fps: int | None = None,
+        size: tuple[int, int] | None = None,
+        threads: int = 0,
+        hwaccel: str | None = None,
+        ffmpeg_bin: str = "ffmpeg",
+        ffprobe_bin: str = "ffprobe",
+        reuse_buffer: bool = True,
+    ):
+        self.target_fps = target_fps
+        self.size = size
+        self.threads = threads
+        self.hwaccel = hwaccel
+        self.ffmpeg_bin = ffmpeg_bin
+        self.ffprobe_bin = ffprobe_bin
+        self.reuse_buffer = reuse_buffer
+
+    def probe(self, path: Path) -> tuple[int, int, float]:
+        # (width, height, fps) of the first video stream
+        if shutil.which(self.ffprobe_bin):
+            out = subprocess.run(
+                [
+                    self.ffprobe_bin,
+                    "-v",
+                    "error",
+                    "-select_streams",
+                    "v:0",
+                    "-show_entries",
+                    "stream=width,height,avg_frame_rate",
+                    "-of",
+                    "json",
+                    str(path),
+                ],
+                capture_output=True,
+                check=False,
+            )
+            streams = json.loads(out.stdout or b"{}").get("streams") or []
+            if streams:
+                num, _, den = str(streams[0].get("avg_frame_rate", "0/1")).partition("/")
+                fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+                return int(streams[0]["width"]), int(streams[0]["height"]), fps
+        if cv2 is not None:
+            cap = cv2.VideoCapture(str(path))
+            try:
+                if cap.isOpened():
+                    return (
+                        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                        cap.get(cv2.CAP_PROP_FPS) or 0.0,
+                    )
+            finally:
+                cap.release()
+        raise RuntimeError("cannot-open-video")
+
+    def command(self, path: Path, size: tuple[int, int], fps: float = 0.0) -> list[str]:
+        filters = []
+        if self.target_fps and fps:
+            # same decimation as VideoReader (every round(fps/target)-th frame),
+            # so both readers feed the stages identical frame sequences
+            step = max(1, int(round(fps / self.target_fps)))
+            if step > 1:
+                filters.append(f"select='not(mod(n\\,{step}))'")
+        elif self.target_fps:
+            # unknown rate: keep a frame once 1/fps passed since the last kept one
+            filters.append(f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{1 / self.target_fps:.6f})'")
+        if self.size:
+            filters.append(f"scale={size[0]}:{size[1]}:flags=bilinear")
+        filters.append("showinfo")
+        cmd = [self.ffmpeg_bin, "-hide_banner", "-nostdin", "-loglevel", "info"]
+        if self.hwaccel:
+            cmd += ["-hwaccel", self.hwaccel]
+        if self.threads > 0:
+            cmd += ["-threads", str(self.threads)]
+        cmd += ["-i", str(path), "-an", "-sn", "-vf", ",".join(filters)]
+        cmd += passthrough_args(ffmpeg_version(self.ffmpeg_bin))
+        cmd += ["-f", "rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+        return cmd
+
+    def iter_frames(self, path: Path):
+        if np is None:
+            raise RuntimeError("numpy-not-installed")
+        if shutil.which(self.ffmpeg_bin) is None:
+            raise RuntimeError("ffmpeg-not-found")
+        width, height, fps = self.probe(path)
+        if self.size:
+            width, height = self.size
+        proc = subprocess.Popen(
+            self.command(path, (width, height), fps),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        pts: queue.Queue = queue.Queue()
+        tail: list[str] = []
+
+        def read_stderr() -> None:
+            for raw in iter(proc.stderr.readline, b""):
+                line = raw.decode("utf-8", "replace")
+                match = _PTS_RE.search(line) if "showinfo" in line else None
+                if match:
+                    pts.put(float(match.group(1)))
+                else:
+                    tail[:] = (tail + [line.strip()])[-5:]
+            pts.put(None)
+
+        reader = threading.Thread(target=read_stderr, daemon=True)
+        reader.start()
+        buffer = np.empty((height, width, 3), dtype=np.uint8)
+        frames = 0
+        try:
+            while True:
+                frame = buffer if self.reuse_buffer else np.empty_like(buffer)
+                view = memoryview(frame).cast("B")
+                filled = 0
+                while filled < len(view):
+                    n = proc.stdout.readinto(view[filled:])
+                    if not n:
+                        break
+                    filled += n
+                if filled < len(view):
+                    break
+                ts = pts.get(timeout=30)
+                if ts is None:
+                    break
+                frames += 1
+                yield frame, ts
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+            reader.join(timeout=5)
+            proc.stderr.close()
+        if frames == 0 and proc.returncode:
+            raise RuntimeError(f"ffmpeg-failed:{tail[-1] if tail else proc.returncode}")
+
+
+def build_reader(camera_cfg: dict, target_fps: int | None = None):
+    # processing.reader: opencv (default) or ffmpeg. With ffmpeg the decoder
+    # already scales to `resize`, so the stages' resize becomes a no-op.
+    processing = camera_cfg.get("processing") or {}
+    if processing.get("reader", "opencv") != "ffmpeg":
+        return VideoReader(target_fps=target_fps)
+    settings = get_settings()
+    resize_cfg = camera_cfg.get("resize")
+    size = (int(resize_cfg["w"]), int(resize_cfg["h"])) if resize_cfg and "w" in resize_cfg else None
+    return FfmpegReader(
+        target_fps=target_fps,
+        size=size,
+        threads=int(processing.get("decode_threads", 0)),
+        hwaccel=processing.get("hwaccel") or None,
+        ffmpeg_bin=settings.ffmpeg_bin,
+        ffprobe_bin=settings.ffprobe_bin,
+    )
@@ -0,0 +1,166 @@
+import json
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from apps.api import cache as api_cache  # noqa: E402
+from people_analytics.core.settings import get_settings  # noqa: E402
+from people_analytics.db import async_session, session as db_session  # noqa: E402
+from people_analytics.db.async_session import async_database_url  # noqa: E402
+from people_analytics.db.crud import kpis as kpis_crud  # noqa: E402
+from people_analytics.db.crud import segments as segments_crud  # noqa: E402
+from people_analytics.db.models import FaceCapture, PeopleFlowEvent  # noqa: E402
+from people_analytics.storage.paths import VideoPathInfo  # noqa: E402
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./var/x.db") == "sqlite+aiosqlite:///./var/x.db"
+    assert async_database_url("postgresql+psycopg2://u@h/db") == "postgresql+asyncpg://u@h/db"
+    assert async_database_url("postgresql+asyncpg://u@h/db") == "postgresql+asyncpg://u@h/db"
+
+
+def test_async_kpi_endpoints(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'api.db'}")
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    monkeypatch.setattr(async_session, "async_engine", None)
+    monkeypatch.setattr(api_cache, "_cache", None)
+    try:
+        db_session.init_db()
+        with db_session.get_session() as session:
+            store = segments_crud.ensure_store(session, "001", {"name": "Loja"})
+            day = date(2025, 1, 6)
+            kpis_crud.replace_hourly(
+                session, store.id, None, day, [{"hour": 10, "in_count": 7, "out_count": 5, "staff_in": 1, "staff_out": 0}]
+            )
+            store_id = store.id
+
+        from apps.api.main import app
+
+        with TestClient(app) as client:
+            assert client.get("/stores").json()[0]["code"] == "001"
+            hourly = client.get("/kpis/hourly", params={"store_id": store_id, "date": "2025-01-06"}).json()
+            assert [r["in"] for r in hourly] == [7]
+            assert client.get("/kpis/hourly", params={"store_id": store_id, "date": "bad"}).status_code == 400
+        assert async_session.async_engine is None
+    finally:
+        get_settings.cache_clear()
+
+
+def test_rollup_responses_are_cached_for_whole_periods(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'api.db'}")
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    monkeypatch.setattr(async_session, "async_engine", None)
+    monkeypatch.setattr(api_cache, "_cache", None)
+    try:
+        db_session.init_db()
+        with db_session.get_session() as session:
+            store = segments_crud.ensure_store(session, "001", {"name": "Loja"})
+            row = {"days": 2, "in_count": 7, "out_count": 5, "staff_in": 0, "staff_out": 0}
+            kpis_crud.add_rollup(session, "weekly", store.id, None, date(2025, 1, 6), row)
+            kpis_crud.add_rollup(session, "monthly", store.id, None, date(2025, 1, 1), row)
+            store_id = store.id
+
+        from apps.api.main import app
+
+        params = {"store_id": store_id, "from": "2025-01-07", "to": "2025-01-08"}
+        with TestClient(app) as client:
+            assert [r["in"] for r in client.get("/kpis/weekly", params=params).json()] == [7]
+            assert [r["in"] for r in client.get("/kpis/monthly", params=params).json()] == [7]
+        cache = api_cache.get_kpi_cache()
+        # rebuilds after `to` still change that month's and that week's totals
+        assert cache.invalidate(store_id, date(2025, 1, 20)) == 1
+        assert cache.invalidate(store_id, date(2025, 1, 12)) == 1
+        assert cache.invalidate(store_id, date(2025, 2, 1)) == 0
+    finally:
+        get_settings.cache_clear()
+
+
+def _page_through(client, path, params):
+    rows = []
+    cursor = None
+    while True:
+        response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        rows += response.json()
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return rows
+
+
+def test_events_and_faces_page_by_ts_then_id(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'api.db'}")
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    monkeypatch.setattr(async_session, "async_engine", None)
+    monkeypatch.setattr(api_cache, "_cache", None)
+    base = datetime(2025, 1, 6, 13, 0, tzinfo=timezone.utc)
+    # inserted out of time order (a reprocessed segment), with ties on ts
+    offsets = [5, 1, 3, 1, 0, 4, 2, 3, 6]
+    try:
+        db_session.init_db()
+        with db_session.get_session() as session:
+            store = segments_crud.ensure_store(session, "001", {"name": "Loja"})
+            camera = segments_crud.ensure_camera(session, store.id, "entrance")
+            info = VideoPathInfo("001", "entrance", date(2025, 1, 6), time(10, 0), time(10, 10), "a.mp4")
+            values = segments_crud.segment_values(store.id, camera.id, info, tmp_path, "UTC", fingerprint="a")
+            [segment_id] = segments_crud.insert_segments(session, [values])
+            for i, offset in enumerate(offsets):
+                ts = base + timedelta(minutes=offset)
+                common = dict(store_id=store.id, camera_id=camera.id, segment_id=segment_id, ts=ts, track_id=str(i))
+                session.add(PeopleFlowEvent(direction="IN", **common))
+                session.add(FaceCapture(path=f"{i}.jpg", **common))
+            store_id = store.id
+
+        from apps.api.main import app
+
+        params = {"store_id": store_id, "start": "2025-01-06T13:01:00Z", "end": "2025-01-06T13:06:00Z", "limit": 2}
+        with TestClient(app) as client:
+            for path in ("/events", "/faces"):
+                rows = _page_through(client, path, params)
+                # every row in the range exactly once, in (ts, id) order
+                expected = sorted((o, i) for i, o in enumerate(offsets) if 1 <= o < 6)
+                assert [(r["ts"], r["id"]) for r in rows] == sorted((r["ts"], r["id"]) for r in rows)
+                assert [r["track_id"] for r in rows] == [str(i) for _o, i in expected]
+
+                response = client.get(path, params={**params, "format": "ndjson"})
+                assert response.headers["content-type"].startswith("application/x-ndjson")
+                streamed = [json.loads(line) for line in response.text.splitlines()]
+                assert [r["id"] for r in streamed] == [r["id"] for r in rows]
+
+                cursor = client.get(path, params=params).headers["X-Next-Cursor"]
+                resumed = client.get(path, params={**params, "format": "ndjson", "cursor": cursor})
+                assert [json.loads(line)["id"] for line in resumed.text.splitlines()] == [r["id"] for r in rows[2:]]
+            assert client.get("/events", params={"cursor": "bad"}).status_code == 400
+    finally:
+        get_settings.cache_clear()
+
+
+class _Recorder:
+    def __init__(self):
+        self.seen = []
+
+    def labels(self, *labels):
+        self.seen.append(labels)
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+
+def test_request_metrics_label_by_route_template(monkeypatch):
+    from apps.api import main
+
+    recorder = _Recorder()
+    monkeypatch.setattr(main.metrics, "HTTP_REQUESTS", recorder)
+    with TestClient(main.app) as client:
+        client.get("/health")
+        client.get("/no/such/path/12345")
+        client.get("/kpis/hourly", params={"store_id": 1, "date": "bad"})
+    assert recorder.seen == [("GET", "/health", "200"), ("GET", "unmatched", "404"), ("GET", "/kpis/hourly", "400")]
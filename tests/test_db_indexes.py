@@ -0,0 +1,30 @@
+from datetime import date
+
+from sqlalchemy import create_engine, inspect
+
+from people_analytics.db import models  # noqa: F401
+from people_analytics.db.base import Base
+from people_analytics.db.partitions import month_partition_ddl, months_between, partition_horizon
+
+
+def test_composite_indexes_created():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    events = {ix["name"]: ix["column_names"] for ix in inspector.get_indexes("people_flow_events")}
+    assert events["ix_people_flow_events_store_camera_ts"] == ["store_id", "camera_id", "ts"]
+    assert "ix_people_flow_events_store_id" not in events
+    jobs = {ix["name"]: ix["column_names"] for ix in inspector.get_indexes("jobs")}
+    assert jobs["ix_jobs_status_run_after_id"] == ["status", "run_after", "id"]
+
+
+def test_month_partitions():
+    assert months_between(date(2025, 11, 30), date(2026, 1, 1)) == [
+        date(2025, 11, 1),
+        date(2025, 12, 1),
+        date(2026, 1, 1),
+    ]
+    assert partition_horizon(date(2025, 11, 15), 3) == date(2026, 2, 1)
+    ddl = month_partition_ddl("people_flow_events", date(2025, 12, 9))
+    assert "people_flow_events_y2025m12 PARTITION OF people_flow_events" in ddl
+    assert "FROM ('2025-12-01 00:00:00+00') TO ('2026-01-01 00:00:00+00')" in ddl
@@ -0,0 +1,120 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from people_analytics.vision.detectors import (
+    decode_yolo,
+    input_size_for,
+    letterbox,
+    nms,
+    onnx_model_path,
+    tile_boxes,
+)
+
+
+def test_letterbox_keeps_aspect_and_centers():
+    image = np.zeros((360, 640, 3), dtype=np.uint8)
+    padded, ratio, pad = letterbox(image, (320, 320))
+    assert padded.shape == (320, 320, 3)
+    assert ratio == 0.5
+    assert pad == (0, 70)
+
+
+def test_nms_drops_overlapping_lower_scores():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60]], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.7], dtype=np.float32)
+    assert nms(boxes, scores, 0.5).tolist() == [1, 2]
+
+
+def test_decode_yolo_maps_boxes_back_to_frame():
+    # two classes; anchors: a person, a duplicate of it, a class-1 box, empty rest
+    output = np.zeros((1, 6, 16), dtype=np.float32)
+    output[0, :4, 0] = [160, 160, 40, 80]
+    output[0, :4, 1] = [161, 161, 40, 80]
+    output[0, :4, 2] = [60, 100, 20, 20]
+    output[0, 4, 0], output[0, 4, 1], output[0, 5, 2] = 0.9, 0.6, 0.95
+    dets = decode_yolo(output, 0.5, 0.45, [0], ratio=0.5, pad=(0, 70), frame_shape=(360, 640, 3))
+    assert len(dets) == 1
+    assert dets[0]["bbox"] == pytest.approx([280, 100, 360, 260])
+    assert dets[0]["class_id"] == 0
+
+
+def test_int8_model_path_defaults_next_to_fp32_export():
+    assert onnx_model_path({}, "models/yolov8n.pt") == "models/yolov8n.onnx"
+    assert onnx_model_path({}, "models/yolov8n.pt", "int8") == "models/yolov8n.int8.onnx"
+    cfg = {"onnx_model": "m/a.onnx", "onnx_model_int8": "m/a-q.onnx"}
+    assert onnx_model_path(cfg, "ignored.pt", "int8") == "m/a-q.onnx"
+
+
+def test_input_size_follows_roi_in_stride_multiples():
+    assert input_size_for(300, 180) == (320, 192)
+    assert input_size_for(640, 240) == (640, 256)
+    # larger than imgsz: scaled down keeping the aspect
+    assert input_size_for(1280, 360, max_size=640) == (640, 192)
+
+
+def test_tiles_cover_region_with_overlap():
+    tiles = tile_boxes(0, 100, 1000, 300, cols=2, overlap=0.25)
+    assert len(tiles) == 2
+    assert tiles[0][0] == 0 and tiles[-1][2] == 1000
+    assert tiles[1][0] < tiles[0][2]
+    assert all(t[1] == 100 and t[3] == 300 for t in tiles)
+
+
+def test_auto_imgsz_crops_source_frame_and_maps_back():
+    from people_analytics.vision.pipeline import PipelineResult
+    from people_analytics.vision.stages.detect_people import DetectPeopleStage
+
+    class _Detector:
+        def __init__(self):
+            self.calls = []
+
+        def detect(self, frame, conf, iou, classes=None, imgsz=None):
+            self.calls.append((frame.shape[:2], imgsz))
+            h, w = frame.shape[:2]
+            return [{"bbox": [0.0, 0.0, w / 2, h / 2], "confidence": 0.9, "class_id": 0}]
+
+    cfg = {
+        "roi": {"x": 0, "y": 120, "w": 640, "h": 240},
+        "resize": {"w": 640, "h": 360},
+        "processing": {"crop_roi": True, "auto_imgsz": True},
+    }
+    stage = DetectPeopleStage(cfg)
+    stage.detector = _Detector()
+    context = {"result": PipelineResult()}
+    stage.setup(context)
+    context["frame"] = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    stage.on_frame(context)
+    assert stage.detector.calls == [((720, 1920), (640, 256))]
+    assert context["detections"][0]["bbox"] == pytest.approx([0, 120, 320, 240])
+
+
+def test_face_auto_imgsz_sizes_input_from_roi(tmp_path):
+    from people_analytics.vision.pipeline import PipelineResult
+    from people_analytics.vision.stages.extract_faces import ExtractFacesStage
+
+    class _Detector:
+        def __init__(self):
+            self.calls = []
+
+        def detect(self, frame, conf, iou, classes=None, imgsz=None):
+            self.calls.append((frame.shape[:2], imgsz))
+            return [{"bbox": [100.0, 20.0, 160.0, 80.0], "confidence": 0.95, "class_id": 0}]
+
+    cfg = {
+        "roi": {"x": 0, "y": 120, "w": 640, "h": 240},
+        "face_capture": {"enabled": True, "backend": "onnx", "crop_roi": True, "auto_imgsz": True, "min_width": 40},
+    }
+    stage = ExtractFacesStage(cfg, faces_root=str(tmp_path))
+    stage.model = _Detector()
+    context = {"result": PipelineResult()}
+    stage.setup(context)
+    context.update(
+        frame=np.zeros((360, 640, 3), dtype=np.uint8),
+        ts=0.0,
+        tracks=[{"track_id": "1", "bbox": [80.0, 130.0, 200.0, 350.0]}],
+    )
+    stage.on_frame(context)
+    assert stage.model.calls == [((240, 640), (640, 256))]
+    assert context["result"].face_captures[0]["face_bbox"] == [100.0, 140.0, 160.0, 200.0]
@@ -0,0 +1,12 @@
+from people_analytics.vision.evaluation import DetectionAgreement
+
+
+def test_detection_agreement_counts_matches_misses_and_extras():
+    agreement = DetectionAgreement(iou=0.5)
+    agreement.add([[0, 0, 10, 10]], [[1, 0, 11, 10]])
+    agreement.add([[0, 0, 10, 10], [50, 50, 60, 60]], [[0, 0, 10, 10], [100, 100, 110, 110]])
+    summary = agreement.to_dict()
+    assert summary["frames"] == 2
+    assert summary["frame_agreement"] == 0.5
+    assert (summary["precision"], summary["recall"]) == (0.6667, 0.6667)
+    assert 0.8 < summary["mean_iou"] < 1.0
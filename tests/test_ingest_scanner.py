@@ -0,0 +1,142 @@
+import os
+import threading
+from datetime import date
+
+from sqlalchemy import func, select
+
+from apps.worker.processors.segment_processor import fail_segment_job
+from people_analytics.core.settings import get_settings
+from people_analytics.db import session as db_session
+from people_analytics.db.crud import jobs as jobs_crud
+from people_analytics.db.models import Job, VideoSegment
+from people_analytics.storage.ingest import run_ingest
+from people_analytics.storage.scanner import ScanState, iter_partitions, scan_videos
+from people_analytics.storage.watcher import StableFileTracker, VideoWatcher
+
+
+def _touch(root, rel, content=None):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content if content is not None else rel.encode("utf-8"))
+
+
+def test_scanner_prunes_partitions(tmp_path):
+    _touch(tmp_path, "store=001/camera=entrance/date=2025-12-30/10-00-00__10-10-00.mp4")
+    _touch(tmp_path, "store=001/camera=entrance/date=2025-12-31/10-00-00__10-10-00.mp4")
+    _touch(tmp_path, "store=001/camera=entrance/date=2025-12-31/notes.txt")
+    _touch(tmp_path, "store=001/camera=entrance/date=bad/10-00-00__10-10-00.mp4")
+
+    assert len(list(scan_videos(tmp_path, workers=2))) == 2
+    recent = list(iter_partitions(tmp_path, since=date(2025, 12, 31)))
+    assert [p.key for p in recent] == ["store=001/camera=entrance/date=2025-12-31"]
+
+    state = ScanState()
+    state.mark(recent[0])
+    assert not state.changed(recent[0])
+    state.save(tmp_path / "state.json")
+    assert ScanState.load(tmp_path / "state.json").partitions == state.partitions
+
+
+def test_run_ingest_is_incremental(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'ingest.db'}")
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    try:
+        db_session.init_db()
+        root = tmp_path / "videos"
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-00-00__10-10-00.mp4")
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-10-00__10-20-00.mp4")
+        _touch(root, "store=002/camera=entrance/date=2025-12-31/10-00-00__10-10-00.mp4")
+
+        state = ScanState()
+        stats = run_ingest(root, state=state, workers=2, batch_size=2)
+        assert (stats["scanned"], stats["created"]) == (3, 3)
+
+        stats = run_ingest(root, state=state, workers=2)
+        assert (stats["skipped"], stats["scanned"], stats["created"]) == (2, 0, 0)
+
+        day = root / "store=001/camera=entrance/date=2025-12-31"
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-20-00__10-30-00.mp4")
+        os.utime(day, ns=(day.stat().st_atime_ns, day.stat().st_mtime_ns + 1_000_000_000))
+        stats = run_ingest(root, state=state, workers=2)
+        assert (stats["skipped"], stats["scanned"], stats["created"]) == (1, 3, 1)
+
+        with db_session.get_session() as session:
+            assert session.scalar(select(func.count()).select_from(VideoSegment)) == 4
+            assert session.scalar(select(func.count()).select_from(Job)) == 4
+    finally:
+        get_settings.cache_clear()
+
+
+def test_run_ingest_skips_duplicate_content(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'dup.db'}")
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    try:
+        db_session.init_db()
+        root = tmp_path / "videos"
+        _touch(root, "store=001/camera=entrance/date=2025-12-30/10-00-00__10-10-00.mp4", b"same")
+        stats = run_ingest(root, workers=1)
+        assert (stats["created"], stats["duplicates"]) == (1, 0)
+
+        # a re-synced export of the same file, twice in one batch
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-00-00__10-10-00.mp4", b"same")
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-10-00__10-20-00.mp4", b"other")
+        _touch(root, "store=001/camera=entrance/date=2025-12-31/10-20-00__10-30-00.mp4", b"other")
+        stats = run_ingest(root, since=date(2025, 12, 31), workers=1)
+        assert (stats["created"], stats["duplicates"]) == (1, 2)
+
+        with db_session.get_session() as session:
+            segments = {s.path[-22:]: s for s in session.execute(select(VideoSegment)).scalars()}
+            assert session.scalar(select(func.count()).select_from(Job)) == 2
+        dup = segments["10-20-00__10-30-00.mp4"]
+        assert dup.status == "duplicate"
+        assert dup.duplicate_of == segments["10-10-00__10-20-00.mp4"].id
+
+        # the original fails: its copy is queued in its place
+        with db_session.get_session() as session:
+            job = jobs_crud.enqueue_job(session, "PROCESS_SEGMENT", {"segment_id": dup.duplicate_of})
+            fail_segment_job(session, job)
+        with db_session.get_session() as session:
+            promoted = session.get(VideoSegment, dup.id)
+            assert (promoted.status, promoted.duplicate_of) == ("new", None)
+            assert session.get(VideoSegment, dup.duplicate_of).status == "failed"
+            payloads = [j.payload_json for j in session.execute(select(Job)).scalars()]
+            assert payloads[-1] == {"segment_id": dup.id}
+    finally:
+        get_settings.cache_clear()
+
+
+def test_stable_file_tracker(tmp_path):
+    path = tmp_path / "store=001/camera=entrance/date=2025-12-31/10-00-00__10-10-00.mp4"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"ab")
+    tracker = StableFileTracker(settle_s=5)
+    tracker.observe(str(path), now=0)
+    assert tracker.ready(now=0) == []
+    with path.open("ab") as f:
+        f.write(b"cd")
+    assert tracker.ready(now=4) == []
+    assert tracker.ready(now=8) == []
+    assert tracker.ready(now=9.5) == [str(path)]
+
+    tracker.observe(str(path), closed=True, now=10)
+    assert tracker.ready(now=10) == [str(path)]
+
+
+def test_video_watcher_polling(tmp_path):
+    today = date.today().isoformat()
+    _touch(tmp_path, f"store=001/camera=entrance/date={today}/10-00-00__10-10-00.mp4")
+    seen = []
+    stop = threading.Event()
+
+    def on_ready(paths):
+        seen.extend(paths)
+        stop.set()
+
+    watcher = VideoWatcher(tmp_path, on_ready, settle_s=0, poll_s=0.05, backend="poll")
+    thread = threading.Thread(target=watcher.run, kwargs={"stop": stop, "tick_s": 0.05})
+    thread.start()
+    thread.join(timeout=5)
+    stop.set()
+    assert [p.rsplit("/", 1)[-1] for p in seen] == ["10-00-00__10-10-00.mp4"]
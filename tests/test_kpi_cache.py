@@ -0,0 +1,55 @@
+import asyncio
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from apps.api.cache import KpiCache
+from people_analytics.db import models  # noqa: F401
+from people_analytics.db.base import Base
+from people_analytics.db.crud import jobs as jobs_crud
+
+
+def test_kpi_cache_invalidates_by_store_and_day():
+    cache = KpiCache(ttl_s=60)
+    cache.set(("daily", 1), ["a"], [1], date(2025, 1, 1), date(2025, 1, 31))
+    cache.set(("daily", 2), ["b"], [2], date(2025, 1, 1), date(2025, 1, 31))
+    cache.set(("compare", (1, 2)), ["c"], [1, 2], date(2025, 2, 1), date(2025, 2, 7))
+
+    assert cache.invalidate(1, date(2025, 1, 15)) == 1
+    assert cache.get(("daily", 1)) is None
+    assert cache.get(("daily", 2)) == ["b"]
+    assert cache.get(("compare", (1, 2))) == ["c"]
+
+    assert cache.invalidate(2, date(2025, 2, 3)) == 1
+    assert cache.get(("compare", (1, 2))) is None
+
+
+def test_kpi_cache_expires_and_evicts():
+    cache = KpiCache(ttl_s=-1)
+    assert not cache.enabled
+
+    async def compute():
+        return 42
+
+    assert asyncio.run(cache.get_or_compute("k", [1], date(2025, 1, 1), date(2025, 1, 1), compute)) == 42
+
+    cache = KpiCache(ttl_s=60, max_entries=2)
+    for i in range(3):
+        cache.set(i, i, [1], date(2025, 1, 1), date(2025, 1, 1))
+    assert cache.get(0) is None
+    assert cache.get(2) == 2
+
+
+def test_recorded_backfill_invalidates_the_whole_store():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    cache = KpiCache(ttl_s=60)
+    cache.set(("weekly", 1), ["a"], [1], date(2025, 1, 6), date(2025, 1, 12))
+    cache.set(("weekly", 2), ["b"], [2], date(2025, 1, 6), date(2025, 1, 12))
+    with Session(engine) as session:
+        jobs_crud.record_done(session, "KPI_REBUILD", {"store_id": 1, "source": "kpi-rollup-backfill"})
+        assert jobs_crud.claim_job(session, "w1") is None
+        cache.sync_invalidations(session)
+    assert cache.get(("weekly", 1)) is None
+    assert cache.get(("weekly", 2)) == ["b"]
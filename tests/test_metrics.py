@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from people_analytics.core import metrics
+from people_analytics.db import models  # noqa: F401
+from people_analytics.db.base import Base
+from people_analytics.db.crud import jobs as jobs_crud
+
+
+def test_queue_stats_and_noop_metric():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime(2025, 1, 1, 12, tzinfo=timezone.utc)
+    with Session(engine) as session:
+        jobs_crud.enqueue_jobs(session, "PROCESS_SEGMENT", [{"segment_id": 1}], run_after=now - timedelta(minutes=5))
+        jobs_crud.enqueue_jobs(session, "PROCESS_SEGMENT", [{"segment_id": 2}], run_after=now - timedelta(minutes=1))
+        jobs_crud.enqueue_job(session, "KPI_REBUILD", {}, run_after=now + timedelta(minutes=1))
+        stats = jobs_crud.queue_stats(session, now)
+    assert stats == [{"type": "PROCESS_SEGMENT", "depth": 2, "oldest_age_s": 300.0}]
+    metrics.record_queue(stats)
+
+    noop = metrics._NoopMetric()
+    noop.labels("a", "b").inc()
+    with metrics.observe_seconds(noop, "x"):
+        pass
@@ -0,0 +1,47 @@
+import shutil
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect
+
+ROOT = Path(__file__).resolve().parents[1]
+BASELINE_DB = ROOT / "var" / "people_analytics.db"
+
+
+def _upgrade(url: str) -> None:
+    config = Config(str(ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(ROOT / "src" / "people_analytics" / "db" / "migrations"))
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+
+
+@pytest.mark.skipif(not BASELINE_DB.exists(), reason="baseline database not present")
+def test_upgrade_baseline_database_to_head(tmp_path):
+    db = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, db)
+    _upgrade(f"sqlite:///{db}")
+
+    inspector = inspect(create_engine(f"sqlite:///{db}"))
+    tables = set(inspector.get_table_names())
+    assert {"kpi_daily", "kpi_weekly", "kpi_monthly"} <= tables
+    assert "finished_at" in {c["name"] for c in inspector.get_columns("jobs")}
+    assert "visitor_id" in {c["name"] for c in inspector.get_columns("face_captures")}
+    assert {"content_sha256", "duplicate_of"} <= {c["name"] for c in inspector.get_columns("video_segments")}
+    jobs = {ix["name"]: ix["column_names"] for ix in inspector.get_indexes("jobs")}
+    assert jobs["ix_jobs_type_status_finished_at"] == ["type", "status", "finished_at"]
+    weekly = {uq["name"]: uq["column_names"] for uq in inspector.get_unique_constraints("kpi_weekly")}
+    assert weekly["uq_kpi_weekly"] == ["store_id", "camera_id", "week_start"]
+    faces = {ix["name"] for ix in inspector.get_indexes("face_captures")}
+    assert "ix_face_captures_visitor_id" in faces and "ix_face_captures_store_id" not in faces
+
+
+def test_upgrade_after_init_db_is_idempotent(tmp_path):
+    from people_analytics.db import models  # noqa: F401
+    from people_analytics.db.base import Base
+
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    Base.metadata.create_all(create_engine(url))
+    _upgrade(url)
+    assert "kpi_monthly" in inspect(create_engine(url)).get_table_names()
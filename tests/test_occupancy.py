@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+from people_analytics.kpi.aggregators.occupancy import OccupancyAggregator
+
+
+def test_occupancy_series_is_order_independent():
+    base = datetime(2025, 1, 1, 13, 0, tzinfo=timezone.utc)
+    segment_a = [
+        {"ts": base + timedelta(seconds=10), "direction": "IN"},
+        {"ts": base + timedelta(seconds=20), "direction": "IN"},
+    ]
+    segment_b = [
+        {"ts": base + timedelta(minutes=2, seconds=5), "direction": "OUT"},
+        {"ts": base + timedelta(minutes=2, seconds=30), "direction": "IN"},
+    ]
+
+    aggregator = OccupancyAggregator(resolution_s=60)
+    aggregator.add_many(segment_b)
+    aggregator.add_many(segment_a)
+
+    series = aggregator.series("America/Sao_Paulo")
+    assert [row["occupancy"] for row in series] == [2, 2, 2]
+    assert series[0]["ts"].hour == 10
+    assert aggregator.max() == 2
+    assert aggregator.final_occupancy() == 2
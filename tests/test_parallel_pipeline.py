@@ -0,0 +1,99 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from people_analytics.vision.parallel import ParallelPipeline
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.shm_ring import FrameRing
+
+
+class _BrightnessDetector:
+    # one "detection" per frame carrying the frame brightness, so the test can
+    # check that each result is paired with the right frame and order
+    def __init__(self, camera_cfg):
+        self.fail_at = camera_cfg.get("fail_at")
+
+    def setup(self, context):
+        context["detections"] = []
+
+    def on_frame(self, context):
+        value = float(context["frame"].mean())
+        if self.fail_at is not None and context["ts"] >= self.fail_at:
+            raise ValueError("boom")
+        context["detections"] = [{"bbox": [0, 0, 1, 1], "confidence": value, "class_id": 0}]
+
+    def on_finish(self, context):
+        pass
+
+
+class _Recorder:
+    def __init__(self):
+        self.seen = []
+
+    def setup(self, context):
+        self.seen = []
+
+    def on_frame(self, context):
+        det = context["detections"][0]["confidence"] if context["detections"] else None
+        self.seen.append((round(context["ts"], 3), det, float(context["frame"].mean())))
+
+    def on_finish(self, context):
+        pass
+
+
+def _write_clip(path, frames=40):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 10, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), (i * 6) % 250, dtype=np.uint8))
+    writer.release()
+
+
+def test_frame_ring_shares_slots_between_handles():
+    ring = FrameRing(3, (4, 5, 3))
+    other = FrameRing.attach(ring.spec)
+    try:
+        ring.write(2, np.full((4, 5, 3), 7, dtype=np.uint8))
+        assert int(other.view(2).sum()) == 7 * 60
+        with pytest.raises(RuntimeError):
+            ring.write(0, np.zeros((2, 2, 3), dtype=np.uint8))
+    finally:
+        other.close()
+        ring.close()
+        ring.unlink()
+
+
+def test_parallel_pipeline_matches_sequential_order(tmp_path):
+    path = tmp_path / "clip.mp4"
+    _write_clip(path)
+    sequential = _Recorder()
+    Pipeline([_BrightnessDetector({}), sequential], target_fps=5).run(path)
+
+    parallel = _Recorder()
+    pipeline = ParallelPipeline({}, [parallel], target_fps=5, workers=3, detector_factory=_BrightnessDetector)
+    try:
+        result = pipeline.run(path)
+        assert parallel.seen == sequential.seen
+        assert result.frames_read == len(sequential.seen) == 20
+        assert result.timings["stages"]["_BrightnessDetector"]["frame"]["calls"] == 20
+        # workers are reused by the next run
+        assert pipeline.run(path, max_seconds=1.0).frames_read == 6
+    finally:
+        pipeline.close()
+
+
+def test_parallel_pipeline_reports_worker_errors(tmp_path):
+    path = tmp_path / "clip.mp4"
+    _write_clip(path)
+    pipeline = ParallelPipeline(
+        {"fail_at": 1.0}, [_Recorder()], target_fps=5, workers=2, detector_factory=_BrightnessDetector
+    )
+    try:
+        result = pipeline.run(path)
+        assert "boom" in result.errors
+        assert result.frames_read < 20
+        missing = pipeline.run(tmp_path / "missing.mp4")
+        assert missing.errors == ["cannot-open-video"]
+        assert missing.frames_read == 0
+    finally:
+        pipeline.close()
@@ -0,0 +1,74 @@
+import json
+from datetime import date
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from people_analytics.core.exceptions import ExportError
+from people_analytics.db import models  # noqa: F401
+from people_analytics.db.base import Base
+from people_analytics.db.crud import kpis as kpis_crud
+from people_analytics.db.crud import segments as segments_crud
+from people_analytics.kpi.rollups import backfill_rollups
+from people_analytics.storage.parquet import ParquetExporter, read_table
+
+OUTPUT = {
+    "segment": {
+        "store_code": "001",
+        "camera_code": "entrance",
+        "start_time": "2025-12-31T10:00:00-03:00",
+        "end_time": "2025-12-31T10:05:00-03:00",
+    },
+    "counts": {"in": 1, "out": 0, "staff_in": 0, "staff_out": 0},
+    "events": [{"ts": "2025-12-31 10:01:13.375000-03:00", "direction": "IN", "track_id": "7", "confidence": 0.87}],
+    "presence_samples": [{"ts": "2025-12-31 10:00:00-03:00", "count": 2}],
+    "face_captures": [{"ts": "2025-12-31 10:01:13-03:00", "track_id": "7", "face_bbox": [1, 2, 3, 4], "path": "a.jpg"}],
+    "meta": {"frames_read": 1800, "duration_s": 300.0, "errors": [], "timings": {}},
+}
+
+
+def test_segment_export_is_partitioned_and_idempotent(tmp_path):
+    exporter = ParquetExporter(tmp_path)
+    exporter.export_segment(OUTPUT)
+    exporter.export_segment(OUTPUT)
+
+    events = read_table(tmp_path, "events").to_pylist()
+    assert len(events) == 1
+    assert (events[0]["store"], events[0]["camera"], events[0]["date"]) == ("001", "entrance", "2025-12-31")
+    assert events[0]["ts"].isoformat() == "2025-12-31T13:01:13.375000+00:00"
+    assert read_table(tmp_path, "face_captures").to_pylist()[0]["face_bbox"] == [1.0, 2.0, 3.0, 4.0]
+    assert read_table(tmp_path, "segments").to_pylist()[0]["frames_read"] == 1800
+
+
+def test_export_refuses_other_schema_versions(tmp_path):
+    ParquetExporter(tmp_path).export_segment(OUTPUT)
+    marker = tmp_path / "events" / "_schema.json"
+    marker.write_text(json.dumps({"schema_version": 0}), encoding="utf-8")
+    with pytest.raises(ExportError):
+        ParquetExporter(tmp_path).export_segment(OUTPUT)
+
+
+def test_kpi_export_groups_by_store_camera_and_period(tmp_path):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        store = segments_crud.ensure_store(session, "001", None)
+        camera = segments_crud.ensure_camera(session, store.id, "entrance")
+        for day in (date(2025, 1, 30), date(2025, 1, 31)):
+            row = {"hour": 10, "in_count": day.day, "out_count": 1, "staff_in": 0, "staff_out": 0}
+            kpis_crud.replace_hourly(session, store.id, camera.id, day, [row])
+        backfill_rollups(session, date(2025, 1, 30), date(2025, 1, 31))
+        session.flush()
+        ParquetExporter(tmp_path).export_kpis(session, date(2025, 1, 1), date(2025, 1, 31))
+
+    hourly = read_table(tmp_path, "kpi_hourly").to_pylist()
+    assert sorted((r["date"], r["camera"], r["in"]) for r in hourly) == [
+        ("2025-01-30", "entrance", 30),
+        ("2025-01-31", "entrance", 31),
+    ]
+    monthly = read_table(tmp_path, "kpi_monthly").to_pylist()
+    assert [(r["date"], r["in"]) for r in monthly] == [("2025-01-01", 61)]
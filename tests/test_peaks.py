@@ -0,0 +1,39 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from people_analytics.kpi.aggregators.peaks import peak_window, peak_windows, peak_windows_from_buckets
+
+
+def _brute_force(events, window_minutes):
+    events = sorted(events, key=lambda e: e["ts"])
+    best = None
+    window = timedelta(minutes=window_minutes)
+    for event in events:
+        start = event["ts"]
+        end = start + window
+        count = sum(1 for e in events if start <= e["ts"] < end and e["direction"] == "IN")
+        if not best or count > best["count"]:
+            best = {"start": start, "end": end, "count": count}
+    return best
+
+
+def test_peak_window_matches_brute_force():
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1, 8, tzinfo=timezone.utc)
+    events = [
+        {"ts": base + timedelta(seconds=rng.randint(0, 36000)), "direction": rng.choice(["IN", "OUT"])}
+        for _ in range(400)
+    ]
+    for minutes in (5, 30, 60):
+        assert peak_window(events, minutes) == _brute_force(events, minutes)
+
+
+def test_top_k_peaks_do_not_overlap():
+    base = datetime(2025, 1, 1, 8, tzinfo=timezone.utc)
+    buckets = [(base + timedelta(hours=h), count) for h, count in enumerate([5, 9, 2, 7, 8, 1])]
+    peaks = peak_windows_from_buckets(buckets, window_minutes=(60, 120), top_k=2)
+    assert [p["count"] for p in peaks[60]] == [9, 8]
+    assert [p["count"] for p in peaks[120]] == [15, 14]
+    assert peaks[120][0]["start"] == base + timedelta(hours=3)
+
+    assert peak_windows([], window_minutes=(15,)) == {15: []}
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.profiling import StageTimer
+
+
+class _FakeReader:
+    def iter_frames(self, path):
+        for i in range(20):
+            yield i, i * 0.5
+
+
+class _NoopStage:
+    def setup(self, context):
+        pass
+
+    def on_frame(self, context):
+        pass
+
+    def on_finish(self, context):
+        pass
+
+
+def test_pipeline_records_stage_timings():
+    pipeline = Pipeline([_NoopStage()])
+    pipeline.reader = _FakeReader()
+    result = pipeline.run(Path("x.mp4"))
+    timings = result.timings
+    assert result.frames_read == 20
+    assert timings["decode"]["calls"] == 21
+    assert timings["stages"]["_NoopStage"]["frame"]["calls"] == 20
+    assert timings["realtime_factor"] > 0
+
+
+def test_stage_timer_reservoir_percentiles():
+    timer = StageTimer(reservoir_size=50)
+    for i in range(1, 1001):
+        timer.add(i / 1000, 0.0)
+    assert timer.calls == 1000
+    assert len(timer.samples) == 50
+    assert timer.max_s == 1.0
+    assert 0.2 < timer.percentile(0.5) < 0.8
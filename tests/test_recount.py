@@ -0,0 +1,85 @@
+from datetime import datetime, time, timezone
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from apps.cli import recount
+from people_analytics.storage.paths import VideoPathInfo
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.replay import load_recording, replay_recording
+from people_analytics.vision.stages.count_line import CountLineStage
+from people_analytics.vision.stages.record_tracks import RecordTracksStage
+
+CFG = {"line": {"start": [0, 100], "end": [200, 100], "min_interval_s": 0.0}, "direction": "outside_to_inside"}
+
+
+class _IndexReader:
+    def iter_frames(self, path):
+        for i in range(20):
+            yield i, i * 0.5
+
+
+class _FakeTracks:
+    # track 1 walks down through y=100 and back up; track 2 stays above y=60
+    def setup(self, context):
+        context["tracks"] = []
+
+    def on_frame(self, context):
+        i = context["frame"]
+        y = 45 + i * 10 if i < 10 else 135 - (i - 10) * 10
+        context["detections"] = [{"bbox": [10.0, y, 30.0, y + 20], "confidence": 0.9, "class_id": 0}]
+        context["tracks"] = [
+            {"track_id": "1", "bbox": [10.0, y, 30.0, y + 20], "confidence": 0.9, "class_id": 0},
+            {"track_id": "2", "bbox": [50.0, 20.0, 70.0, 40.0 + i], "confidence": None, "class_id": 0},
+        ]
+
+    def on_finish(self, context):
+        pass
+
+
+def _record(root):
+    info = VideoPathInfo("001", "entrance", datetime(2025, 12, 31).date(), time(10), time(10, 5), "x.mp4")
+    base_ts = datetime(2025, 12, 31, 13, tzinfo=timezone.utc)
+    pipeline = Pipeline([_FakeTracks(), RecordTracksStage(CFG, root), CountLineStage(CFG)])
+    pipeline.reader = _IndexReader()
+    result = pipeline.run(Path("10-00-00__10-05-00.mp4"), base_ts=base_ts, segment_info=info)
+    return result, root / "store=001" / "camera=entrance" / "date=2025-12-31" / "10-00-00__10-05-00.npz"
+
+
+def test_replay_with_recorded_config_reproduces_events(tmp_path):
+    result, path = _record(tmp_path)
+    recording = load_recording(path)
+    assert recording.frames == 20
+    assert recording.meta["counts"] == {"in": 1, "out": 1, "staff_in": 0, "staff_out": 0}
+    assert recording.tracks(3)[1]["confidence"] is None
+
+    replayed = replay_recording(recording, CFG)
+    assert replayed.events == result.events
+    assert replayed.errors == []
+
+    # line moved below the turning point: track 1 never crosses it
+    moved = {**CFG, "line": {**CFG["line"], "start": [0, 160], "end": [200, 160]}}
+    assert replay_recording(recording, moved).summarize_counts()["in"] == 0
+
+
+def test_recount_cli_applies_line_overrides(tmp_path, capsys):
+    _record(tmp_path / "tracks")
+    config = tmp_path / "camera.yml"
+    config.write_text("line: {start: [0, 100], end: [200, 100], min_interval_s: 0}\n", encoding="utf-8")
+    output = tmp_path / "recount.jsonl"
+    recount(
+        input_path=str(tmp_path / "tracks"),
+        config=str(config),
+        line_start=None,
+        line_end=None,
+        min_interval_s=None,
+        direction="inside_to_outside",
+        retrack=False,
+        output_json=str(output),
+    )
+    line = output.read_text(encoding="utf-8")
+    assert '"counts":{"in":1,"out":1' in line
+    assert '"direction":"OUT"' in line.split('"events":')[1].split("}")[0]
+    assert "in 1 -> 1" in capsys.readouterr().out
@@ -0,0 +1,168 @@
+import io
+import os
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from apps import cli
+from apps.cli import _write_output
+from people_analytics.core.settings import get_settings
+from people_analytics.storage.paths import VideoPathInfo
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.result_cache import ResultCache, load_result, run_cache_key, segment_cache_key
+from people_analytics.vision.sinks import JsonlSink
+
+
+def _output(errors=None):
+    ts = datetime(2025, 12, 31, 13, 1, 13, 375000, tzinfo=timezone.utc)
+    return {
+        "segment": {"store_code": "001", "camera_code": "entrance"},
+        "counts": {"in": 1, "out": 0, "staff_in": 0, "staff_out": 0},
+        "events": [{"ts": ts, "direction": "IN", "track_id": "1"}],
+        "presence_samples": [],
+        "face_captures": [{"ts": ts, "track_id": "1", "path": "a.jpg"}],
+        "meta": {"frames_read": 10, "duration_s": 1.5, "errors": errors or [], "timings": {}},
+    }
+
+
+def test_cache_key_covers_video_config_and_models(tmp_path):
+    video = tmp_path / "10-00-00__10-05-00.mp4"
+    video.write_bytes(b"video-a")
+    model = tmp_path / "det.onnx"
+    model.write_bytes(b"weights-a")
+    cfg = {"processing": {"backend": "onnx", "onnx_model": str(model)}, "line": {"start": [0, 1]}}
+    info = VideoPathInfo("001", "entrance", datetime(2025, 12, 31).date(), None, None, "x.mp4")
+    settings = SimpleNamespace(timezone="America/Sao_Paulo", faces_root="faces")
+
+    base = run_cache_key(settings, video, cfg, info)
+    assert run_cache_key(settings, video, cfg, info) == base
+    assert run_cache_key(settings, video, cfg, info, max_seconds=5.0) != base
+    assert run_cache_key(settings, video, {**cfg, "line": {"start": [0, 2]}}, info) != base
+
+    model.write_bytes(b"weights-b")
+    assert run_cache_key(settings, video, cfg, info) != base
+    video.write_bytes(b"video-b")
+    assert segment_cache_key(video, cfg) != segment_cache_key(tmp_path / "det.onnx", cfg)
+
+
+def test_cache_round_trip_and_lru_eviction(tmp_path):
+    (tmp_path / "faces").mkdir()
+    (tmp_path / "faces" / "a.jpg").write_bytes(b"jpg")
+    cache = ResultCache(tmp_path / "cache", max_bytes=10_000)
+    assert cache.put("aa11", _output(errors=["cannot-open-video"])) is None
+    cache.put("aa11", _output())
+
+    cached = cache.get("aa11", tmp_path / "faces")
+    assert cached["meta"]["cache_hit"] is True
+    result = load_result(cached)
+    assert result.events[0]["ts"] == datetime(2025, 12, 31, 13, 1, 13, 375000, tzinfo=timezone.utc)
+    assert result.summarize_counts()["in"] == 1 and result.frames_read == 10
+    # a deleted face crop invalidates the entry
+    assert cache.get("aa11", tmp_path / "empty") is None
+
+    size = cache.path("aa11").stat().st_size
+    cache.max_bytes = size * 2
+    cache.put("bb22", _output())
+    os.utime(cache.path("aa11"), (1, 1))
+    os.utime(cache.path("bb22"), (2, 2))
+    cache.get("aa11")  # most recently used again
+    cache.put("cc33", _output())
+    assert cache.get("bb22") is None
+    assert cache.get("aa11") is not None and cache.get("cc33") is not None
+
+
+def test_spooled_segment_is_cached_as_its_jsonl_line(tmp_path):
+    output = _output()
+    spool_root = tmp_path / "spool"
+    sink = JsonlSink(spool_root / "10-00-00__10-05-00")
+    for kind in ("events", "presence_samples", "face_captures"):
+        for record in output[kind]:
+            sink.write(kind, record)
+        output[kind] = []
+    sink.close()
+
+    cache = ResultCache(tmp_path / "cache", max_bytes=1 << 20)
+    out = io.StringIO()
+    _write_output(out, output, tmp_path / "10-00-00__10-05-00.mp4", str(spool_root), cache=cache, cache_key="ab")
+    assert cache.path("ab").read_text(encoding="utf-8") == out.getvalue()
+
+    hit = cache.get("ab")
+    again = io.StringIO()
+    _write_output(again, hit, tmp_path / "10-00-00__10-05-00.mp4", str(spool_root), cache=cache, cache_key="ab")
+    assert again.getvalue().replace(',"cache_hit":true', "") == out.getvalue()
+
+
+class _OneFrameReader:
+    def iter_frames(self, path):
+        yield 0, 0.0
+
+
+class _FaceStage:
+    def __init__(self, faces_root, runs):
+        self.faces_root = faces_root
+        self.runs = runs
+
+    def setup(self, context):
+        pass
+
+    def on_frame(self, context):
+        self.runs.append(context["video_path"].name)
+        name = f"{context['video_path'].stem}.jpg"
+        (self.faces_root / name).write_bytes(b"jpg")
+        ts = context["base_ts"] + timedelta(seconds=context["ts"])
+        context["result"].add_event({"ts": ts, "direction": "IN", "track_id": "1"})
+        context["result"].add_face_capture({"ts": ts, "track_id": "1", "path": name})
+
+    def on_finish(self, context):
+        pass
+
+
+def test_split_process_reads_cache_entries_lazily(tmp_path, monkeypatch, capsys):
+    faces_root = tmp_path / "faces"
+    faces_root.mkdir()
+    monkeypatch.setenv("VIDEO_ROOT", str(tmp_path / "videos"))
+    monkeypatch.setenv("FACES_ROOT", str(faces_root))
+    monkeypatch.setenv("RESULT_CACHE_ROOT", str(tmp_path / "cache"))
+    get_settings.cache_clear()
+    day = tmp_path / "videos" / "store=001" / "camera=entrance" / "date=2025-12-31"
+    day.mkdir(parents=True)
+    segments = []
+    for name in ("10-00-00__10-05-00.mp4", "10-05-00__10-10-00.mp4", "10-10-00__10-15-00.mp4"):
+        (day / name).write_bytes(name.encode("utf-8"))
+        segments.append(day / name)
+    runs = []
+    reads = []
+    get = ResultCache.get
+
+    def logged_get(self, key, faces_root=None):
+        reads.append(len(runs))
+        return get(self, key, faces_root)
+
+    monkeypatch.setattr(cli, "_split_with_ffmpeg", lambda *args, **kwargs: list(segments))
+    monkeypatch.setattr(cli, "_rename_segments", lambda paths, *args: paths)
+    monkeypatch.setattr(cli, "load_camera_config", lambda *args: {"line": {"start": [0, 1], "end": [1, 1]}})
+    monkeypatch.setattr(
+        cli, "build_pipeline", lambda *args, **kwargs: Pipeline([_FaceStage(faces_root, runs)], reader=_OneFrameReader())
+    )
+    monkeypatch.setattr(ResultCache, "get", logged_get)
+    output = tmp_path / "out.jsonl"
+    options = dict(
+        input_path="in.mp4", store_code="001", camera_code="entrance", date="2025-12-31", base_time="10:00:00",
+        output_json=str(output), max_seconds=None, workers=1, detect_workers=0, spool=True, parquet=False,
+        compact=False, cache=True, record_tracks=False,
+    )
+    try:
+        cli.split_process(**options)
+        first = output.read_text(encoding="utf-8")
+        assert len(runs) == 3 and reads == []
+
+        # segment 2 lost its face crop: only that one runs again
+        (faces_root / "10-05-00__10-10-00.jpg").unlink()
+        cli.split_process(**options)
+        assert runs[3:] == ["10-05-00__10-10-00.mp4"]
+        # each entry is read when its line is due: the third after segment 2 ran
+        assert reads == [3, 3, 4]
+        lines = output.read_text(encoding="utf-8").replace(',"cache_hit":true', "").splitlines()
+        assert [lines[0], lines[2]] == [first.splitlines()[0], first.splitlines()[2]]
+        assert "Result cache: 2 hits, 1 misses" in capsys.readouterr().out
+    finally:
+        get_settings.cache_clear()
@@ -0,0 +1,47 @@
+from datetime import date
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from people_analytics.db import models  # noqa: F401
+from people_analytics.db.base import Base
+from people_analytics.db.crud import kpis as kpis_crud
+from people_analytics.db.models import KpiDaily, KpiMonthly, KpiWeekly
+from people_analytics.kpi.rollups import backfill_rollups, month_end, refresh_rollups, week_start
+
+
+def test_period_helpers():
+    assert week_start(date(2025, 1, 1)) == date(2024, 12, 30)
+    assert month_end(date(2024, 2, 10)) == date(2024, 2, 29)
+    assert month_end(date(2025, 12, 31)) == date(2025, 12, 31)
+
+
+def test_rollups_refresh_and_backfill():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        for day in (date(2025, 1, 30), date(2025, 1, 31), date(2025, 2, 1)):
+            kpis_crud.replace_hourly(
+                session, 1, 1, day, [{"hour": 10, "in_count": day.day, "out_count": 1, "staff_in": 0, "staff_out": 0}]
+            )
+        stats = backfill_rollups(session, date(2025, 1, 30), date(2025, 2, 1))
+        session.flush()
+        assert stats["days"] == 3
+
+        weekly = session.execute(select(KpiWeekly)).scalars().one()
+        assert (weekly.iso_week, weekly.days, weekly.in_count) == (5, 3, 62)
+        months = {m.month_start: m.in_count for m in session.execute(select(KpiMonthly)).scalars()}
+        assert months == {date(2025, 1, 1): 61, date(2025, 2, 1): 1}
+
+        refresh_rollups(
+            session,
+            1,
+            1,
+            date(2025, 1, 31),
+            {"in_count": 5, "out_count": 0, "staff_in": 0, "staff_out": 0, "max_presence": 4},
+        )
+        session.flush()
+        assert session.execute(select(KpiDaily).where(KpiDaily.date == date(2025, 1, 31))).scalar_one().in_count == 5
+        assert session.execute(select(KpiWeekly)).scalar_one().in_count == 36
+        months = {m.month_start: (m.in_count, m.max_presence) for m in session.execute(select(KpiMonthly)).scalars()}
+        assert months[date(2025, 1, 1)] == (35, 4)
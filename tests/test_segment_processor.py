@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+np = pytest.importorskip("numpy")
+
+from apps import cli
+from apps.worker.processors import segment_processor
+from people_analytics.core.settings import get_settings
+from people_analytics.db import session as db_session
+from people_analytics.db.crud import jobs as jobs_crud
+from people_analytics.db.models import FaceCapture, PeopleFlowEvent, VideoSegment
+from people_analytics.storage.ingest import run_ingest
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.result_cache import build_result_cache
+
+CFG = {"line": {"start": [0, 100], "end": [200, 100]}, "reid": {"enabled": True}}
+
+
+class _FakeReader:
+    def iter_frames(self, path):
+        for i in range(4):
+            yield i, float(i)
+
+
+class _EmitStage:
+    # one event and one face per frame; two people, so two visitors
+    def __init__(self, faces_root):
+        self.faces_root = faces_root
+
+    def setup(self, context):
+        pass
+
+    def on_frame(self, context):
+        i = context["frame"]
+        ts = context["base_ts"] + timedelta(seconds=i)
+        context["result"].add_event({"ts": ts, "direction": "IN", "track_id": str(i % 2)})
+        name = f"{context['video_path'].stem}_face_{i}.jpg"
+        (self.faces_root / name).write_bytes(b"jpg")
+        face = {"ts": ts, "track_id": str(i % 2), "path": name}
+        context["result"].add_face_capture(face)
+        embedding = np.zeros(8)
+        embedding[i % 2] = 1.0
+        context["result"].embeddings.append((face, embedding.tolist()))
+
+    def on_finish(self, context):
+        pass
+
+
+def _setup(tmp_path, monkeypatch, cache, names=("10-00-00__10-10-00.mp4",)):
+    faces_root = tmp_path / "faces"
+    faces_root.mkdir()
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'worker.db'}")
+    monkeypatch.setenv("VIDEO_ROOT", str(tmp_path / "videos"))
+    monkeypatch.setenv("FACES_ROOT", str(faces_root))
+    monkeypatch.setenv("VISITOR_INDEX_ROOT", str(tmp_path / "visitors"))
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "true" if cache else "false")
+    monkeypatch.setenv("RESULT_CACHE_ROOT", str(tmp_path / "cache"))
+    get_settings.cache_clear()
+    monkeypatch.setattr(db_session, "engine", None)
+    runs = []
+
+    def build_pipeline(camera_cfg, faces_root=None, tracks_root=None, **kwargs):
+        runs.append(camera_cfg)
+        return Pipeline([_EmitStage(tmp_path / "faces")], reader=_FakeReader())
+
+    for module in (segment_processor, cli):
+        monkeypatch.setattr(module, "load_camera_config", lambda *args: CFG)
+        monkeypatch.setattr(module, "build_pipeline", build_pipeline)
+    db_session.init_db()
+    day = tmp_path / "videos" / "store=001/camera=entrance/date=2025-12-31"
+    day.mkdir(parents=True)
+    for name in names:
+        (day / name).write_bytes(name.encode("utf-8"))
+    run_ingest(tmp_path / "videos", workers=1, enqueue=False)
+    return runs
+
+
+def _run_job(index=0):
+    with db_session.get_session() as session:
+        segment = session.execute(select(VideoSegment).order_by(VideoSegment.path)).scalars().all()[index]
+        job = jobs_crud.enqueue_job(session, "PROCESS_SEGMENT", {"segment_id": segment.id})
+        segment_processor.process_segment_job(session, job)
+        return segment.id
+
+
+def _visitor_ids(segment_id=None):
+    with db_session.get_session() as session:
+        stmt = select(FaceCapture).order_by(FaceCapture.path)
+        if segment_id is not None:
+            stmt = stmt.where(FaceCapture.segment_id == segment_id)
+        faces = session.execute(stmt).scalars().all()
+        return [f.visitor_id for f in faces]
+
+
+def test_segment_job_streams_records_and_reuses_cache(tmp_path, monkeypatch):
+    try:
+        runs = _setup(tmp_path, monkeypatch, cache=True)
+        visitors = []
+        for _ in range(2):
+            segment_id = _run_job()
+            with db_session.get_session() as session:
+                assert len(session.execute(select(PeopleFlowEvent)).scalars().all()) == 4
+                assert session.get(VideoSegment, segment_id).status == "done"
+            visitors.append(_visitor_ids())
+
+        # the second run is a cache hit and keeps the visitor ids of the first
+        assert len(runs) == 1
+        assert visitors[0] == visitors[1] == [1, 2, 1, 2]
+        cached = next((tmp_path / "cache").glob("*/*.json")).read_text(encoding="utf-8")
+        assert "embedding" not in cached and "visitor_id" not in cached
+        assert not list((tmp_path / "cache").glob(".spool-*"))
+    finally:
+        get_settings.cache_clear()
+
+
+def test_cli_reprocess_keeps_visitor_ids(tmp_path, monkeypatch):
+    try:
+        runs = _setup(tmp_path, monkeypatch, cache=False)
+        segment_id = _run_job()
+        assert _visitor_ids() == [1, 2, 1, 2]
+
+        cli._process_one(get_settings(), segment_id, None, None)
+        assert len(runs) == 2
+        assert _visitor_ids() == [1, 2, 1, 2]
+    finally:
+        get_settings.cache_clear()
+
+
+def test_cli_cache_hit_keeps_visitor_ids(tmp_path, monkeypatch):
+    try:
+        runs = _setup(tmp_path, monkeypatch, cache=True)
+        segment_id = _run_job()
+        settings = get_settings()
+        cli._process_one(settings, segment_id, None, None, cache=build_result_cache(settings))
+        assert len(runs) == 1
+        assert _visitor_ids() == [1, 2, 1, 2]
+    finally:
+        get_settings.cache_clear()
+
+
+def test_lost_visitor_index_does_not_reuse_visitor_ids(tmp_path, monkeypatch):
+    names = ("10-00-00__10-10-00.mp4", "10-10-00__10-20-00.mp4")
+    try:
+        _setup(tmp_path, monkeypatch, cache=False, names=names)
+        first = _run_job(0)
+        assert _visitor_ids(first) == [1, 2, 1, 2]
+        for path in (tmp_path / "visitors").glob("*.npz"):
+            path.unlink()
+
+        second = _run_job(1)
+        assert _visitor_ids(first) == [1, 2, 1, 2]
+        assert _visitor_ids(second) == [3, 4, 3, 4]
+    finally:
+        get_settings.cache_clear()
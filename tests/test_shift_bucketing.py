@@ -11,3 +11,28 @@ def test_shift_bucket():
     ]
     ts = datetime(2025, 1, 1, 9, 0, tzinfo=ZoneInfo("America/Sao_Paulo"))
     assert get_shift_id(ts, shifts) == "MORNING"
+
+
+def test_shift_table_overnight_and_store_override():
+    from people_analytics.core.config import shifts_for_store
+    from people_analytics.kpi.aggregators.shift import aggregate_hourly_and_shift, compile_shifts
+
+    cfg = {
+        "shifts": [{"id": "DAY", "start": "08:00", "end": "22:00"}],
+        "stores": {"002": {"shifts": [{"id": "LATE", "start": "20:00", "end": "02:00"}]}},
+    }
+    assert shifts_for_store(cfg, "001")[0]["id"] == "DAY"
+    table = compile_shifts(shifts_for_store(cfg, "002"))
+    tz = ZoneInfo("America/Sao_Paulo")
+    assert table.lookup(datetime(2025, 1, 1, 23, 30, tzinfo=tz)) == "LATE"
+    assert table.lookup(datetime(2025, 1, 1, 1, 59, tzinfo=tz)) == "LATE"
+    assert table.lookup(datetime(2025, 1, 1, 2, 0, tzinfo=tz)) is None
+    assert table.lookup_minutes([0, 600, 1439]) == ["LATE", None, "LATE"]
+
+    events = [
+        {"ts": datetime(2025, 1, 1, 21, 5, tzinfo=tz), "direction": "IN"},
+        {"ts": datetime(2025, 1, 1, 1, 0, tzinfo=tz), "direction": "OUT", "is_staff": True},
+    ]
+    hourly, by_shift = aggregate_hourly_and_shift(events, table)
+    assert hourly[21]["in"] == 1
+    assert by_shift["LATE"] == {"in": 1, "out": 1, "staff_in": 0, "staff_out": 1}
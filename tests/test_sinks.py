@@ -0,0 +1,120 @@
+import io
+import json
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+
+from apps.cli import merge_jsonl
+from people_analytics.core import jsonio
+from people_analytics.storage.paths import VideoPathInfo
+from people_analytics.vision.pipeline import Pipeline
+from people_analytics.vision.sinks import JsonlSink, ResultSink, write_segment_line
+
+
+class _FakeReader:
+    def iter_frames(self, path):
+        for i in range(6):
+            yield i, float(i)
+
+
+class _EmitStage:
+    def setup(self, context):
+        pass
+
+    def on_frame(self, context):
+        ts = datetime(2025, 1, 1, 10, 0, int(context["ts"]), tzinfo=timezone.utc)
+        context["result"].add_event({"ts": ts, "direction": "IN" if context["ts"] % 2 else "OUT", "track_id": "1"})
+        face = {"ts": ts, "track_id": "1", "path": f"f{context['ts']}.jpg"}
+        context["result"].add_face_capture(face)
+        # later stages may still enrich records of the current frame
+        face["is_staff"] = False
+
+    def on_finish(self, context):
+        context["result"].add_presence_sample({"ts": datetime(2025, 1, 1, tzinfo=timezone.utc), "count": 1})
+
+
+def _info():
+    return VideoPathInfo(
+        store_code="001",
+        camera_code="entrance",
+        date=datetime(2025, 1, 1).date(),
+        start_time=datetime(2025, 1, 1, 10).time(),
+        end_time=datetime(2025, 1, 1, 10, 5).time(),
+        relative_path="x.mp4",
+    )
+
+
+def _pipeline():
+    pipeline = Pipeline([_EmitStage()])
+    pipeline.reader = _FakeReader()
+    return pipeline
+
+
+def test_spooled_segment_line_matches_in_memory_output(tmp_path):
+    in_memory = _pipeline().run(Path("x.mp4"))
+    sink = JsonlSink(tmp_path / "spool")
+    streamed = _pipeline().run(Path("x.mp4"), sink=sink, keep_records=False)
+    sink.close()
+
+    assert streamed.events == [] and streamed.face_captures == []
+    assert streamed.summarize_counts() == in_memory.summarize_counts() == {
+        "in": 3, "out": 3, "staff_in": 0, "staff_out": 0
+    }
+    assert streamed.totals == {"events": 6, "presence_samples": 1, "face_captures": 6}
+
+    expected = in_memory.to_output(_info())
+    output = streamed.to_output(_info())
+    output["meta"]["timings"] = expected["meta"]["timings"]
+    out = io.StringIO()
+    write_segment_line(out, output, sink.paths)
+    # byte-identical to the line split-process writes without spooling
+    assert out.getvalue() == jsonio.dumps(expected) + "\n"
+    line = json.loads(out.getvalue())
+    assert line["face_captures"][0]["is_staff"] is False
+    assert line["events"][0]["ts"] == "2025-01-01T10:00:00+00:00"
+
+    compact = io.StringIO()
+    write_segment_line(compact, output, sink.paths, compact=True)
+    assert compact.getvalue() == jsonio.dumps(jsonio.compact_output(expected)) + "\n"
+    columns = json.loads(compact.getvalue())["events"]
+    assert columns["direction"] == ["OUT", "IN", "OUT", "IN", "OUT", "IN"]
+    assert list(jsonio.iter_rows(columns)) == json.loads(out.getvalue())["events"]
+
+
+def test_jsonio_backends_write_the_same_text():
+    np = pytest.importorskip("numpy")
+    value = {
+        "ts": datetime(2025, 12, 31, 10, 1, 13, 375000, tzinfo=timezone(timedelta(hours=-3))),
+        "day": date(2025, 12, 31),
+        "score": np.float32(0.5),
+        "bbox": np.array([1.0, 2.5]),
+        "name": "loja são paulo",
+        "n": [1, None, True, 0.81],
+    }
+    text = jsonio._stdlib_dumps(value)
+    assert '"ts":"2025-12-31T10:01:13.375000-03:00"' in text
+    assert '"score":0.5,"bbox":[1.0,2.5]' in text
+    if jsonio.orjson is not None:
+        assert jsonio._orjson_dumps(value) == text
+    assert jsonio.to_columns([{"a": 1}, {"b": 2}]) == {"a": [1, None], "b": [None, 2]}
+
+
+def test_merge_jsonl_streams_segments_and_totals(tmp_path):
+    src = tmp_path / "out.jsonl"
+    rows = [{"counts": {"in": 2, "out": 1}, "events": [1, 2, 3]}, {"counts": {"in": 1, "out": 4}, "events": []}]
+    src.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    dst = tmp_path / "merged.json"
+    merge_jsonl(str(src), str(dst), include_events=False, include_presence=True)
+    merged = json.loads(dst.read_text(encoding="utf-8"))
+    assert merged["totals"] == {"in": 3, "out": 5, "staff_in": 0, "staff_out": 0}
+    assert [s["events"] for s in merged["segments"]] == [[], []]
+
+
+def test_sink_without_write_fails_when_built():
+    class _NoWrite(ResultSink):
+        def close(self):
+            pass
+
+    with pytest.raises(TypeError):
+        _NoWrite()
@@ -0,0 +1,49 @@
+import shutil
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from people_analytics.vision import video_reader
+from people_analytics.vision.video_reader import FfmpegReader, VideoReader, build_reader
+
+
+def test_build_reader_defaults_to_opencv():
+    assert isinstance(build_reader({}, 6), VideoReader)
+    reader = build_reader({"processing": {"reader": "ffmpeg", "decode_threads": 2}, "resize": {"w": 320, "h": 180}}, 6)
+    assert isinstance(reader, FfmpegReader)
+    assert reader.size == (320, 180)
+    assert reader.threads == 2
+
+
+def test_ffmpeg_command_decimates_and_scales_in_decoder():
+    cmd = FfmpegReader(target_fps=5, size=(320, 180)).command("in.mp4", (320, 180), fps=15.0)
+    vf = cmd[cmd.index("-vf") + 1]
+    assert vf == "select='not(mod(n\\,3))',scale=320:180:flags=bilinear,showinfo"
+    assert cmd[-4:] == ["rawvideo", "-pix_fmt", "bgr24", "pipe:1"]
+
+
+def test_ffmpeg_passthrough_option_follows_the_version(monkeypatch):
+    assert video_reader.passthrough_args((4, 4)) == ["-vsync", "passthrough"]
+    assert video_reader.passthrough_args((5, 1)) == ["-fps_mode", "passthrough"]
+    assert video_reader.passthrough_args(None) == ["-fps_mode", "passthrough"]
+
+    monkeypatch.setattr(video_reader, "ffmpeg_version", lambda ffmpeg_bin: (4, 2))
+    cmd = FfmpegReader(target_fps=5).command("in.mp4", (320, 180), fps=15.0)
+    assert "-fps_mode" not in cmd and cmd[cmd.index("-vsync") + 1] == "passthrough"
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_ffmpeg_reader_matches_opencv_frames(tmp_path):
+    path = tmp_path / "clip.mp4"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), 15, (64, 48))
+    for i in range(30):
+        frame = np.full((48, 64, 3), i * 8, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+    expected = [ts for _frame, ts in VideoReader(target_fps=5).iter_frames(path)]
+    got = [ts for _frame, ts in FfmpegReader(target_fps=5).iter_frames(path)]
+    assert len(got) == len(expected) == 10
+    assert got == pytest.approx(expected, abs=1e-3)
@@ -0,0 +1,60 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from people_analytics.reid.visitor_index import VisitorIndex, assign_visitors, index_lock
+
+
+def _noisy(base, rng, scale=0.05):
+    return base + rng.normal(scale=scale, size=base.shape)
+
+
+def test_visitor_index_clusters_and_evicts(tmp_path):
+    rng = np.random.default_rng(1)
+    people = rng.normal(size=(20, 64))
+    index = VisitorIndex(dim=64, threshold=0.8)
+
+    first = [index.add(p, ts=0.0).visitor_id for p in people]
+    again = [index.add(_noisy(p, rng), ts=100.0).visitor_id for p in people]
+    assert first == again
+    assert len(index) == 20
+
+    path = tmp_path / "store=001.npz"
+    index.save(path)
+    loaded = VisitorIndex.load(path)
+    assert loaded.query(_noisy(people[3], rng))[0][0] == first[3]
+
+    loaded.add(rng.normal(size=64), ts=500.0)
+    assert loaded.evict_before(200.0) == 20
+    assert len(loaded) == 1
+    assert loaded.add(people[0], ts=600.0).is_new
+
+
+def test_index_lock_ignores_leftover_file_and_times_out_when_held(tmp_path):
+    path = tmp_path / "store=001.npz"
+    # a worker that crashed while holding the lock leaves the file behind
+    (tmp_path / "store=001.npz.lock").write_text("")
+    with index_lock(path, timeout_s=0.5):
+        with pytest.raises(TimeoutError):
+            with index_lock(path, timeout_s=0.2, poll_s=0.05):
+                pass
+    with index_lock(path, timeout_s=0.5):
+        pass
+
+
+def test_assign_visitors_does_not_reindex_a_segment(tmp_path):
+    rng = np.random.default_rng(2)
+    people = rng.normal(size=(3, 32))
+    index = VisitorIndex(dim=32, threshold=0.8)
+    faces = [{"ts": float(i), "path": f"{i}.jpg"} for i in range(3)]
+    assert assign_visitors(index, [(f, p.tolist()) for f, p in zip(faces, people)], segment_id=7) == 3
+    ids = [f["visitor_id"] for f in faces]
+
+    path = tmp_path / "store=001.npz"
+    index.save(path)
+    loaded = VisitorIndex.load(path)
+    counts = loaded._counts.copy()
+    retry = [{"ts": float(i), "path": f"{i}.jpg"} for i in range(3)]
+    assert assign_visitors(loaded, [(f, p.tolist()) for f, p in zip(retry, people)], segment_id=7) == 3
+    assert [f["visitor_id"] for f in retry] == ids
+    assert np.array_equal(loaded._counts, counts) and loaded.segments == {7}